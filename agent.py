@@ -1,24 +1,46 @@
 # agent.py (SAFE MODE)
 
 from scraper import duckduckgo_search, fetch_page_text
-from summarizer import summarize
+from summarizer import summarize_with_source
 
 import time
+import uuid
 import textwrap
-from fpdf import FPDF
 import os
 import re
+from concurrent.futures import CancelledError
+
+from tracing import span, add_counter
+from dedup import get_dedup_index, minhash, DEDUP_REUSE_HOURS
+from novelty import NoveltyPolicy, summary_novelty
 
 # ---- RAG MEMORY IMPORTS ----
-from rag_memory import init_and_connect, upsert_summary
-import os
+from rag_memory import init_and_connect, upsert_summary, MEMORY_ENABLED
 
 
 # ============================================================
 # FLAGS: Detect whether APIs are enabled
 # ============================================================
 OPENAI_ENABLED = bool(os.environ.get("OPENAI_API_KEY"))
-PINECONE_ENABLED = bool(os.environ.get("PINECONE_API_KEY"))
+PINECONE_ENABLED = MEMORY_ENABLED   # Pinecone key set, or VECTOR_STORE=local
+
+# Politeness delay between page fetches (seconds)
+REQUEST_DELAY = float(os.environ.get("RESEARCH_REQUEST_DELAY", "1"))
+
+# How many times run() may widen the search when too few sources were found
+MAX_EXPANSIONS = 2
+
+
+def is_research_candidate(url, title):
+    """False for search results that are never worth fetching (help pages, ads)."""
+    url = url.lower()
+    if "duckduckgo-help-pages" in url:
+        return False
+    if "ads-by-microsoft" in url:
+        return False
+    if title.lower() == "more info":
+        return False
+    return True
 
 
 # ============================================================
@@ -40,12 +62,12 @@ def clean_for_pdf(text):
 # ============================================================
 # SAVE REPORT
 # ============================================================
-def save_txt_md_pdf(report_text: str, out_base: str = "research_report"):
+def save_txt_md_pdf(report_text: str, out_base: str = "research_report", out_dir: str = "reports"):
 
-    os.makedirs("reports", exist_ok=True)
-    txt_path = os.path.join("reports", out_base + ".txt")
-    md_path = os.path.join("reports", out_base + ".md")
-    pdf_path = os.path.join("reports", out_base + ".pdf")
+    os.makedirs(out_dir, exist_ok=True)
+    txt_path = os.path.join(out_dir, out_base + ".txt")
+    md_path = os.path.join(out_dir, out_base + ".md")
+    pdf_path = os.path.join(out_dir, out_base + ".pdf")
 
     with open(txt_path, "w", encoding="utf-8") as f:
         f.write(report_text)
@@ -55,6 +77,8 @@ def save_txt_md_pdf(report_text: str, out_base: str = "research_report"):
 
     pdf_text = clean_for_pdf(report_text)
 
+    from fpdf import FPDF  # only needed when a report is actually saved
+
     pdf = FPDF(unit="mm", format="A4")
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
@@ -79,41 +103,127 @@ def save_txt_md_pdf(report_text: str, out_base: str = "research_report"):
 # ============================================================
 class ResearchAgent:
 
-    def __init__(self, query, max_articles=3):
+    def __init__(self, query, max_articles=3, progress_callback=None,
+                 search_results=None, prefetched_pages=None):
         self.query = query
         self.max_articles = max_articles
         self.collected_summaries = []
         self.visited_urls = []
+        self.progress_callback = progress_callback
+        self.trace_id = None  # set by run(); see tracing.get_trace()
+        self.run_id = uuid.uuid4().hex
+        self.expansions = 0
+        self.duplicates_skipped = 0
+        self.dedup_index = get_dedup_index()
+        self.policy = NoveltyPolicy()
+        self.stop_reason = None
+
+        # Work started speculatively by the caller (see ConversationAgent.ask):
+        # search results for the first search_web() call, and {url: Future}
+        # page texts that are already being fetched.
+        self.search_results = search_results
+        self.prefetched_pages = dict(prefetched_pages or {})
+
+    # ---------------------------------------------
+    # Progress events (polled by the job runner UI)
+    # ---------------------------------------------
+    def report_progress(self, stage, message):
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, message)
+        except Exception as e:
+            print("⚠️ Progress callback failed:", e)
 
     # ---------------------------------------------
     # Search Web
     # ---------------------------------------------
     def search_web(self):
         print("\n Searching web for:", self.query)
-        results = duckduckgo_search(self.query)
+        self.report_progress("search", f"Searching web for: {self.query}")
+        if self.search_results is not None:
+            results, self.search_results = self.search_results, None
+        else:
+            results = duckduckgo_search(self.query)
         print(f" Found {len(results)} results")
+        self.report_progress("search", f"Found {len(results)} results")
         return results
 
     # ---------------------------------------------
     # Extract + Summarize + Store in Memory
     # ---------------------------------------------
     def extract_and_summarize(self, url, title):
+        with span("article", url=url):
+            return self._extract_and_summarize(url, title)
+
+    def _extract_and_summarize(self, url, title):
         print(f"\n Fetching: {title}")
         print(f" URL: {url}")
+        self.report_progress("fetch", f"Fetching: {title}")
 
-        text = fetch_page_text(url)
+        text = None
+        future = self.prefetched_pages.pop(url, None)
+        if future is not None:
+            try:
+                text = future.result()
+            except (Exception, CancelledError) as e:
+                print(" Prefetch failed, fetching again:", e)
+        if text is None:
+            text = fetch_page_text(url)
 
         if len(text.strip()) < 50:
             print(" Skipping: Not enough text")
+            self.report_progress("skip", f"Not enough text: {title}")
             return None
 
+        # ---- Near-duplicate check (before any GPT / embedding spend) ----
+        signature = None
+        if self.dedup_index is not None:
+            signature = minhash(text)
+            # A copy already taken in this run wins over a closer one from an earlier run
+            duplicate = self.dedup_index.find(text, signature=signature, run_id=self.run_id)
+
+            if duplicate and duplicate["run_id"] == self.run_id:
+                print(f" Skipping: near-duplicate of {duplicate['url']} ({duplicate['similarity']})")
+                self.report_progress("duplicate", f"Duplicate of an earlier source: {title}")
+                self.duplicates_skipped += 1
+                add_counter("duplicates_skipped_total", 1, scope="run")
+                return None
+
+            if duplicate and duplicate["summary"] and duplicate["age_hours"] <= DEDUP_REUSE_HOURS:
+                # Seen in an earlier run: reuse its GPT summary. It is not upserted
+                # again (it went to memory then, if memory was on and the upsert worked).
+                print(f" Reusing summary of near-duplicate {duplicate['url']} ({duplicate['similarity']})")
+                self.report_progress("duplicate", f"Reusing earlier summary: {title}")
+                self.duplicates_skipped += 1
+                add_counter("duplicates_skipped_total", 1, scope="history")
+                # The copy carries the summary's original age, so reuse still expires
+                self.dedup_index.add(url, text, title=title, summary=duplicate["summary"],
+                                     run_id=self.run_id, signature=signature,
+                                     created_at=time.time() - duplicate["age_hours"] * 3600.0)
+                self.collected_summaries.append({
+                    "title": title,
+                    "url": url,
+                    "summary": duplicate["summary"],
+                    "vector": None
+                })
+                return duplicate["summary"]
+
         print("\n Summarizing page...")
-        summary = summarize(text)
+        self.report_progress("summarize", f"Summarizing: {title}")
+        summary, source = summarize_with_source(text)
+
+        if self.dedup_index is not None:
+            # Only GPT summaries are worth reusing in later runs (like the summary cache)
+            reusable = source not in ("local", "local_fallback")
+            self.dedup_index.add(url, text, title=title, summary=summary if reusable else None,
+                                 run_id=self.run_id, signature=signature)
 
         # ---- Store summary in Pinecone (if enabled) ----
+        vector = None
         if PINECONE_ENABLED:
             try:
-                upsert_summary(title=title, url=url, summary=summary, source="web")
+                vector = upsert_summary(title=title, url=url, summary=summary, source="web")
             except Exception as e:
                 print("❌ Pinecone upsert failed:", e)
         else:
@@ -122,7 +232,8 @@ class ResearchAgent:
         self.collected_summaries.append({
             "title": title,
             "url": url,
-            "summary": summary
+            "summary": summary,
+            "vector": vector  # reused by ConversationAgent for local scoring
         })
 
         return summary
@@ -132,6 +243,7 @@ class ResearchAgent:
     # ---------------------------------------------
     def create_final_report(self):
         print("\n Creating FINAL RESEARCH REPORT...")
+        self.report_progress("report", "Creating final research report")
 
         report = f" Research Topic: {self.query}\n\n"
 
@@ -145,6 +257,17 @@ class ResearchAgent:
 
         return report
 
+    # ---------------------------------------------
+    # Marginal novelty of the newest summary (stopping policy input)
+    # ---------------------------------------------
+    def score_novelty(self, item):
+        novelty = summary_novelty(item["summary"], item["vector"], self.collected_summaries[:-1])
+        item["novelty"] = round(novelty, 3)
+        self.policy.record_fetch(novelty)
+        print(f" Novelty: {novelty:.2f}")
+        self.report_progress("novelty", f"Novelty {novelty:.2f}: {item['title']}")
+        return novelty
+
     # ---------------------------------------------
     # If only 1 article found → expand search
     # ---------------------------------------------
@@ -155,11 +278,21 @@ class ResearchAgent:
     # RUN AGENT
     # ---------------------------------------------
     def run(self):
+        with span("research_run", query=self.query, max_articles=self.max_articles) as sp:
+            if self.trace_id is None:
+                self.trace_id = sp["trace_id"]
+            return self._run()
+
+    def _run(self):
         results = self.search_web()
         count = 0
 
         for item in results:
-            if count >= self.max_articles:
+            if self.policy.adaptive:
+                self.stop_reason = self.policy.stop_reason(len(self.collected_summaries), self.max_articles)
+                if self.stop_reason:
+                    break
+            elif count >= self.max_articles:
                 break
 
             url = item["url"].lower()
@@ -167,23 +300,35 @@ class ResearchAgent:
 
             if url in self.visited_urls:
                 continue
-            if "duckduckgo-help-pages" in url:
-                continue
-            if "ads-by-microsoft" in url:
-                continue
-            if title.lower() == "more info":
+            if not is_research_candidate(url, title):
                 continue
 
+            collected_before = len(self.collected_summaries)
+            duplicates_before = self.duplicates_skipped
             summary = self.extract_and_summarize(url, title)
             self.visited_urls.append(url)
 
+            if len(self.collected_summaries) > collected_before:
+                self.score_novelty(self.collected_summaries[-1])
+            else:
+                # Same-run duplicates add nothing; failed pages only cost
+                self.policy.record_fetch(0.0 if self.duplicates_skipped > duplicates_before else None)
+
             if summary:
                 count += 1
 
-            time.sleep(1)
+            time.sleep(REQUEST_DELAY)
+
+        if self.stop_reason:
+            print(f"\n Agent: Stopping research ({self.stop_reason})")
+            self.report_progress("stop", f"Stopping: {self.stop_reason}")
+            add_counter("research_stop_total", 1, reason=self.stop_reason)
 
-        if self.needs_more_research():
+        if (self.needs_more_research() and self.expansions < MAX_EXPANSIONS
+                and not self.policy.out_of_budget()):
+            self.expansions += 1
             print("\n Agent: Not enough data → Expanding search...")
+            self.report_progress("expand", "Not enough data, expanding search")
             self.max_articles += 2
             return self.run()
 
@@ -199,7 +344,7 @@ if __name__ == "__main__":
     if PINECONE_ENABLED:
         print("🔧 Initializing Pinecone memory...")
         try:
-            init_and_connect("research-memory")
+            init_and_connect()
         except Exception as e:
             print("❌ Pinecone initialization failed:", e)
     else:
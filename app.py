@@ -1,20 +1,25 @@
 # app.py (UPDATED WITH API SAFETY MODE)
 
 import os
+import time
 import streamlit as st
-from datetime import datetime
+import altair as alt
 from conversation_agent import ConversationAgent
-from agent import ResearchAgent, save_txt_md_pdf
-from pdf_ingest import ingest_pdf, extract_pdf_text
-from rag_memory import init_and_connect, query_memory
+from job_runner import ResearchJobRunner, QUEUED, RUNNING, DONE, FAILED
+from pdf_ingest import ingest_pdf
+from upload_cache import store_upload, get_pdf_text
+from chat_history import ChatHistory, CHAT_PAGE_SIZE
+from rag_memory import (init_and_connect, ensure_connected, query_memory, attach_texts, pdf_filter,
+                        MEMORY_ENABLED, WEB_NAMESPACE, PDF_NAMESPACE)
 from ask_memory import answer_from_memory
-from openai import OpenAI
+from skill_extractor import extract_skills
+from tracing import start_metrics_server
 
 # -------------------------------------------------------
 # API SAFETY MODE
 # -------------------------------------------------------
 OPENAI_ENABLED = bool(os.environ.get("OPENAI_API_KEY"))
-PINECONE_ENABLED = bool(os.environ.get("PINECONE_API_KEY"))
+PINECONE_ENABLED = MEMORY_ENABLED   # Pinecone key set, or VECTOR_STORE=local
 
 # If OpenAI or Pinecone unavailable → GPT and Memory disabled
 if not OPENAI_ENABLED:
@@ -27,9 +32,6 @@ if not PINECONE_ENABLED:
 else:
     MEMORY_DISABLED_MSG = None
 
-# Client only created if key exists
-client = OpenAI() if OPENAI_ENABLED else None
-
 # -------------------------------------------------------
 # PAGE CONFIG
 # -------------------------------------------------------
@@ -39,26 +41,165 @@ st.title("🧠 Autonomous Research Assistant — Chat + PDF + Research")
 st.markdown("Built: Chat + Pinecone memory + PDF ingestion + web research")
 
 # -------------------------------------------------------
-# INIT MEMORY (ONLY IF ENABLED)
+# INIT MEMORY (ONLY IF ENABLED; connects once per process)
 # -------------------------------------------------------
 with st.spinner("Initializing memory..."):
     if not PINECONE_ENABLED:
         st.warning(MEMORY_DISABLED_MSG)
     else:
         try:
-            init_and_connect()
+            ensure_connected()
             st.success("Memory initialized (Pinecone connected).")
         except Exception as e:
             st.error(f"Pinecone init error: {e}")
 
+# -------------------------------------------------------
+# BACKGROUND JOB RUNNER (shared by all sessions)
+# -------------------------------------------------------
+@st.cache_resource
+def get_job_runner():
+    return ResearchJobRunner()
+
+
+job_runner = get_job_runner()
+
+
+# Prometheus-style /metrics endpoint, opt-in via METRICS_PORT
+@st.cache_resource
+def start_metrics_endpoint():
+    port = os.environ.get("METRICS_PORT")
+    return start_metrics_server(int(port)) if port else None
+
+
+start_metrics_endpoint()
+
 # -------------------------------------------------------
 # SESSION STATE
 # -------------------------------------------------------
 if "agent" not in st.session_state:
     st.session_state.agent = ConversationAgent()
 
+# Bounded: the newest turns in memory, older ones spilled or dropped
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = ChatHistory()
+
+if "chat_page" not in st.session_state:
+    st.session_state.chat_page = 0
+
+if "research_jobs" not in st.session_state:
+    st.session_state.research_jobs = []
+
+if "report_downloads" not in st.session_state:
+    st.session_state.report_downloads = {}   # job id -> {kind: bytes}, read on request
+
+
+# -------------------------------------------------------
+# DOWNLOADS (files are read once, when the user asks for them)
+# -------------------------------------------------------
+def render_report_downloads(job):
+    files = st.session_state.report_downloads.get(job["id"])
+
+    if files is None:
+        if not st.button("Prepare downloads", key=f"prepare_{job['id']}"):
+            return
+        files = {}
+        for kind, path in job["files"].items():
+            with open(path, "rb") as f:
+                files[kind] = f.read()
+        st.session_state.report_downloads[job["id"]] = files
+
+    for kind, data in files.items():
+        st.download_button(f"Download {kind.upper()}", data=data,
+                           file_name=os.path.basename(job["files"][kind]), key=f"{kind}_{job['id']}")
+
+
+# -------------------------------------------------------
+# PER-RUN WATERFALL (spans recorded by tracing.py)
+# -------------------------------------------------------
+def render_waterfall(spans):
+    if not spans:
+        return
+
+    t0 = min(s["start"] for s in spans)
+    by_id = {s["span_id"]: s for s in spans}
+
+    rows = []
+    for i, s in enumerate(sorted(spans, key=lambda s: s["start"])):
+        depth, parent = 0, s["parent_id"]
+        while parent in by_id:
+            depth, parent = depth + 1, by_id[parent]["parent_id"]
+
+        rows.append({
+            "span": f"{i:03d} {'· ' * depth}{s['name']}",
+            "start_ms": round((s["start"] - t0) * 1000.0, 1),
+            "end_ms": round((s["end"] - t0) * 1000.0, 1),
+            "duration_ms": s["duration_ms"],
+            "error": bool(s["error"])
+        })
+
+    chart = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms since start"),
+        x2="end_ms:Q",
+        y=alt.Y("span:N", sort=None, title=None),
+        color=alt.Color("error:N", legend=None),
+        tooltip=["span:N", "duration_ms:Q", "start_ms:Q"]
+    ).properties(height=max(120, 18 * len(rows)))
+
+    st.altair_chart(chart, use_container_width=True)
+
+
+# -------------------------------------------------------
+# RESEARCH JOBS PANEL (only unfinished jobs are polled)
+# -------------------------------------------------------
+JOB_STATUS_ICONS = {QUEUED: "⏳", RUNNING: "🔎", DONE: "✅", FAILED: "❌"}
+
+
+def render_research_jobs():
+    jobs = job_runner.list_jobs(st.session_state.research_jobs)
+    if not jobs:
+        return
+
+    st.markdown("### 🗂️ Research Jobs")
+
+    active = [j["id"] for j in jobs if j["status"] in (QUEUED, RUNNING)]
+    if active:
+        render_active_jobs(active)
+    render_finished_jobs([j["id"] for j in jobs if j["id"] not in active])
+
+
+@st.fragment(run_every=2)
+def render_active_jobs(job_ids):
+    jobs = job_runner.list_jobs(job_ids)
+
+    # A job finished: redraw the panel once; polling stops when none is left
+    if any(job["status"] not in (QUEUED, RUNNING) for job in jobs):
+        st.rerun()
+
+    for job in jobs:
+        icon = JOB_STATUS_ICONS.get(job["status"], "")
+        with st.expander(f"{icon} {job['query']} — {job['status']}", expanded=True):
+            for event in job["events"][-5:]:
+                st.caption(f"[{event['stage']}] {event['message']}")
+
+
+@st.fragment
+def render_finished_jobs(job_ids):
+    for job in job_runner.list_jobs(job_ids):
+        icon = JOB_STATUS_ICONS.get(job["status"], "")
+        reused = " (reused archived report)" if job.get("reused_from") else ""
+        with st.expander(f"{icon} {job['query']} — {job['status']}{reused}",
+                         expanded=job["status"] != DONE):
+
+            if job["status"] == FAILED:
+                st.error(f"Research failed: {job['error']}")
+                render_waterfall(job.get("trace"))
+
+            else:
+                st.write(job["report"])
+                render_report_downloads(job)
+
+                st.markdown("**Where the time went**")
+                render_waterfall(job.get("trace"))
 
 # -------------------------------------------------------
 # LAYOUT
@@ -71,8 +212,26 @@ left, right = st.columns([3, 1])
 with left:
     st.subheader("Chat")
 
-    # Display chat history
-    for (u, a) in st.session_state.chat_history:
+    # Display one page of chat history (newest first page), so a rerun
+    # renders at most CHAT_PAGE_SIZE turns however long the chat is
+    history = st.session_state.chat_history
+    page_count = history.page_count(CHAT_PAGE_SIZE)
+    page = min(st.session_state.chat_page, page_count - 1)
+
+    if history.total > len(history):
+        st.caption(f"{history.total - len(history)} older messages are no longer kept.")
+
+    if page_count > 1:
+        nav = st.columns([1, 2, 1])
+        if nav[0].button("◀ Older", key="chat_older", disabled=page >= page_count - 1):
+            st.session_state.chat_page = page + 1
+            st.rerun()
+        nav[1].caption(f"Page {page_count - page} of {page_count}")
+        if nav[2].button("Newer ▶", key="chat_newer", disabled=page == 0):
+            st.session_state.chat_page = page - 1
+            st.rerun()
+
+    for (u, a) in history.page(page, CHAT_PAGE_SIZE):
         st.markdown(f"**You:** {u}")
         st.markdown(f"**Assistant:** {a}")
         st.write("---")
@@ -84,10 +243,13 @@ with left:
     send_btn = cols[0].button("Send", key="send")
     research_btn = cols[1].button("Run Research", key="run_research")
     clear_btn = cols[2].button("Clear Chat", key="clear_chat")
+    reuse_reports = st.checkbox("Reuse a recent report on the same topic if there is one",
+                                value=True, key="reuse_reports")
 
     # CLEAR CHAT
     if clear_btn:
-        st.session_state.chat_history = []
+        st.session_state.chat_history.clear()
+        st.session_state.chat_page = 0
         st.rerun()
 
     # SEND CHAT MESSAGE
@@ -96,13 +258,20 @@ with left:
         if not OPENAI_ENABLED:
             st.error(GPT_DISABLED_MSG)
         else:
-            with st.spinner("🧠 Thinking..."):
-                try:
-                    answer = st.session_state.agent.ask(user_input)
-                    st.session_state.chat_history.append((user_input, answer))
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
+            try:
+                # Memory lookup / research happen up front, then tokens stream in
+                with st.spinner("🧠 Thinking..."):
+                    stream = st.session_state.agent.ask(user_input, stream=True)
+
+                st.markdown(f"**You:** {user_input}")
+                st.markdown("**Assistant:**")
+                answer = st.write_stream(stream)
+
+                st.session_state.chat_history.append(user_input, answer)
+                st.session_state.chat_page = 0
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error: {e}")
 
     # RUN AUTONOMOUS RESEARCH
     if research_btn and user_input:
@@ -110,30 +279,11 @@ with left:
         if not OPENAI_ENABLED:
             st.error(GPT_DISABLED_MSG)
         else:
-            with st.spinner("🔎 Running autonomous research..."):
-                try:
-                    researcher = ResearchAgent(query=user_input, max_articles=2)
-                    report = researcher.run()
-
-                    saved = save_txt_md_pdf(
-                        report,
-                        out_base=f"research_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    )
-
-                    st.success("Research completed and saved.")
-                    st.write(report)
-
-                    # Download buttons
-                    st.download_button("Download TXT", data=open(saved["txt"], "rb").read(),
-                                       file_name=os.path.basename(saved["txt"]))
-                    st.download_button("Download MD", data=open(saved["md"], "rb").read(),
-                                       file_name=os.path.basename(saved["md"]))
-                    with open(saved["pdf"], "rb") as f:
-                        st.download_button("Download PDF", data=f.read(),
-                                           file_name=os.path.basename(saved["pdf"]))
+            job_id = job_runner.submit(user_input, max_articles=2, reuse=reuse_reports)
+            st.session_state.research_jobs.append(job_id)
+            st.success(f"Research job {job_id} started. You can keep chatting while it runs.")
 
-                except Exception as e:
-                    st.error(f"Research failed: {e}")
+    render_research_jobs()
 
 # ================================
 # RIGHT: TOOLS PANEL
@@ -150,11 +300,13 @@ with right:
     pdf_name_input = st.text_input("Optional source name (e.g., Resume)")
 
     if uploaded_file is not None:
-        tmp_path = os.path.join("tmp", uploaded_file.name)
-        os.makedirs("tmp", exist_ok=True)
+        # Hash + store only when a new file is uploaded, not on every rerun
+        if st.session_state.get("upload_file_id") != uploaded_file.file_id:
+            file_hash, tmp_path = store_upload(uploaded_file.getbuffer())
+            st.session_state.upload_file_id = uploaded_file.file_id
+            st.session_state.upload = (file_hash, tmp_path)
 
-        with open(tmp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        file_hash, tmp_path = st.session_state.upload
 
         # Ingest to Pinecone
         if st.button("Ingest PDF into memory"):
@@ -163,8 +315,9 @@ with right:
             else:
                 with st.spinner("Ingesting PDF..."):
                     try:
-                        ingest_pdf(tmp_path, source_name=(pdf_name_input or uploaded_file.name))
-                        st.success("PDF ingested into memory.")
+                        ingest_pdf(tmp_path, source_name=(pdf_name_input or uploaded_file.name),
+                                   text=get_pdf_text(file_hash, tmp_path), doc_id=file_hash[:16])
+                        st.success(f"PDF ingested into memory (document id {file_hash[:16]}).")
                     except Exception as e:
                         st.error(f"Ingest failed: {e}")
 
@@ -175,30 +328,21 @@ with right:
             else:
                 with st.spinner("Extracting skills using GPT..."):
                     try:
-                        text = extract_pdf_text(tmp_path)
+                        text = get_pdf_text(file_hash, tmp_path)
 
                         if not text.strip():
                             st.error("PDF contains no extractable text.")
                         else:
-                            prompt = f"""
-                            Extract skills under:
-                            - Technical Skills
-                            - Tools & Frameworks
-                            - Soft Skills
-
-                            TEXT:
-                            {text}
-                            """
-
-                            response = client.chat.completions.create(
-                                model="gpt-4.1-mini",
-                                messages=[{"role": "user", "content": prompt}],
-                                max_tokens=400
-                            )
-
-                            skills = response.choices[0].message.content
-                            st.success("Skills extracted successfully!")
-                            st.markdown(skills)
+                            result = extract_skills(text, doc_hash=file_hash)
+
+                            if result["cached"]:
+                                st.success("Skills extracted successfully! (cached)")
+                            elif result["failed_chunks"]:
+                                st.warning(f"Skills extracted from {result['chunks'] - result['failed_chunks']}"
+                                           f"/{result['chunks']} chunks; some chunks failed.")
+                            else:
+                                st.success(f"Skills extracted successfully from {result['chunks']} chunks!")
+                            st.markdown(result["markdown"])
 
                     except Exception as e:
                         st.error(f"Skill extraction failed: {e}")
@@ -211,20 +355,41 @@ with right:
     mem_q = st.text_input("Enter memory query", key="mem_q")
     mem_k = st.slider("Top K", 1, 10, 4)
 
+    # Scope (namespaces) + metadata filters shrink what the query scans
+    scopes = {"All memory": None, "Web research": WEB_NAMESPACE, "PDFs": PDF_NAMESPACE}
+
+    mem_scope = st.selectbox("Scope", list(scopes), key="mem_scope")
+    mem_doc = st.text_input("PDF document id (optional)", key="mem_doc")
+    mem_source = st.text_input("Source name (optional, exact match)", key="mem_source")
+    mem_days = st.number_input("Only the last N days (0 = any)", min_value=0, value=0, step=1, key="mem_days")
+
+    mem_namespace = scopes[mem_scope]
+    mem_filter = {}
+    if mem_doc.strip():
+        mem_namespace = PDF_NAMESPACE
+        mem_filter.update(pdf_filter(mem_doc.strip()))
+    if mem_source.strip():
+        mem_filter["source"] = {"$eq": mem_source.strip()}
+    if mem_days:
+        mem_filter["timestamp"] = {"$gte": int(time.time()) - int(mem_days) * 86400}
+
     if st.button("Search Memory"):
         if not PINECONE_ENABLED:
             st.error(MEMORY_DISABLED_MSG)
         else:
             with st.spinner("Querying memory..."):
                 try:
-                    matches = query_memory(mem_q, top_k=mem_k)
+                    matches = attach_texts(query_memory(
+                        mem_q, top_k=mem_k, namespace=mem_namespace, filter=mem_filter or None
+                    ))
                     if not matches:
                         st.info("No matches found.")
                     else:
                         for m in matches:
                             md = m["metadata"]
-                            st.write(f"**{md.get('title','(no title)')}** — score: {m.get('score')}")
-                            st.write(md.get("summary")[:450] + "...")
+                            st.write(f"**{md.get('title','(no title)')}** — score: {m.get('score')}"
+                                     f" — {m.get('namespace') or 'default'}")
+                            st.write((md.get("summary") or "")[:450] + "...")
                             st.write(md.get("url", ""))
                             st.write("---")
                 except Exception as e:
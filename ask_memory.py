@@ -1,18 +1,123 @@
 # ask_memory.py (SAFE MODE, GPT OFFLINE PROTECTED)
 
 import os
-from openai import OpenAI
-from rag_memory import query_memory
+import time
+from rag_memory import query_memory, embed_text, cosine_similarity, fetch_texts, MEMORY_ENABLED
+from llm_client import get_openai_client, stream_chat
+from rate_limit import call_with_limits
+from context_builder import build_context
+from tracing import span, record_span, current_span, add_counter, add_token_usage
 
 # Detect if APIs are enabled
 OPENAI_ENABLED = bool(os.environ.get("OPENAI_API_KEY"))
-PINECONE_ENABLED = bool(os.environ.get("PINECONE_API_KEY"))
+PINECONE_ENABLED = MEMORY_ENABLED   # Pinecone key set, or VECTOR_STORE=local
 
+GPT_DISABLED_ANSWER = "❌ GPT disabled by admin (Sudheer). Cannot generate answer."
+GPT_ERROR_ANSWER = "❌ GPT error while answering."
 
-def answer_from_memory(question: str, top_k=5):
+
+def build_memory_messages(question: str, memory_text: str):
+    prompt = f"""
+Use ONLY the memory below to answer the question.
+
+### MEMORY:
+{memory_text}
+
+### QUESTION:
+{question}
+
+Provide a short and clear answer.
+"""
+    return [
+        {"role": "system", "content": "You answer strictly using memory."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def stream_memory_answer(question: str, memory_text: str):
+    """
+    Generator: yields the GPT answer token by token.
+    On error mid-stream, yields the standard error message instead.
+    """
+    print("🤖 Streaming GPT answer...")
+
+    # The generator outlives its caller's span, so the span is recorded by hand
+    parent = current_span()
+    start = time.time()
+    started = time.perf_counter()
+    first_token_ms = None
+    pieces = 0
+    error = None
+
+    try:
+        for token in stream_chat(
+            build_memory_messages(question, memory_text),
+            model="gpt-4.1-mini",
+            max_tokens=200,
+            temperature=0.2
+        ):
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started) * 1000.0, 3)
+            pieces += 1
+            yield token
+    except Exception as e:
+        print(f"❌ GPT Error: {e}")
+        error = repr(e)
+        yield GPT_ERROR_ANSWER
+    finally:
+        add_counter("tokens_total", pieces, kind="completion", endpoint="answer", model="gpt-4.1-mini")
+        record_span("completion", start, (time.perf_counter() - started) * 1000.0, parent=parent,
+                    error=error, model="gpt-4.1-mini", purpose="answer", stream=True,
+                    first_token_ms=first_token_ms, pieces=pieces)
+
+
+def generate_answer(question: str, memory_text: str, stream=False):
+    """
+    GPT answer from an already-built memory context.
+    Returns a string, or a generator of text pieces with stream=True.
+    """
+    if not OPENAI_ENABLED:
+        print("❌ GPT disabled by admin (Sudheer).")
+        return iter([GPT_DISABLED_ANSWER]) if stream else GPT_DISABLED_ANSWER
+
+    if stream:
+        return stream_memory_answer(question, memory_text)
+
+    print("🤖 Generating GPT answer...")
+    client = get_openai_client()
+
+    try:
+        with span("completion", model="gpt-4.1-mini", purpose="answer"):
+            response = call_with_limits(
+                "openai.chat", client.chat.completions.create,
+                model="gpt-4.1-mini",
+                temperature=0.2,
+                max_tokens=200,
+                messages=build_memory_messages(question, memory_text)
+            )
+        add_token_usage(getattr(response, "usage", None), "gpt-4.1-mini", endpoint="answer")
+
+        # Correct new SDK format
+        return response.choices[0].message.content
+
+    except Exception as e:
+        print(f"❌ GPT Error: {e}")
+        return GPT_ERROR_ANSWER
+
+
+def answer_from_memory(question: str, top_k=5, stream=False, vector=None, token_budget=None,
+                       namespace=None, filter=None, matches=None):
     """
     Answer a question only using Pinecone memory + GPT.
     If GPT or Pinecone are disabled → return safe fallback.
+    With stream=True the answer is returned as a generator of text pieces
+    (memory lookup still happens up front, so None still means "no memory").
+    Pass `vector` to reuse an already computed question embedding.
+    The prompt context is MMR-ordered and capped at token_budget tokens
+    (default CONTEXT_TOKEN_BUDGET, see context_builder.py).
+    namespace / filter narrow the search as in rag_memory.query_memory.
+    Pass `matches` (query_memory(..., include_values=True) results) when the
+    caller already ran the lookup, e.g. to check the best score first.
     """
 
     # ------------------------------------------
@@ -22,8 +127,12 @@ def answer_from_memory(question: str, top_k=5):
         print("❌ Memory disabled by admin (Sudheer). No Pinecone key.")
         return None
 
-    print("🔎 Searching Pinecone memory...")
-    matches = query_memory(question, top_k=top_k)
+    if vector is None:
+        vector = embed_text(question)
+    if matches is None:
+        print("🔎 Searching Pinecone memory...")
+        matches = query_memory(question, top_k=top_k, vector=vector, include_values=True,
+                               namespace=namespace, filter=filter)
 
     if not matches:
         print("⚠️ No memory found.")
@@ -31,50 +140,49 @@ def answer_from_memory(question: str, top_k=5):
 
     print(f"📚 Found {len(matches)} relevant memory chunks.")
 
-    # Build memory context
-    memory_text = "\n".join([
-        f"- {m['metadata'].get('summary', '')}"
+    # Build memory context (MMR + token budget, reusing the returned vectors);
+    # text is read from the document store only for the passages used
+    memory_text, _ = build_context(vector, [
+        {
+            "id": m["id"],
+            "text": m["metadata"].get("summary"),
+            "tokens": m["metadata"].get("tokens"),
+            "vector": m.get("values"),
+            "score": m["score"]
+        }
         for m in matches
-        if m["metadata"].get("summary")
-    ])
+    ], token_budget=token_budget, fetch_texts=fetch_texts)
 
     # ------------------------------------------
-    # 2️⃣ GPT disabled → cannot generate answer
+    # 2️⃣ GPT answer (or disabled fallback)
     # ------------------------------------------
-    if not OPENAI_ENABLED:
-        print("❌ GPT disabled by admin (Sudheer).")
-        return "❌ GPT disabled by admin (Sudheer). Cannot generate answer."
-
-    # Build prompt
-    prompt = f"""
-Use ONLY the memory below to answer the question.
-
-### MEMORY:
-{memory_text}
+    return generate_answer(question, memory_text, stream=stream)
 
-### QUESTION:
-{question}
 
-Provide a short and clear answer.
-"""
+def answer_from_summaries(question: str, summaries, vector=None, top_k=5, stream=False,
+                          token_budget=None):
+    """
+    Answer from in-process summaries (e.g. ResearchAgent.collected_summaries)
+    without a second Pinecone round trip. Summaries are ranked locally by
+    cosine similarity against the question embedding; entries without a
+    stored "vector" are embedded here.
+    """
+    passages = [
+        {"text": item["summary"], "vector": item.get("vector")}
+        for item in summaries if item.get("summary")
+    ]
+    if not passages:
+        return None
 
-    print("🤖 Generating GPT answer...")
-    client = OpenAI()
+    if vector is not None:
+        for passage in passages:
+            if not passage["vector"]:
+                passage["vector"] = embed_text(passage["text"])
+            passage["score"] = cosine_similarity(vector, passage["vector"]) if passage["vector"] else 0.0
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            temperature=0.2,
-            max_tokens=200,
-            messages=[
-                {"role": "system", "content": "You answer strictly using memory."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        passages.sort(key=lambda p: p["score"], reverse=True)
 
-        # Correct new SDK format
-        return response.choices[0].message.content
+    print(f"📚 Answering from {min(top_k, len(passages))} fresh research summaries.")
 
-    except Exception as e:
-        print(f"❌ GPT Error: {e}")
-        return "❌ GPT error while answering."
+    memory_text, _ = build_context(vector, passages[:top_k], token_budget=token_budget)
+    return generate_answer(question, memory_text, stream=stream)
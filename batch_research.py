@@ -0,0 +1,261 @@
+# batch_research.py (BATCH RESEARCH CLI — PROCESS POOL + CHECKPOINTING)
+#
+# Usage:
+#   python batch_research.py topics.jsonl --workers 4 --out batch_output
+#
+# topics.jsonl: one topic per line, either a JSON string or an object
+#   {"topic": "AI careers 2025", "id": "ai-careers", "max_articles": 3}
+#
+# Writes per-topic reports to <out>/reports/ and one line per finished topic
+# to <out>/results.jsonl. Re-running the same command resumes: topics already
+# marked "done" in results.jsonl are skipped. Workers share the fetch /
+# summary / embedding cache in <out>/cache.sqlite.
+
+import os
+import re
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_MAX_ARTICLES = 2
+
+
+# ============================================================
+# INPUT / CHECKPOINT
+# ============================================================
+def slugify(text, max_len=60):
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:max_len] or "topic"
+
+
+def load_topics(path, default_max_articles=DEFAULT_MAX_ARTICLES):
+    topics = []
+    seen = set()
+
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Skipping line {line_no}: invalid JSON ({e})")
+                continue
+
+            if isinstance(item, str):
+                item = {"topic": item}
+
+            topic = (item.get("topic") or item.get("query") or "").strip()
+            if not topic:
+                print(f"⚠️ Skipping line {line_no}: no topic")
+                continue
+
+            # Ids end up in file names, so user-supplied ones are slugified too
+            topic_id = slugify(str(item.get("id") or topic))
+            if topic_id in seen:
+                topic_id = f"{topic_id}-{line_no}"
+            seen.add(topic_id)
+
+            topics.append({
+                "id": topic_id,
+                "topic": topic,
+                "max_articles": int(item.get("max_articles") or default_max_articles)
+            })
+
+    return topics
+
+
+def load_checkpoint(results_path):
+    """IDs of topics already completed in a previous (possibly interrupted) run."""
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if row.get("status") == "done":
+                done.add(row["id"])
+
+    return done
+
+
+def append_result(results_path, row):
+    with open(results_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ============================================================
+# WORKER PROCESS
+# ============================================================
+_worker_quiet = False
+
+
+def init_worker(cache_path, quiet):
+    global _worker_quiet
+    _worker_quiet = quiet
+
+    from shared_cache import configure_shared_cache
+    configure_shared_cache(cache_path)
+
+    import agent
+    import rag_memory
+    # The local vector store has a single writer, so workers leave it closed
+    if agent.PINECONE_ENABLED and not rag_memory.LOCAL_MEMORY:
+        from rag_memory import init_and_connect
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            init_and_connect()
+
+
+def research_topic(task, reports_dir):
+    from agent import ResearchAgent, save_txt_md_pdf
+    from report_archive import archive_report
+
+    started = time.time()
+    sink = io.StringIO() if _worker_quiet else sys.stdout
+
+    try:
+        with contextlib.redirect_stdout(sink):
+            researcher = ResearchAgent(query=task["topic"], max_articles=task["max_articles"])
+            report = researcher.run()
+            files = save_txt_md_pdf(report, out_base=task["id"], out_dir=reports_dir)
+            archive_report(task["topic"], report, researcher.collected_summaries, files=files)
+
+        return {
+            "id": task["id"],
+            "topic": task["topic"],
+            "status": "done",
+            "files": files,
+            "sources": len(researcher.collected_summaries),
+            "urls": [item["url"] for item in researcher.collected_summaries],
+            "seconds": round(time.time() - started, 3),
+            "error": None
+        }
+
+    except Exception as e:
+        return {
+            "id": task["id"],
+            "topic": task["topic"],
+            "status": "failed",
+            "files": None,
+            "sources": 0,
+            "urls": [],
+            "seconds": round(time.time() - started, 3),
+            "error": str(e)
+        }
+
+
+# ============================================================
+# BATCH DRIVER
+# ============================================================
+def run_batch(topics_path, out_dir="batch_output", workers=4, max_articles=DEFAULT_MAX_ARTICLES,
+              quiet=True):
+    os.makedirs(out_dir, exist_ok=True)
+    reports_dir = os.path.join(out_dir, "reports")
+    results_path = os.path.join(out_dir, "results.jsonl")
+    cache_path = os.path.join(out_dir, "cache.sqlite")
+
+    topics = load_topics(topics_path, max_articles)
+    done = load_checkpoint(results_path)
+    pending = [t for t in topics if t["id"] not in done]
+
+    print(f"📋 {len(topics)} topics, {len(done)} already done, {len(pending)} to run "
+          f"with {workers} workers.")
+
+    if not pending:
+        return {"completed": 0, "failed": 0, "sources": 0, "seconds": 0.0}
+
+    started = time.time()
+    completed = failed = sources = 0
+
+    if os.getenv("VECTOR_STORE", "").lower() == "local":
+        print("⚠️ VECTOR_STORE=local: batch workers do not store summaries in memory.")
+
+    # Create the cache schema once, before workers race to do it
+    from shared_cache import SharedCache
+    SharedCache(cache_path)
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(cache_path, quiet)
+    )
+
+    try:
+        futures = {executor.submit(research_topic, t, reports_dir): t for t in pending}
+
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:  # worker crashed
+                row = {"id": task["id"], "topic": task["topic"], "status": "failed",
+                       "files": None, "sources": 0, "urls": [], "seconds": None, "error": str(e)}
+
+            append_result(results_path, row)
+
+            if row["status"] == "done":
+                completed += 1
+                sources += row["sources"]
+                print(f"✅ [{completed + failed}/{len(pending)}] {task['topic']} "
+                      f"({row['sources']} sources, {row['seconds']}s)")
+            else:
+                failed += 1
+                print(f"❌ [{completed + failed}/{len(pending)}] {task['topic']}: {row['error']}")
+
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrupted — finished topics are checkpointed, re-run to resume.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        executor.shutdown(wait=True)
+
+    elapsed = time.time() - started
+    stats = {
+        "completed": completed,
+        "failed": failed,
+        "sources": sources,
+        "seconds": round(elapsed, 3),
+        "topics_per_min": round(completed / elapsed * 60.0, 2) if elapsed else 0.0,
+        "sources_per_min": round(sources / elapsed * 60.0, 2) if elapsed else 0.0,
+        "cache_entries": SharedCache(cache_path).stats()
+    }
+
+    print("\n============================")
+    print(" BATCH SUMMARY")
+    print("============================")
+    print(f" Completed: {completed}   Failed: {failed}   Time: {stats['seconds']}s")
+    print(f" Throughput: {stats['topics_per_min']} topics/min, {stats['sources_per_min']} sources/min")
+    print(f" Shared cache entries: {stats['cache_entries']}")
+    print(f" Results: {results_path}")
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run research for many topics in parallel.")
+    parser.add_argument("topics", help="JSONL file with one topic per line")
+    parser.add_argument("--out", default="batch_output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--max-articles", type=int, default=DEFAULT_MAX_ARTICLES)
+    parser.add_argument("--verbose", action="store_true", help="Show worker output")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.topics, out_dir=args.out, workers=args.workers,
+                      max_articles=args.max_articles, quiet=not args.verbose)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# benchmarks/bench_embeddings.py (EMBEDDING BACKEND THROUGHPUT)
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_embeddings --backends hashing transformer --batch-sizes 1 8 32
+#   EMBED_INT8=1 python -m benchmarks.bench_embeddings --backends transformer
+#
+# Embeds the same synthetic chunks with each backend / batch size and
+# reports texts/sec next to the usual timing summary. The openai backend
+# is only measured when asked for explicitly (it needs a key or the fake
+# OpenAI server via OPENAI_BASE_URL).
+
+import os
+import json
+import time
+import platform
+import argparse
+
+from benchmarks.fake_servers import fake_paragraph
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit, summarize_timings
+
+
+def sample_texts(count, words):
+    return [fake_paragraph(f"embed-bench-{i}", words) for i in range(count)]
+
+
+def bench_backend(name, texts, batch_sizes, repeat, threads=None, quantize=None):
+    from embeddings import create_backend
+
+    kwargs = {}
+    if name == "transformer":
+        if threads is not None:
+            kwargs["threads"] = threads
+        if quantize is not None:
+            kwargs["quantize"] = quantize
+
+    backend = create_backend(name, **kwargs)
+    dimension = backend.dimension  # also loads the model, outside the timings
+    backend.embed_batch(texts[:2])
+
+    results = {}
+    for batch_size in batch_sizes:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for i in range(0, len(texts), batch_size):
+                backend.embed_batch(texts[i:i + batch_size])
+            timings.append((time.perf_counter() - start) * 1000.0)
+
+        result = summarize_timings(timings)
+        result["texts_per_sec"] = round(len(texts) / (result["mean_ms"] / 1000.0), 2)
+        result["dimension"] = dimension
+        results[f"embed_{backend.name}_b{batch_size}"] = result
+
+        print(f"⏱️ {backend.name:<40} batch {batch_size:>4}   "
+              f"{result['texts_per_sec']:>10.1f} texts/s   ({dimension} dims)")
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure embedding throughput per backend.")
+    parser.add_argument("--backends", nargs="*", default=["hashing", "transformer"])
+    parser.add_argument("--batch-sizes", nargs="*", type=int, default=[1, 8, 32])
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--words", type=int, default=120, help="Words per text (~one PDF chunk)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--int8", action="store_true", default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    texts = sample_texts(args.texts, args.words)
+    results = {}
+
+    for name in args.backends:
+        try:
+            results.update(bench_backend(name, texts, args.batch_sizes, args.repeat,
+                                         threads=args.threads, quantize=args.int8))
+        except ImportError as e:
+            print(f"⏭️ Skipping {name}: {e} (see requirements-optional.txt)")
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "texts": args.texts,
+            "words": args.words,
+            "repeat": args.repeat,
+            "threads": args.threads,
+            "int8": bool(args.int8),
+        },
+        "results": results,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"embeddings_{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n💾 Results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_import.py (COLD-START / IMPORT-TIME BENCHMARK)
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_import --repeat 5
+#
+# Each entry point is imported in a fresh interpreter, so every run is a
+# true cold start. Results use the same JSON layout as run_benchmarks.py,
+# so benchmarks/compare.py works on them too.
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit, summarize_timings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ["app", "agent", "ask_memory", "cleanup_pdf_memory"]
+
+# Importing app.py runs the Streamlit script in "bare mode"; keep it quiet
+# and make sure no real API is contacted while measuring.
+BENCH_ENV = {
+    "OPENAI_API_KEY": "",
+    "PINECONE_API_KEY": "",
+    "STREAMLIT_BROWSER_GATHER_USAGE_STATS": "false",
+}
+
+
+def import_once(module):
+    """Return (wall_ms, importtime_lines) for one cold import of `module`."""
+    env = dict(os.environ, **BENCH_ENV)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000.0
+
+    if proc.returncode != 0:
+        last_line = (proc.stderr.strip().splitlines() or ["?"])[-1]
+        raise RuntimeError(f"import {module} failed: {last_line}")
+
+    return wall_ms, [l for l in proc.stderr.splitlines() if l.startswith("import time:")]
+
+
+def heaviest_imports(lines, limit=10):
+    """Modules imported directly by the entry point, by cumulative import time."""
+    totals = {}
+    for line in lines:
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header line
+
+        # Only count modules imported directly by the entry point (one space of indent)
+        raw_name = parts[2]
+        if raw_name.startswith("  "):
+            continue
+        totals[raw_name.strip()] = int(parts[1])
+
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return [{"module": name, "cumulative_ms": round(us / 1000.0, 2)} for name, us in ranked]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time per entry point.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--entry", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = {}
+    breakdown = {}
+
+    for module in args.entry:
+        timings = []
+        lines = []
+        try:
+            for _ in range(args.repeat):
+                wall_ms, lines = import_once(module)
+                timings.append(wall_ms)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            continue
+
+        results[f"import_{module}"] = summarize_timings(timings)
+        breakdown[module] = heaviest_imports(lines)
+
+        top = ", ".join(f"{m['module']} {m['cumulative_ms']}ms" for m in breakdown[module][:3])
+        print(f"⏱️ import {module:<20} mean {results[f'import_{module}']['mean_ms']:>9.2f} ms   ({top})")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"repeat": args.repeat},
+        "results": results,
+        "heaviest_imports": breakdown,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"import_{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n💾 Results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
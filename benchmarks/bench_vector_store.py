@@ -0,0 +1,156 @@
+# benchmarks/bench_vector_store.py (QUANTIZED STORE: MEMORY + RECALL)
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_vector_store --vectors 10000 --dim 384
+#   python -m benchmarks.bench_vector_store --candidates 25 50 100 200 --modes binary int8
+#
+# Fills a throwaway LocalVectorStore with clustered synthetic embeddings
+# (nearest neighbours exist, like real chunk/summary vectors), then reports:
+#   - RAM for the compact codes vs float32 arrays vs Python float lists
+#   - query latency per first-stage mode / candidate count vs exact flat scan
+#   - recall@k against the exact float32 top-k
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from operator import mul
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit, summarize_timings
+
+
+def clustered_vectors(count, dim, clusters, noise, seed):
+    rng = random.Random(seed)
+    centers = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    out = []
+    for i in range(count):
+        c = centers[i % clusters]
+        out.append([x + rng.gauss(0, noise) for x in c])
+    return out
+
+
+def exact_top_k(query, unit_vectors, top_k):
+    from vector_store import normalize
+    q = normalize(query)
+    scored = sorted(((sum(map(mul, q, v)), i) for i, v in enumerate(unit_vectors)), reverse=True)
+    return [i for _, i in scored[:top_k]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory and recall of the quantized vector store.")
+    parser.add_argument("--vectors", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.6)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", nargs="*", type=int, default=[25, 50, 100, 200])
+    parser.add_argument("--modes", nargs="*", default=["binary", "int8"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    from vector_store import LocalVectorStore, normalize
+
+    print(f"🧪 Generating {args.vectors} x {args.dim} vectors...")
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters, args.noise, args.seed)
+    unit_vectors = [normalize(v) for v in vectors]
+
+    rng = random.Random(args.seed + 1)
+    queries = [
+        [x + rng.gauss(0, args.noise) for x in vectors[rng.randrange(args.vectors)]]
+        for _ in range(args.queries)
+    ]
+
+    tmp_dir = tempfile.mkdtemp(prefix="vector_store_bench_")
+    results = {}
+
+    try:
+        # ---- build + memory ----
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            store = LocalVectorStore(os.path.join(tmp_dir, "store"), args.dim)
+            batch = 500
+            for i in range(0, args.vectors, batch):
+                store.upsert([
+                    {"id": f"v{j}", "values": vectors[j], "metadata": {}}
+                    for j in range(i, min(i + batch, args.vectors))
+                ])
+        build_s = time.perf_counter() - start
+        store_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        memory = {
+            "codes_bytes": store.memory_bytes(),
+            "store_traced_bytes": store_bytes,
+            "float32_bytes": args.vectors * args.dim * 4,
+            "python_lists_bytes": sum(sys.getsizeof(v) + 24 * len(v) for v in unit_vectors),
+            "upserts_per_sec": round(args.vectors / build_s, 1),
+        }
+        print(f"💾 codes {memory['codes_bytes'] / 1e6:.2f} MB   float32 {memory['float32_bytes'] / 1e6:.2f} MB"
+              f"   python lists {memory['python_lists_bytes'] / 1e6:.2f} MB")
+
+        # ---- ground truth + flat scan baseline ----
+        truth = []
+        timings = []
+        for q in queries:
+            start = time.perf_counter()
+            truth.append(set(exact_top_k(q, unit_vectors, args.top_k)))
+            timings.append((time.perf_counter() - start) * 1000.0)
+        results["query_exact_flat"] = summarize_timings(timings)
+        print(f"⏱️ exact flat scan              mean {results['query_exact_flat']['mean_ms']:>9.2f} ms")
+
+        # ---- two-stage search ----
+        for mode in args.modes:
+            for candidates in args.candidates:
+                timings = []
+                hits = 0
+                for q, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    matches = store.query(vector=q, top_k=args.top_k, candidates=candidates,
+                                          mode=mode, include_metadata=False)["matches"]
+                    timings.append((time.perf_counter() - start) * 1000.0)
+                    hits += len(expected & {int(m["id"][1:]) for m in matches})
+
+                result = summarize_timings(timings)
+                result["recall_at_k"] = round(hits / float(args.top_k * len(queries)), 4)
+                results[f"query_{mode}_c{candidates}"] = result
+                print(f"⏱️ {mode:<6} candidates {candidates:>5}   mean {result['mean_ms']:>9.2f} ms"
+                      f"   recall@{args.top_k} {result['recall_at_k']:.3f}")
+
+        store.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "memory": memory,
+        "results": results,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"vector_store_{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n💾 Results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/compare.py (COMPARE TWO BENCHMARK RESULT FILES)
+#
+# Usage:
+#   python -m benchmarks.compare OLD.json NEW.json [--metric p50_ms] [--threshold 10]
+#
+# Exits with status 1 if any stage got slower than --threshold percent.
+
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old, new, metric="mean_ms", threshold=10.0):
+    rows = []
+    regressions = []
+
+    for stage in sorted(set(old["results"]) | set(new["results"])):
+        before = old["results"].get(stage, {}).get(metric)
+        after = new["results"].get(stage, {}).get(metric)
+
+        if before is None or after is None:
+            rows.append((stage, before, after, None))
+            continue
+
+        change = ((after - before) / before * 100.0) if before else 0.0
+        rows.append((stage, before, after, change))
+        if change > threshold:
+            regressions.append(stage)
+
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="mean_ms")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    old, new = load(args.old), load(args.new)
+    rows, regressions = compare(old, new, args.metric, args.threshold)
+
+    print(f"{old.get('commit', '?')} → {new.get('commit', '?')} ({args.metric})\n")
+    print(f"{'stage':<22} {'old':>10} {'new':>10} {'change':>9}")
+    for stage, before, after, change in rows:
+        if change is None:
+            print(f"{stage:<22} {str(before):>10} {str(after):>10} {'n/a':>9}")
+            continue
+        flag = "  ⚠️" if stage in regressions else ""
+        print(f"{stage:<22} {before:>10.2f} {after:>10.2f} {change:>+8.1f}%{flag}")
+
+    if regressions:
+        print(f"\n❌ Regressions over {args.threshold}%: {', '.join(regressions)}")
+        return 1
+
+    print("\n✅ No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
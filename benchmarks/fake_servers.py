@@ -0,0 +1,528 @@
+# benchmarks/fake_servers.py (LOCAL STAND-INS FOR SEARCH, PAGES, OPENAI, PINECONE)
+#
+# One ThreadingHTTPServer that speaks just enough of each protocol for the
+# real code paths (requests, openai SDK, pinecone SDK) to run offline:
+#
+#   POST /html/                       DuckDuckGo HTML results (.result__a links)
+#   GET  /page/<n>                    article pages (latency + size configurable)
+#   POST /v1/embeddings               OpenAI embeddings (deterministic hashing)
+#   POST /v1/chat/completions         OpenAI chat, plain or SSE streaming
+#   GET/POST /indexes[/<name>]        Pinecone control plane
+#   POST /vectors/upsert, /query, /vectors/delete, /describe_index_stats
+#   GET  /vectors/fetch, /vectors/list
+#                                     Pinecone data plane (in-memory, cosine)
+
+import json
+import math
+import time
+import uuid
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+WORDS = (
+    "research model data learning system career market skills growth analysis "
+    "python cloud engineer report future trend automation network security "
+    "language vector memory search agent summary pipeline latency throughput"
+).split()
+
+DEFAULT_CONFIG = {
+    "search_results": 10,
+    "search_latency_ms": 20,
+    "page_latency_ms": 30,
+    "page_paragraphs": 20,
+    "paragraph_words": 60,
+    "embedding_dim": 1536,
+    "embedding_latency_ms": 15,
+    "chat_latency_ms": 150,
+    "chat_token_delay_ms": 5,
+    "pinecone_latency_ms": 10,
+}
+
+
+# ============================================================
+# Deterministic text helpers
+# ============================================================
+def _word_hash(word):
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def hashing_embedding(text, dim):
+    """Bag-of-words hashing vector: similar texts get similar vectors."""
+    vec = [0.0] * dim
+    for word in text.lower().split():
+        h = _word_hash(word)
+        vec[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def fake_paragraph(seed, words):
+    out = []
+    for i in range(words):
+        out.append(WORDS[_word_hash(f"{seed}:{i}") % len(WORDS)])
+        if i % 12 == 11:
+            out[-1] += "."
+    return " ".join(out).capitalize() + "."
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def _matches_filter(metadata, flt):
+    # Same filter semantics as the local store. Imported on first use:
+    # vector_store reads its env at import time, after the harness set it.
+    from vector_store import matches_filter
+    return matches_filter(metadata, flt)
+
+
+# ============================================================
+# In-memory Pinecone index
+# ============================================================
+class FakeIndexStore:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.namespaces = {}
+
+    def upsert(self, vectors, namespace=""):
+        with self.lock:
+            ns = self.namespaces.setdefault(namespace, {})
+            for v in vectors:
+                ns[v["id"]] = (v["values"], v.get("metadata") or {})
+        return len(vectors)
+
+    def query(self, vector, top_k, namespace="", flt=None, include_values=False,
+              include_metadata=False):
+        with self.lock:
+            items = list(self.namespaces.get(namespace, {}).items())
+
+        scored = []
+        for vid, (values, metadata) in items:
+            if not _matches_filter(metadata, flt):
+                continue
+            scored.append((_cosine(vector, values), vid, values, metadata))
+
+        scored.sort(key=lambda s: s[0], reverse=True)
+
+        matches = []
+        for score, vid, values, metadata in scored[:top_k]:
+            match = {"id": vid, "score": score}
+            if include_values:
+                match["values"] = values
+            if include_metadata:
+                match["metadata"] = metadata
+            matches.append(match)
+        return matches
+
+    def delete(self, ids=None, delete_all=False, namespace="", flt=None):
+        with self.lock:
+            ns = self.namespaces.get(namespace, {})
+            if delete_all:
+                ns.clear()
+                return
+            if flt:
+                ids = [vid for vid, (_, md) in ns.items() if _matches_filter(md, flt)]
+            for vid in ids or []:
+                ns.pop(vid, None)
+
+    def fetch(self, ids, namespace=""):
+        with self.lock:
+            ns = self.namespaces.get(namespace, {})
+            return {
+                vid: {"id": vid, "values": ns[vid][0], "metadata": ns[vid][1]}
+                for vid in ids if vid in ns
+            }
+
+    def list_ids(self, namespace="", prefix="", limit=100, token=None):
+        with self.lock:
+            ids = sorted(vid for vid in self.namespaces.get(namespace, {}) if vid.startswith(prefix))
+
+        start = int(token) if token else 0
+        page = ids[start:start + limit]
+        next_token = str(start + limit) if start + limit < len(ids) else None
+        return page, next_token
+
+    def stats(self):
+        with self.lock:
+            return {ns: len(v) for ns, v in self.namespaces.items()}
+
+
+# ============================================================
+# HTTP handler
+# ============================================================
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeServices/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---------- helpers ----------
+    @property
+    def cfg(self):
+        return self.server.config
+
+    def _sleep(self, key):
+        ms = self.cfg.get(key, 0)
+        if ms:
+            time.sleep(ms / 1000.0)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self):
+        raw = self._read_body()
+        return json.loads(raw) if raw else {}
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8") if content_type == "application/json" else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, name, n=1):
+        with self.server.counter_lock:
+            self.server.counters[name] = self.server.counters.get(name, 0) + n
+
+    # ---------- routing ----------
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip("/")
+        query = parse_qs(parsed.query)
+
+        if path.startswith("/page/"):
+            return self._page(path.split("/")[-1])
+        if path == "/indexes":
+            return self._list_indexes()
+        if path.startswith("/indexes/"):
+            return self._describe_index(path.split("/")[-1])
+        if path == "/vectors/fetch":
+            return self._fetch(query)
+        if path == "/vectors/list":
+            return self._list_vectors(query)
+        if path == "/describe_index_stats":
+            return self._describe_stats()
+        self._send(404, {"error": f"unknown path {path}"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip("/")
+
+        if path == "/html":
+            return self._search()
+        if path == "/v1/embeddings":
+            return self._embeddings()
+        if path == "/v1/chat/completions":
+            return self._chat()
+        if path == "/indexes":
+            return self._create_index()
+        if path == "/vectors/upsert":
+            return self._upsert()
+        if path == "/query":
+            return self._query()
+        if path == "/vectors/delete":
+            return self._delete()
+        if path == "/describe_index_stats":
+            self._read_body()
+            return self._describe_stats()
+        self._send(404, {"error": f"unknown path {path}"})
+
+    def do_DELETE(self):
+        path = urlparse(self.path).path.rstrip("/")
+        if path.startswith("/indexes/"):
+            self.server.indexes.pop(path.split("/")[-1], None)
+            return self._send(202, b"", "text/plain")
+        self._send(404, {"error": f"unknown path {path}"})
+
+    # ---------- DuckDuckGo + pages ----------
+    def _search(self):
+        form = parse_qs(self._read_body().decode("utf-8"))
+        q = (form.get("q") or [""])[0]
+        self._count("search")
+        self._sleep("search_latency_ms")
+
+        links = []
+        for i in range(self.cfg["search_results"]):
+            url = f"{self.server.base_url}/page/{i}"
+            links.append(f'<div class="result"><a class="result__a" href="{url}">{q} result {i}</a></div>')
+
+        self._send(200, "<html><body>" + "".join(links) + "</body></html>", "text/html")
+
+    def _page(self, page_id):
+        self._count("page")
+        self._sleep("page_latency_ms")
+
+        paragraphs = "".join(
+            f"<p>{fake_paragraph(f'{page_id}:{i}', self.cfg['paragraph_words'])}</p>"
+            for i in range(self.cfg["page_paragraphs"])
+        )
+        self._send(200, f"<html><head><title>Page {page_id}</title></head><body>{paragraphs}</body></html>",
+                   "text/html")
+
+    # ---------- OpenAI ----------
+    def _embeddings(self):
+        body = self._json_body()
+        inputs = body.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        self._count("embeddings")
+        self._count("embedding_inputs", len(inputs))
+        self._sleep("embedding_latency_ms")
+
+        tokens = sum(len(t.split()) for t in inputs)
+        self._send(200, {
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [
+                {"object": "embedding", "index": i,
+                 "embedding": hashing_embedding(t, self.cfg["embedding_dim"])}
+                for i, t in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    def _chat(self):
+        body = self._json_body()
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or 120
+        prompt_tokens = len(prompt.split())
+
+        self._count("chat")
+        self._count("chat_prompt_tokens", prompt_tokens)
+        self._sleep("chat_latency_ms")
+
+        # Canned bullet answer built from the prompt's own words
+        words = [w for w in prompt.split() if w.isalpha()][:max_tokens] or ["ok"]
+        pieces = []
+        for i, w in enumerate(words[:max_tokens]):
+            pieces.append(("\n- " if i % 10 == 0 else " ") + w)
+
+        completion_id = "chatcmpl-" + uuid.uuid4().hex[:12]
+        created = int(time.time())
+        model = body.get("model", "gpt-4.1-mini")
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+
+        if not body.get("stream"):
+            return self._send(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(pieces).strip()}}],
+                "usage": usage
+            })
+
+        # Server-sent events, one chunk per token
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for piece in pieces:
+            self._sleep("chat_token_delay_ms")
+            event({"content": piece})
+        event({}, finish="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    # ---------- Pinecone control plane ----------
+    def _index_description(self, name):
+        spec = self.server.indexes[name]
+        return {
+            "name": name,
+            "dimension": spec["dimension"],
+            "metric": spec.get("metric", "cosine"),
+            "host": self.server.base_url,
+            "spec": {"serverless": {"cloud": "aws", "region": "us-east-1"}},
+            "status": {"ready": True, "state": "Ready"},
+            "deletion_protection": "disabled",
+            "vector_type": "dense"
+        }
+
+    def _list_indexes(self):
+        self._send(200, {"indexes": [self._index_description(n) for n in self.server.indexes]})
+
+    def _describe_index(self, name):
+        if name not in self.server.indexes:
+            return self._send(404, {"error": {"code": "NOT_FOUND", "message": f"Index {name} not found"}})
+        self._send(200, self._index_description(name))
+
+    def _create_index(self):
+        body = self._json_body()
+        self.server.indexes[body["name"]] = {
+            "dimension": body.get("dimension", self.cfg["embedding_dim"]),
+            "metric": body.get("metric", "cosine")
+        }
+        self._send(201, self._index_description(body["name"]))
+
+    # ---------- Pinecone data plane ----------
+    def _upsert(self):
+        body = self._json_body()
+        self._count("pinecone_upsert")
+        self._sleep("pinecone_latency_ms")
+        n = self.server.store.upsert(body.get("vectors", []), body.get("namespace", ""))
+        self._send(200, {"upsertedCount": n})
+
+    def _query(self):
+        body = self._json_body()
+        self._count("pinecone_query")
+        self._sleep("pinecone_latency_ms")
+
+        vector = body.get("vector")
+        namespace = body.get("namespace", "")
+        if vector is None and body.get("id"):
+            fetched = self.server.store.fetch([body["id"]], namespace)
+            vector = fetched[body["id"]]["values"] if fetched else None
+
+        matches = []
+        if vector is not None:
+            matches = self.server.store.query(
+                vector, body.get("topK", 10), namespace, body.get("filter"),
+                body.get("includeValues", False), body.get("includeMetadata", False)
+            )
+        self._send(200, {"matches": matches, "namespace": namespace, "usage": {"readUnits": 1}})
+
+    def _delete(self):
+        body = self._json_body()
+        self._sleep("pinecone_latency_ms")
+        self.server.store.delete(body.get("ids"), body.get("deleteAll", False),
+                                 body.get("namespace", ""), body.get("filter"))
+        self._send(200, {})
+
+    def _fetch(self, query):
+        namespace = (query.get("namespace") or [""])[0]
+        self._sleep("pinecone_latency_ms")
+        vectors = self.server.store.fetch(query.get("ids", []), namespace)
+        self._send(200, {"vectors": vectors, "namespace": namespace, "usage": {"readUnits": 1}})
+
+    def _list_vectors(self, query):
+        namespace = (query.get("namespace") or [""])[0]
+        ids, token = self.server.store.list_ids(
+            namespace,
+            prefix=(query.get("prefix") or [""])[0],
+            limit=int((query.get("limit") or ["100"])[0]),
+            token=(query.get("paginationToken") or [None])[0]
+        )
+        body = {"vectors": [{"id": i} for i in ids], "namespace": namespace, "usage": {"readUnits": 1}}
+        if token:
+            body["pagination"] = {"next": token}
+        self._send(200, body)
+
+    def _describe_stats(self):
+        stats = self.server.store.stats()
+        dims = [s["dimension"] for s in self.server.indexes.values()] or [self.cfg["embedding_dim"]]
+        self._send(200, {
+            "namespaces": {ns: {"vectorCount": n} for ns, n in stats.items()},
+            "dimension": dims[0],
+            "indexFullness": 0.0,
+            "totalVectorCount": sum(stats.values())
+        })
+
+
+# ============================================================
+# SERVER WRAPPER
+# ============================================================
+class FakeServices:
+    """
+    Start with FakeServices(**overrides).start(); env() returns the
+    environment variables that point this repo's modules at it.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(config)
+
+        self.httpd = ThreadingHTTPServer((host, port), FakeHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.indexes = {}
+        self.httpd.store = FakeIndexStore()
+        self.httpd.counters = {}
+        self.httpd.counter_lock = threading.Lock()
+        self.httpd.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return self.httpd.base_url
+
+    @property
+    def counters(self):
+        with self.httpd.counter_lock:
+            return dict(self.httpd.counters)
+
+    @property
+    def store(self):
+        return self.httpd.store
+
+    def env(self):
+        return {
+            "OPENAI_API_KEY": "fake-openai-key",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "PINECONE_API_KEY": "fake-pinecone-key",
+            "PINECONE_HOST": self.base_url,
+            "PINECONE_ENV": "us-east-1",
+            "DDG_HTML_URL": f"{self.base_url}/html/",
+            "USE_SELENIUM": "0",
+            "RESEARCH_REQUEST_DELAY": "0",
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-services", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="Run the fake search/OpenAI/Pinecone services.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page-latency-ms", type=int, default=DEFAULT_CONFIG["page_latency_ms"])
+    parser.add_argument("--page-paragraphs", type=int, default=DEFAULT_CONFIG["page_paragraphs"])
+    args = parser.parse_args()
+
+    services = FakeServices(port=args.port, page_latency_ms=args.page_latency_ms,
+                            page_paragraphs=args.page_paragraphs)
+    print(f"🧪 Fake services listening on {services.base_url}")
+    for k, v in services.env().items():
+        print(f"export {k}={v}")
+    services.httpd.serve_forever()
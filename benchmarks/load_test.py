@@ -0,0 +1,284 @@
+# benchmarks/load_test.py (CONCURRENT-SESSION LOAD TEST)
+#
+# Usage (from the repo root):
+#   python -m benchmarks.load_test --sessions 1 4 16 32 --duration 30
+#   python -m benchmarks.load_test --mix ask=1 --chat-latency-ms 400 --think-ms 0
+#
+# Simulates N Streamlit sessions in one process (Streamlit runs each
+# session as a thread): every session owns a ConversationAgent and keeps
+# issuing a weighted mix of
+#   ask       ConversationAgent.ask (memory, else archive / web research)
+#   viewer    Memory Viewer search: query_memory + attach_texts
+#   research  a job on the shared ResearchJobRunner, waited for until done
+# against the fake services. For each concurrency level it reports
+# throughput, p50/p95/p99 latency and error rate (overall and per
+# operation) plus the peak RSS of the process.
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import threading
+import contextlib
+
+from benchmarks.fake_servers import FakeServices, WORDS
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit, percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = {"ask": 0.7, "viewer": 0.25, "research": 0.05}
+RESEARCH_TIMEOUT = 300.0  # seconds
+
+
+# ============================================================
+# Helpers
+# ============================================================
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """Peak RSS over a window, sampled from a background thread."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def parse_mix(items):
+    if not items:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation '{name}' (expected one of {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def summarize_samples(samples, elapsed):
+    timings = [ms for ms, ok in samples]
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "ops": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_ops_s": round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "max_ms": round(max(timings), 3) if timings else 0.0,
+    }
+
+
+# ============================================================
+# Simulated session
+# ============================================================
+def make_operations(job_runner, rng_question):
+    from rag_memory import query_memory, attach_texts
+
+    def ask(agent, rng):
+        answer = agent.ask(rng_question(rng))
+        if not answer or str(answer).startswith("❌"):
+            raise RuntimeError(str(answer)[:200])
+
+    def viewer(agent, rng):
+        attach_texts(query_memory(rng_question(rng), top_k=5))
+
+    def research(agent, rng):
+        job_id = job_runner.submit(rng_question(rng), max_articles=2)
+        deadline = time.time() + RESEARCH_TIMEOUT
+        while time.time() < deadline:
+            job = job_runner.get(job_id)
+            if job["status"] == "done":
+                return
+            if job["status"] == "failed":
+                raise RuntimeError(job["error"])
+            time.sleep(0.05)
+        raise TimeoutError(f"research job {job_id} did not finish in {RESEARCH_TIMEOUT:.0f}s")
+
+    return {"ask": ask, "viewer": viewer, "research": research}
+
+
+def question_pool(size, seed):
+    """A fixed pool, so repeated questions exercise memory / archive hits."""
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)} trends" for _ in range(size)]
+
+
+def run_level(sessions, duration, think_ms, mix, operations, seed):
+    from conversation_agent import ConversationAgent
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agents = [ConversationAgent() for _ in range(sessions)]
+
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = {name: [] for name in names}
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(sessions + 1)
+    deadline = [0.0]
+
+    def session(i):
+        rng = random.Random(seed * 1000 + i)
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            op = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            ok = True
+            try:
+                operations[op](agents[i], rng)
+            except Exception as e:
+                ok = False
+                with lock:
+                    errors.append(f"{op}: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with lock:
+                samples[op].append((elapsed_ms, ok))
+            if think_ms:
+                time.sleep(rng.expovariate(1000.0 / think_ms))
+
+    threads = [threading.Thread(target=session, args=(i,), name=f"session-{i}") for i in range(sessions)]
+    for t in threads:
+        t.start()
+
+    with contextlib.redirect_stdout(io.StringIO()), RssSampler() as rss:
+        started = time.perf_counter()
+        deadline[0] = started + duration
+        start_barrier.wait()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+    everything = [s for per_op in samples.values() for s in per_op]
+    result = summarize_samples(everything, elapsed)
+    result.update(
+        sessions=sessions,
+        seconds=round(elapsed, 3),
+        peak_rss_mb=round(rss.peak / 1e6, 1),
+        per_op={name: summarize_samples(s, elapsed) for name, s in samples.items() if s},
+        sample_errors=errors[:5],
+    )
+    return result
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test against the fake services.")
+    parser.add_argument("--sessions", nargs="*", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="Mean pause between a session's operations")
+    parser.add_argument("--mix", nargs="*", default=None, help="Operation weights, e.g. ask=0.7 viewer=0.3")
+    parser.add_argument("--questions", type=int, default=50, help="Size of the question pool")
+    parser.add_argument("--search-latency-ms", type=int, default=20)
+    parser.add_argument("--page-latency-ms", type=int, default=30)
+    parser.add_argument("--chat-latency-ms", type=int, default=150)
+    parser.add_argument("--embedding-latency-ms", type=int, default=15)
+    parser.add_argument("--pinecone-latency-ms", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    config = {
+        "search_latency_ms": args.search_latency_ms,
+        "page_latency_ms": args.page_latency_ms,
+        "chat_latency_ms": args.chat_latency_ms,
+        "embedding_latency_ms": args.embedding_latency_ms,
+        "pinecone_latency_ms": args.pinecone_latency_ms,
+    }
+
+    # State files go to a throwaway directory; research jobs also write their
+    # report files relative to the cwd, so run from there.
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    previous_cwd = os.getcwd()
+
+    with FakeServices(**config) as services, tempfile.TemporaryDirectory() as workdir:
+        os.environ.update(services.env())
+        for var, name in (("DOC_STORE_DB", "documents.sqlite"), ("DEDUP_DB", "dedup.sqlite"),
+                          ("RESEARCH_CACHE_DB", "cache.sqlite"), ("REPORT_ARCHIVE_DB", "archive.sqlite"),
+                          ("JOBS_DIR", "jobs"), ("VECTOR_STORE_DIR", "memory_store")):
+            os.environ[var] = os.path.join(workdir, name)
+        os.chdir(workdir)
+        print(f"🧪 Fake services at {services.base_url}")
+
+        try:
+            # Imported only now: these modules read their env at import time
+            from job_runner import ResearchJobRunner
+            import rag_memory
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                rag_memory.ensure_connected()
+                job_runner = ResearchJobRunner()
+
+            pool = question_pool(args.questions, args.seed)
+            operations = make_operations(job_runner, lambda rng: rng.choice(pool))
+
+            levels = []
+            print(f"{'sessions':>8} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+                  f"{'errors':>7} {'peak RSS':>9}")
+            for sessions in args.sessions:
+                result = run_level(sessions, args.duration, args.think_ms, mix, operations, args.seed)
+                levels.append(result)
+                print(f"{sessions:>8} {result['throughput_ops_s']:>8.2f} {result['p50_ms']:>9.1f} "
+                      f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['error_rate']:>7.1%} "
+                      f"{result['peak_rss_mb']:>7.1f}MB")
+
+            job_runner.shutdown(wait=True)
+            counters = services.counters
+        finally:
+            os.chdir(previous_cwd)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": dict(config, duration=args.duration, think_ms=args.think_ms, mix=mix,
+                       questions=args.questions, seed=args.seed),
+        "levels": levels,
+        "service_calls": counters,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"load_{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n💾 Results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# benchmarks/run_benchmarks.py (OFFLINE STAGE + END-TO-END BENCHMARKS)
+#
+# Usage (from the repo root):
+#   python -m benchmarks.run_benchmarks --repeat 5
+#   python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+#
+# Starts the fake services, points every module at them through env vars,
+# times each stage and writes benchmarks/results/<commit>.json.
+
+import os
+import io
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+
+from benchmarks.fake_servers import FakeServices
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+QUERY = "AI careers 2025"
+# Stages that need a connected memory store
+MEMORY_STAGES = ("upsert_summary", "query_memory", "ingest_pdf")
+
+
+# ============================================================
+# Helpers
+# ============================================================
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize_timings(timings_ms):
+    return {
+        "repeat": len(timings_ms),
+        "mean_ms": round(sum(timings_ms) / len(timings_ms), 3),
+        "p50_ms": round(percentile(timings_ms, 50), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "min_ms": round(min(timings_ms), 3),
+        "max_ms": round(max(timings_ms), 3),
+    }
+
+
+def run_stage(name, fn, repeat, warmup=1, verbose=False):
+    """Time fn() `repeat` times after `warmup` untimed calls."""
+    sink = sys.stdout if verbose else io.StringIO()
+    timings = []
+
+    with contextlib.redirect_stdout(sink):
+        for _ in range(warmup):
+            fn()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000.0)
+
+    result = summarize_timings(timings)
+    print(f"⏱️ {name:<22} mean {result['mean_ms']:>9.2f} ms   p95 {result['p95_ms']:>9.2f} ms")
+    return result
+
+
+def make_sample_pdf(path, pages=5):
+    from fpdf import FPDF
+    from benchmarks.fake_servers import fake_paragraph
+
+    pdf = FPDF(unit="mm", format="A4")
+    pdf.set_font("Arial", size=11)
+    for p in range(pages):
+        pdf.add_page()
+        for i in range(6):
+            pdf.multi_cell(0, 5, fake_paragraph(f"pdf:{p}:{i}", 80))
+    pdf.output(path)
+    return path
+
+
+# ============================================================
+# Benchmarks
+# ============================================================
+def build_stages(services, workdir):
+    # Imported only after the env points at the fake services,
+    # because these modules read their flags at import time.
+    import scraper
+    import summarizer
+    import rag_memory
+    import pdf_ingest
+    from agent import ResearchAgent
+    from conversation_agent import ConversationAgent
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        memory = rag_memory.init_and_connect()
+
+    page_url = f"{services.base_url}/page/1"
+    page_text = scraper.fetch_page_text(page_url)
+    pdf_path = make_sample_pdf(os.path.join(workdir, "sample.pdf"))
+
+    # ingest_pdf is admin-disabled by default; the benchmark exercises the full path
+    pdf_ingest.PINECONE_ENABLED = True
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        conversation = ConversationAgent()
+
+    stages = {
+        "duckduckgo_search": lambda: scraper.duckduckgo_search(QUERY),
+        "fetch_page_text": lambda: scraper.fetch_page_text(page_url),
+        "summarize": lambda: summarizer.summarize(page_text),
+        "embed_text": lambda: rag_memory.embed_text(page_text),
+        "upsert_summary": lambda: rag_memory.upsert_summary(
+            title="Benchmark page", url=page_url, summary=page_text[:800], source="web"),
+        "query_memory": lambda: rag_memory.query_memory(QUERY, top_k=5),
+        "ingest_pdf": lambda: pdf_ingest.ingest_pdf(pdf_path, source_name="Benchmark PDF"),
+        "research_agent_run": lambda: ResearchAgent(QUERY, max_articles=2).run(),
+        "conversation_ask": lambda: conversation.ask(QUERY),
+    }
+
+    # Without a store these stages return early and would time a no-op
+    if memory is None:
+        print(f"⚠️ Memory store unavailable, skipping: {', '.join(MEMORY_STAGES)}")
+        for name in MEMORY_STAGES:
+            del stages[name]
+
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against local fake services.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="Run only these stages")
+    parser.add_argument("--page-latency-ms", type=int, default=30)
+    parser.add_argument("--page-paragraphs", type=int, default=20)
+    parser.add_argument("--chat-latency-ms", type=int, default=150)
+    parser.add_argument("--embedding-latency-ms", type=int, default=15)
+    parser.add_argument("--out", default=None, help="Output JSON path")
+    parser.add_argument("--verbose", action="store_true", help="Show module output")
+    args = parser.parse_args(argv)
+
+    config = {
+        "page_latency_ms": args.page_latency_ms,
+        "page_paragraphs": args.page_paragraphs,
+        "chat_latency_ms": args.chat_latency_ms,
+        "embedding_latency_ms": args.embedding_latency_ms,
+    }
+
+    with FakeServices(**config) as services, tempfile.TemporaryDirectory() as workdir:
+        os.environ.update(services.env())
+        # Benchmark state stays in the throwaway directory: a fake report in the
+        # real archive would be reused by users (and by later timed iterations)
+        for var, name in (("DOC_STORE_DB", "documents.sqlite"), ("REPORT_ARCHIVE_DB", "archive.sqlite"),
+                          ("DEDUP_DB", "dedup.sqlite"), ("JOBS_DIR", "jobs"),
+                          ("VECTOR_STORE_DIR", "memory_store")):
+            os.environ[var] = os.path.join(workdir, name)
+        # The shared cache stays as configured (on or off), just not the user's
+        # file; "" keeps a RESEARCH_CACHE_DB from .env from switching it on
+        os.environ["RESEARCH_CACHE_DB"] = (
+            os.path.join(workdir, "cache.sqlite") if os.environ.get("RESEARCH_CACHE_DB") else ""
+        )
+        # Same article count every run, so results stay comparable across commits
+        os.environ.setdefault("RESEARCH_STOPPING", "fixed")
+        # conversation_ask should time a research run, not the archived report of its first iteration
+        os.environ.setdefault("REPORT_REUSE", "0")
+        # ... and research_agent_run should summarize, not reuse the first iteration's summaries
+        os.environ.setdefault("DEDUP_REUSE_HOURS", "0")
+        print(f"🧪 Fake services at {services.base_url}")
+
+        stages = build_stages(services, workdir)
+        selected = [name for name in args.only or list(stages) if name in stages]
+
+        results = {}
+        for name in selected:
+            results[name] = run_stage(name, stages[name], args.repeat, args.warmup, args.verbose)
+
+        counters = services.counters
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": dict(config, repeat=args.repeat, warmup=args.warmup),
+        "results": results,
+        "service_calls": counters,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n💾 Results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# bulk_ingest.py (PARALLEL BULK PDF INGEST)
+#
+# Usage:
+#   python bulk_ingest.py papers/ --source PDF
+#   python bulk_ingest.py "corpus/**/*.pdf" more/one.pdf --extract-workers 8 --upload-workers 4
+#
+# Pipeline:
+#   hash (main process) → skip files whose content was already ingested
+#   extract + chunk     → process pool (pypdf is CPU-bound)
+#   embed + upsert      → thread pool (network / embedding backend)
+#
+# Chunks go to the shared "pdf" namespace with doc_id "<sha256[:16]>" and
+# vector IDs "<sha256[:16]>-<chunk>", so an interrupted run can simply be
+# re-run. A file whose content changed has its old chunks deleted.
+# Progress and sustained pages/sec + chunks/sec are printed while running;
+# per-file failures go to <report-dir>/ingest_errors.jsonl.
+
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+INGEST_MANIFEST = os.getenv("INGEST_MANIFEST", os.path.join("memory_store", "ingest_manifest.sqlite"))
+PROGRESS_EVERY = 5.0  # seconds
+
+
+# ============================================================
+# INPUT DISCOVERY
+# ============================================================
+def discover_pdfs(patterns):
+    """Directories (recursive), glob patterns and plain paths → sorted unique PDF paths."""
+    found = set()
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                found.update(os.path.join(root, f) for f in files if f.lower().endswith(".pdf"))
+        elif any(ch in pattern for ch in "*?["):
+            found.update(p for p in glob.glob(pattern, recursive=True)
+                         if os.path.isfile(p) and p.lower().endswith(".pdf"))
+        elif os.path.isfile(pattern):
+            found.add(pattern)
+        else:
+            print(f"⚠️ Not found: {pattern}")
+
+    return sorted(os.path.abspath(p) for p in found)
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ============================================================
+# MANIFEST (what has been ingested, by content hash)
+# ============================================================
+class IngestManifest:
+
+    def __init__(self, path=INGEST_MANIFEST):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                chunks INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def lookup(self, path):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT sha256, chunks FROM files WHERE path = ?", (path,)
+            ).fetchone()
+
+    def has_hash(self, sha256):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM files WHERE sha256 = ? LIMIT 1", (sha256,)
+            ).fetchone() is not None
+
+    def hash_in_use(self, sha256, except_path):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM files WHERE sha256 = ? AND path != ? LIMIT 1", (sha256, except_path)
+            ).fetchone() is not None
+
+    def record(self, path, sha256, pages, chunks):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, sha256, pages, chunks, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (path, sha256, pages, chunks, time.time())
+            )
+            self.conn.commit()
+
+
+def vector_prefix(sha256):
+    return sha256[:16]
+
+
+# ============================================================
+# WORKERS
+# ============================================================
+def extract_file(path, chunk_size):
+    """Process-pool task: PDF → (pages, chunks). Errors are returned, not raised."""
+    try:
+        from pdf_to_text import pdf_to_pages
+        from pdf_ingest import split_text_into_chunks
+
+        pages = pdf_to_pages(path)
+        text = "".join(p + "\n" for p in pages if p)
+        return {"pages": len(pages), "chunks": split_text_into_chunks(text, chunk_size), "error": None}
+    except Exception as e:
+        return {"pages": 0, "chunks": [], "error": f"{type(e).__name__}: {e}"}
+
+
+def upload_file(task, chunks, source_name, manifest):
+    """Thread-pool task: embed + store one file's chunks, then update the manifest."""
+    from pdf_ingest import store_chunks
+    from rag_memory import delete_vectors, namespace_for
+
+    doc_id = vector_prefix(task["sha256"])
+    stored = store_chunks(
+        chunks, source_name=source_name, id_prefix=doc_id, namespace=namespace_for("pdf"),
+        extra_metadata={"doc_id": doc_id, "file": os.path.basename(task["path"]), "doc_hash": task["sha256"]}
+    )
+    if stored < len(chunks):
+        raise RuntimeError(f"embedding failed for {len(chunks) - stored}/{len(chunks)} chunks")
+
+    # Content changed since the last ingest → drop the old chunks
+    previous = task.get("previous")
+    if previous and previous[0] != task["sha256"] and not manifest.hash_in_use(previous[0], task["path"]):
+        old_prefix = vector_prefix(previous[0])
+        delete_vectors([f"{old_prefix}-{i}" for i in range(previous[1])],
+                       namespace=namespace_for("pdf"))
+
+    manifest.record(task["path"], task["sha256"], task["pages"], len(chunks))
+    return stored
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+class IngestStats:
+
+    def __init__(self, total):
+        self.total = total
+        self.done = self.skipped = self.failed = 0
+        self.pages = self.chunks = 0
+        self.started = time.time()
+        self.last_report = self.started
+        self.lock = threading.Lock()
+
+    def rates(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return self.pages / elapsed, self.chunks / elapsed
+
+    def report(self, force=False):
+        now = time.time()
+        if not force and now - self.last_report < PROGRESS_EVERY:
+            return
+        self.last_report = now
+
+        pages_rate, chunks_rate = self.rates()
+        finished = self.done + self.skipped + self.failed
+        print(f"📈 {finished}/{self.total} files ({self.done} ingested, {self.skipped} unchanged, "
+              f"{self.failed} failed) — {pages_rate:.1f} pages/s, {chunks_rate:.1f} chunks/s")
+
+
+def bulk_ingest(patterns, source_name="PDF", extract_workers=None, upload_workers=4,
+                chunk_size=800, report_dir="memory_store", manifest_path=INGEST_MANIFEST, force=False):
+    from rag_memory import ensure_connected, MEMORY_ENABLED
+
+    if not MEMORY_ENABLED:
+        print("❌ Memory disabled (no Pinecone key and VECTOR_STORE is not local).")
+        return None
+    if ensure_connected() is None:
+        print("❌ Could not connect to the vector index.")
+        return None
+
+    paths = discover_pdfs(patterns)
+    manifest = IngestManifest(manifest_path)
+    stats = IngestStats(len(paths))
+
+    os.makedirs(report_dir, exist_ok=True)
+    errors_path = os.path.join(report_dir, "ingest_errors.jsonl")
+    errors_file = open(errors_path, "w", encoding="utf-8")
+
+    def fail(path, stage, error):
+        with stats.lock:
+            stats.failed += 1
+            errors_file.write(json.dumps({"path": path, "stage": stage, "error": str(error)}) + "\n")
+            errors_file.flush()
+        print(f"❌ {os.path.basename(path)} ({stage}): {error}")
+
+    # ---- hash + skip ----
+    pending = []
+    queued_hashes = set()
+    for path in paths:
+        try:
+            sha256 = file_sha256(path)
+        except OSError as e:
+            fail(path, "read", e)
+            continue
+
+        previous = manifest.lookup(path)
+        already_ingested = not force and manifest.has_hash(sha256)
+        if already_ingested or sha256 in queued_hashes:
+            stats.skipped += 1
+            if already_ingested and (not previous or previous[0] != sha256):
+                manifest.record(path, sha256, 0, 0)  # same content already ingested under another path
+            continue
+
+        queued_hashes.add(sha256)
+        pending.append({"path": path, "sha256": sha256, "previous": previous})
+
+    print(f"📚 {len(paths)} PDFs found, {stats.skipped} unchanged, {len(pending)} to ingest.")
+
+    extract_workers = extract_workers or max(1, (os.cpu_count() or 2) - 1)
+    max_in_flight = extract_workers * 2  # bounds extracted text waiting in memory
+
+    extract_pool = ProcessPoolExecutor(max_workers=extract_workers)
+    upload_pool = ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="ingest")
+
+    extracting = {}
+    uploading = {}
+    queue = list(reversed(pending))
+
+    try:
+        while queue or extracting or uploading:
+            # Keep the extract pool busy without buffering the whole corpus
+            while queue and len(extracting) + len(uploading) < max_in_flight + upload_workers:
+                task = queue.pop()
+                extracting[extract_pool.submit(extract_file, task["path"], chunk_size)] = task
+
+            done, _ = wait(list(extracting) + list(uploading), timeout=PROGRESS_EVERY,
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future in extracting:
+                    task = extracting.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:  # worker process died
+                        result = {"pages": 0, "chunks": [], "error": str(e)}
+
+                    if result["error"]:
+                        fail(task["path"], "extract", result["error"])
+                    elif not result["chunks"]:
+                        fail(task["path"], "extract", "no extractable text")
+                    else:
+                        task["pages"] = result["pages"]
+                        uploading[upload_pool.submit(upload_file, task, result["chunks"],
+                                                     source_name, manifest)] = task
+                else:
+                    task = uploading.pop(future)
+                    try:
+                        stored = future.result()
+                    except Exception as e:
+                        fail(task["path"], "upload", e)
+                        continue
+
+                    with stats.lock:
+                        stats.done += 1
+                        stats.pages += task["pages"]
+                        stats.chunks += stored
+
+            stats.report()
+
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrupted — finished files are in the manifest, re-run to resume.")
+        extract_pool.shutdown(wait=False, cancel_futures=True)
+        upload_pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        extract_pool.shutdown(wait=True)
+        upload_pool.shutdown(wait=True)
+    finally:
+        errors_file.close()
+
+    stats.report(force=True)
+    pages_rate, chunks_rate = stats.rates()
+    summary = {
+        "files": len(paths),
+        "ingested": stats.done,
+        "skipped": stats.skipped,
+        "failed": stats.failed,
+        "pages": stats.pages,
+        "chunks": stats.chunks,
+        "seconds": round(time.time() - stats.started, 3),
+        "pages_per_sec": round(pages_rate, 2),
+        "chunks_per_sec": round(chunks_rate, 2),
+        "errors": errors_path,
+    }
+
+    print("\n============================")
+    print(" BULK INGEST SUMMARY")
+    print("============================")
+    print(f" Ingested: {stats.done}   Unchanged: {stats.skipped}   Failed: {stats.failed}")
+    print(f" Pages: {stats.pages}   Chunks: {stats.chunks}   Time: {summary['seconds']}s")
+    print(f" Throughput: {summary['pages_per_sec']} pages/s, {summary['chunks_per_sec']} chunks/s")
+    if stats.failed:
+        print(f" Errors: {errors_path}")
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest a directory / glob of PDFs into memory.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--source", default="PDF", help="Source name stored with every chunk")
+    parser.add_argument("--extract-workers", type=int, default=None)
+    parser.add_argument("--upload-workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=800, help="Words per chunk")
+    parser.add_argument("--report-dir", default="memory_store")
+    parser.add_argument("--manifest", default=INGEST_MANIFEST)
+    parser.add_argument("--force", action="store_true", help="Re-ingest unchanged files too")
+    args = parser.parse_args(argv)
+
+    summary = bulk_ingest(args.inputs, source_name=args.source, extract_workers=args.extract_workers,
+                          upload_workers=args.upload_workers, chunk_size=args.chunk_size,
+                          report_dir=args.report_dir, manifest_path=args.manifest, force=args.force)
+    if summary is None:
+        return 2
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
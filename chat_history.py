@@ -0,0 +1,103 @@
+# chat_history.py (BOUNDED PER-SESSION CHAT HISTORY)
+#
+# Streamlit keeps st.session_state for every open session, so an unbounded
+# list of (question, answer) turns grows with each message and every rerun
+# re-renders all of it. ChatHistory keeps the last CHAT_HISTORY_SIZE turns
+# in a ring buffer; older turns are either dropped or, with CHAT_SPILL_DIR
+# set, appended to a per-session JSONL file and read back page by page.
+#
+#   history = ChatHistory()
+#   history.append(question, answer)
+#   for question, answer in history.page(0, page_size=10):   # newest page
+#       ...
+
+import os
+import json
+import uuid
+import weakref
+import threading
+from itertools import islice
+from collections import deque
+
+CHAT_HISTORY_SIZE = int(os.getenv("CHAT_HISTORY_SIZE", "50"))
+CHAT_SPILL_DIR = os.getenv("CHAT_SPILL_DIR", "")
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "10"))
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ChatHistory:
+    """
+    Turns are numbered oldest-first from 0. The newest `max_turns` live in
+    memory; turns evicted from the buffer go to the spill file if there is
+    one, otherwise they are gone (see `evicted`).
+    """
+
+    def __init__(self, max_turns=CHAT_HISTORY_SIZE, spill_dir=CHAT_SPILL_DIR):
+        self.buffer = deque(maxlen=max(1, max_turns))
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+        self.spill_path = None
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self.spill_path = os.path.join(spill_dir, f"chat_{uuid.uuid4().hex}.jsonl")
+            # Session state is dropped when the session ends; take the file with it
+            self._finalizer = weakref.finalize(self, _remove_file, self.spill_path)
+
+    def __len__(self):
+        """Turns that can still be shown."""
+        return len(self.buffer) + (self.evicted if self.spill_path else 0)
+
+    @property
+    def total(self):
+        """Every turn appended since the last clear()."""
+        return len(self.buffer) + self.evicted
+
+    def append(self, question, answer):
+        with self.lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                oldest = self.buffer[0]
+                if self.spill_path:
+                    with open(self.spill_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(oldest, ensure_ascii=False) + "\n")
+                self.evicted += 1
+            self.buffer.append((question, answer))
+
+    def clear(self):
+        with self.lock:
+            self.buffer.clear()
+            self.evicted = 0
+            if self.spill_path:
+                _remove_file(self.spill_path)
+
+    def _spilled(self, start, stop):
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            return [tuple(json.loads(line)) for line in islice(f, start, stop)]
+
+    def turns(self, start, stop):
+        """Turns [start, stop) in the numbering of `len(self)`, oldest first."""
+        with self.lock:
+            first_in_memory = self.evicted if self.spill_path else 0
+            out = []
+            if start < first_in_memory:
+                out.extend(self._spilled(start, min(stop, first_in_memory)))
+            lo = max(start, first_in_memory) - first_in_memory
+            hi = max(stop, first_in_memory) - first_in_memory
+            out.extend(islice(self.buffer, lo, hi))
+            return out
+
+    def page_count(self, page_size=CHAT_PAGE_SIZE):
+        return max(1, -(-len(self) // page_size))
+
+    def page(self, page, page_size=CHAT_PAGE_SIZE):
+        """Page 0 is the newest `page_size` turns; returned oldest first."""
+        stop = len(self) - page * page_size
+        if stop <= 0:
+            return []
+        return self.turns(max(0, stop - page_size), stop)
@@ -1,6 +1,5 @@
 # cleanup_pdf_memory.py
 
-from pinecone import Pinecone
 import os
 
 INDEX_NAME = os.getenv("INDEX_NAME", "research-memory")
@@ -9,6 +8,8 @@ def delete_pdf_chunks():
     api_key = os.getenv("PINECONE_API_KEY")
     region = os.getenv("PINECONE_REGION", "us-east-1")
 
+    from pinecone import Pinecone  # imported lazily to keep CLI startup fast
+
     pc = Pinecone(api_key=api_key)
     index = pc.Index(INDEX_NAME)
 
@@ -31,7 +32,35 @@ def delete_pdf_chunks():
 
     index.delete(ids)
 
+    from memory_client import get_memory_client
+    get_memory_client(INDEX_NAME).doc_store.delete(ids)
+
     print("✅ PDF chunks deleted successfully!")
 
+
+def delete_pdf_namespaces():
+    """
+    PDFs ingested since namespaces were added live in the "pdf" namespace
+    (earlier builds gave each document its own "pdf-<doc id>" namespace).
+    """
+    from pinecone import Pinecone
+    from memory_client import get_memory_client
+
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index(INDEX_NAME)
+
+    namespaces = [ns for ns in index.describe_index_stats()["namespaces"]
+                  if ns == "pdf" or ns.startswith("pdf-")]
+    if not namespaces:
+        print("✅ No PDF namespaces found.")
+        return
+
+    for ns in namespaces:
+        ids = [vid for page in index.list(namespace=ns) for vid in page]
+        index.delete(delete_all=True, namespace=ns)
+        get_memory_client(INDEX_NAME).doc_store.delete(ids)
+        print(f"🗑 Deleted namespace {ns} ({len(ids)} chunks).")
+
 if __name__ == "__main__":
     delete_pdf_chunks()
+    delete_pdf_namespaces()
@@ -0,0 +1,175 @@
+# context_builder.py (TOKEN-BUDGETED MEMORY CONTEXT WITH MMR)
+#
+# answer_from_memory used to paste every retrieved summary / 800-word PDF
+# chunk into the prompt. build_context() instead:
+#   1. counts tokens locally (tiktoken when installed, heuristic otherwise)
+#   2. orders passages by maximal marginal relevance, using the vectors the
+#      query already returned (no extra API calls)
+#   3. stops at a token budget, truncating only if nothing else fits
+
+import os
+import re
+import math
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MIN_PASSAGE_TOKENS = 40
+
+_encoder = None
+_encoder_loaded = False
+
+
+# ============================================================
+# TOKEN COUNTING
+# ============================================================
+def _get_encoder():
+    global _encoder, _encoder_loaded
+
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None  # optional dependency; fall back to the heuristic
+
+    return _encoder
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+
+    # ~4 chars per token for English, ~0.75 words per token; take the larger
+    words = len(re.findall(r"\S+", text))
+    return int(math.ceil(max(len(text) / 4.0, words * 4.0 / 3.0)))
+
+
+def truncate_to_tokens(text, max_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoder = _get_encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text)[:max_tokens]) + " …"
+
+    words = text.split()
+    keep = max(1, int(max_tokens * 0.75))
+    while keep > 1 and count_tokens(" ".join(words[:keep])) > max_tokens:
+        keep = int(keep * 0.9)
+    return " ".join(words[:keep]) + " …"
+
+
+# ============================================================
+# MMR SELECTION
+# ============================================================
+def _norm(v):
+    return math.sqrt(sum(x * x for x in v)) or 1.0
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def mmr_order(query_vector, passages, lambda_=MMR_LAMBDA):
+    """
+    Order passages by maximal marginal relevance.
+    Each passage: {"text", "vector" (optional), "score" (optional)}.
+    Without vectors the original (relevance) order is kept.
+    """
+    if not passages or any(not p.get("vector") for p in passages):
+        return list(passages)
+
+    norms = [_norm(p["vector"]) for p in passages]
+
+    if query_vector is not None:
+        q_norm = _norm(query_vector)
+        relevance = [_dot(query_vector, p["vector"]) / (q_norm * n) for p, n in zip(passages, norms)]
+    else:
+        relevance = [p.get("score") or 0.0 for p in passages]
+
+    remaining = list(range(len(passages)))
+    selected = []
+    max_sim = [0.0] * len(passages)  # similarity to the closest already-selected passage
+
+    while remaining:
+        best = max(remaining, key=lambda i: lambda_ * relevance[i] - (1 - lambda_) * max_sim[i])
+        selected.append(best)
+        remaining.remove(best)
+
+        for i in remaining:
+            sim = _dot(passages[i]["vector"], passages[best]["vector"]) / (norms[i] * norms[best])
+            max_sim[i] = max(max_sim[i], sim)
+
+    return [passages[i] for i in selected]
+
+
+# ============================================================
+# CONTEXT BUILDER
+# ============================================================
+def build_context(query_vector, passages, token_budget=None, lambda_=MMR_LAMBDA, fetch_texts=None):
+    """
+    Returns (memory_text, used_passages). memory_text is a "- passage" list
+    that fits in token_budget tokens.
+
+    Passages may come without "text" but with "id" + "tokens" (the size
+    stored in vector metadata); fetch_texts(ids) -> {id: text} is then
+    called once, for the selected passages only.
+    """
+    budget = token_budget or CONTEXT_TOKEN_BUDGET
+    passages = [dict(p) for p in passages]
+
+    # Without text or a stored size there is nothing to select on: fetch those first
+    unsized = [p["id"] for p in passages if not p.get("text") and not p.get("tokens") and p.get("id")]
+    if unsized and fetch_texts:
+        texts = fetch_texts(unsized)
+        for p in passages:
+            if not p.get("text") and p.get("id") in texts:
+                p["text"] = texts[p["id"]]
+
+    candidates = [p for p in passages if p.get("text") or (p.get("tokens") and p.get("id") and fetch_texts)]
+
+    selected = []  # (passage, token cap or None)
+    total = 0
+
+    for passage in mmr_order(query_vector, candidates, lambda_):
+        if passage.get("text"):
+            tokens = count_tokens(f"- {passage['text']}")
+        else:
+            tokens = passage["tokens"] + 1
+        cap = None
+
+        if total + tokens > budget:
+            room = budget - total
+            if selected or room < MIN_PASSAGE_TOKENS:
+                continue  # try smaller passages further down
+            cap = tokens = room
+
+        selected.append((passage, cap))
+        total += tokens
+
+        if budget - total < MIN_PASSAGE_TOKENS:
+            break
+
+    missing = [p["id"] for p, _ in selected if not p.get("text")]
+    if missing:
+        texts = fetch_texts(missing)
+        for p, _ in selected:
+            if not p.get("text"):
+                p["text"] = texts.get(p["id"])
+
+    used = []
+    lines = []
+    for passage, cap in selected:
+        if not passage.get("text"):
+            continue  # text vanished from the document store
+        line = f"- {passage['text']}"
+        lines.append(truncate_to_tokens(line, cap) if cap else line)
+        used.append(passage)
+
+    print(f"🧮 Context: {len(used)}/{len(passages)} passages, ~{total} tokens (budget {budget}).")
+    return "\n".join(lines), used
@@ -1,13 +1,22 @@
 # conversation_agent.py (UPDATED FOR API SAFETY MODE)
 
 import os
-from ask_memory import answer_from_memory
-from rag_memory import init_and_connect
-from agent import ResearchAgent
+import time
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ask_memory import answer_from_memory, answer_from_summaries
+from rag_memory import ensure_connected, embed_text, query_memory, MEMORY_ENABLED
+from agent import ResearchAgent, is_research_candidate
+from report_archive import archive_report, find_report
+from scraper import duckduckgo_search, fetch_page_text, USE_SELENIUM
+from tracing import add_counter
 
 # API safety check
 OPENAI_ENABLED = bool(os.environ.get("OPENAI_API_KEY"))
-PINECONE_ENABLED = bool(os.environ.get("PINECONE_API_KEY"))
+PINECONE_ENABLED = MEMORY_ENABLED   # Pinecone key set, or VECTOR_STORE=local
 
 if not OPENAI_ENABLED:
     GPT_DISABLED_MSG = "❌ GPT disabled by admin (Sudheer)."
@@ -19,29 +28,196 @@ if not PINECONE_ENABLED:
 else:
     MEMORY_DISABLED_MSG = None
 
+# Memory answers only when its best match (cosine) reaches this score;
+# below it the question goes on to the archive / web research.
+MEMORY_MIN_SCORE = float(os.getenv("MEMORY_MIN_SCORE", "0.35"))
+
+# Speculative research: start the web search (and the first page fetches)
+# while memory is still being consulted, so a memory miss does not pay both
+# latencies back to back. The search waits SPECULATIVE_GRACE_MS first and is
+# dropped if memory turns out confident by then; it starts right away once
+# memory is known to miss. Off by default with Selenium, where every search
+# opens a Chrome session. SPECULATIVE_FETCHES=0 speculates on the search only.
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "0" if USE_SELENIUM else "1") == "1"
+SPECULATIVE_GRACE = int(os.getenv("SPECULATIVE_GRACE_MS", "300")) / 1000.0
+SPECULATIVE_FETCHES = int(os.getenv("SPECULATIVE_FETCHES", "1"))
+SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", "4"))
+
+# Search results that finished after memory had already answered are kept
+# ("shelved") for a while, so asking again / researching the same query
+# does not search twice.
+SHELF_TTL = int(os.getenv("SPECULATIVE_SHELF_TTL", "600"))
+SHELF_SIZE = 64
+
+# Recent questions kept per agent (one agent per UI session)
+AGENT_HISTORY_SIZE = int(os.getenv("AGENT_HISTORY_SIZE", "50"))
+
+
+# ============================================================
+# SPECULATIVE WEB SEARCH
+# ============================================================
+_pool = None
+_pool_lock = threading.Lock()
+_shelf = OrderedDict()   # query -> (stored_at, results)
+_shelf_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculative")
+    return _pool
+
+
+def _shelf_get(query):
+    with _shelf_lock:
+        entry = _shelf.get(query)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > SHELF_TTL:
+            del _shelf[query]
+            return None
+        _shelf.move_to_end(query)
+        return entry[1]
+
+
+def _shelf_put(query, results):
+    with _shelf_lock:
+        _shelf[query] = (time.time(), results)
+        _shelf.move_to_end(query)
+        while len(_shelf) > SHELF_SIZE:
+            _shelf.popitem(last=False)
+
+
+class SpeculativeSearch:
+    """
+    Web search for `query` (plus the first `fetches` page fetches) running
+    on a shared pool, after a `grace` period that start() cuts short.
+    cancel() drops work that has not started yet (including a search still
+    in its grace period); a search already in flight finishes and is
+    shelved. Page texts land in the shared fetch cache either way.
+    """
+
+    def __init__(self, query, fetches=SPECULATIVE_FETCHES, grace=SPECULATIVE_GRACE):
+        self.query = query
+        self.fetches = fetches
+        self.grace = grace
+        self.go = threading.Event()
+        self.cancelled = threading.Event()
+        self.searching = False
+        self.fetch_futures = {}   # url -> Future[str]
+        self.lock = threading.Lock()
+        self.search_future = self._submit(self._search)
+
+    @staticmethod
+    def _submit(fn, *args):
+        # Same tracing context as the caller, so spans nest under the ask
+        return _get_pool().submit(contextvars.copy_context().run, fn, *args)
+
+    def _search(self):
+        self.go.wait(self.grace)
+        with self.lock:
+            if self.cancelled.is_set():
+                return None
+            self.searching = True
+
+        results = _shelf_get(self.query)
+        if results is None:
+            results = duckduckgo_search(self.query)
+            if results:
+                _shelf_put(self.query, results)
+
+        started = 0
+        for item in results:
+            if started >= self.fetches:
+                break
+            # Same URL form and filtering as ResearchAgent._run
+            url = item["url"].lower()
+            if not is_research_candidate(url, item["title"]):
+                continue
+            with self.lock:
+                if self.cancelled.is_set():
+                    break
+                if url not in self.fetch_futures:
+                    self.fetch_futures[url] = self._submit(fetch_page_text, url)
+            started += 1
+
+        return results
+
+    def start(self):
+        """Memory missed: search now instead of after the grace period."""
+        self.go.set()
+
+    def cancel(self):
+        """Memory answered: stop whatever has not started yet."""
+        with self.lock:
+            self.cancelled.set()
+            self.go.set()
+            dropped = sum(1 for f in self.fetch_futures.values() if f.cancel())
+            if not self.searching:
+                dropped += 1
+        self.search_future.cancel()
+        add_counter("speculative_total", 1, outcome="cancelled")
+        return dropped
+
+    def take(self):
+        """
+        Memory missed: (search_results, {url: Future}) for ResearchAgent.
+        Waits for the search if it is still running; (None, {}) if it failed.
+        """
+        self.start()
+        try:
+            results = self.search_future.result()
+        except Exception as e:
+            print(f"⚠️ Speculative search failed, searching again: {e}")
+            add_counter("speculative_total", 1, outcome="failed")
+            return None, {}
+
+        add_counter("speculative_total", 1, outcome="used")
+        with self.lock:
+            return results, dict(self.fetch_futures)
+
 
 class ConversationAgent:
 
     def __init__(self):
         print("\n🔧 Initializing Conversation Agent...")
 
-        # Initialize Pinecone only if allowed
+        # Initialize Pinecone only if allowed (once per process, shared by all agents)
         if PINECONE_ENABLED:
             try:
-                init_and_connect()
+                ensure_connected()
                 print("✅ Memory connected (Pinecone).")
             except Exception as e:
                 print(f"❌ Pinecone initialization failed: {e}")
         else:
             print(MEMORY_DISABLED_MSG)
 
-        self.history = []
+        self.history = deque(maxlen=AGENT_HISTORY_SIZE)
         print("✅ Conversation Agent Ready.\n")
 
-    def ask(self, query):
+    @staticmethod
+    def _reply(text, stream):
+        return iter([text]) if stream else text
+
+    def ask(self, query, stream=False):
+        """
+        Answer from memory, falling back to web research.
+        With stream=True the answer is an iterator of text pieces, so the
+        UI can show tokens as soon as GPT produces them.
+        """
         print(f"\n🧠 User asked: {query}")
         self.history.append(query)
 
+        # Question embedding is computed at most once per ask()
+        query_vector = None
+
+        # Web search starts (after a grace period) if memory might miss and research is allowed
+        speculative = None
+        if SPECULATIVE_SEARCH and PINECONE_ENABLED and OPENAI_ENABLED:
+            speculative = SpeculativeSearch(query)
+
         # -----------------------------------
         # 1️⃣ MEMORY LOOKUP (only if allowed)
         # -----------------------------------
@@ -50,9 +226,24 @@ class ConversationAgent:
         else:
             print("🔎 Searching Pinecone memory...")
             try:
-                answer = answer_from_memory(query)
-                if answer:
-                    return answer
+                query_vector = embed_text(query)
+                matches = query_memory(query, vector=query_vector, include_values=True)
+                best = matches[0]["score"] if matches else None
+
+                if best is not None and best >= MEMORY_MIN_SCORE:
+                    # Confident: the web search is not needed
+                    if speculative is not None:
+                        dropped = speculative.cancel()
+                        print(f"🛑 Memory answered; dropped {dropped} speculative task(s).")
+                        speculative = None
+                    answer = answer_from_memory(query, stream=stream, vector=query_vector, matches=matches)
+                    if answer:
+                        return answer
+                else:
+                    if best is not None:
+                        print(f"⚠️ Memory not confident (best match {best:.2f} < {MEMORY_MIN_SCORE}).")
+                    if speculative is not None:
+                        speculative.start()
             except Exception as e:
                 print(f"❌ Memory search error: {e}")
 
@@ -60,32 +251,61 @@ class ConversationAgent:
         # 2️⃣ GPT OFF? → Stop here (NO web research allowed)
         # ------------------------------------------------
         if not OPENAI_ENABLED:
-            return GPT_DISABLED_MSG
+            return self._reply(GPT_DISABLED_MSG, stream)
+
+        # ------------------------------------------------
+        # 3️⃣ Recent archived report on the same / a similar topic?
+        # ------------------------------------------------
+        prior = find_report(query)
+        if prior and prior["summaries"]:
+            print(f"♻️ Answering from archived report on '{prior['query']}' "
+                  f"({prior['age_hours']:.1f} h old, {prior['match']} match)")
+            try:
+                if query_vector is None:
+                    query_vector = embed_text(query)
+                answer = answer_from_summaries(query, prior["summaries"], vector=query_vector, stream=stream)
+                if answer:
+                    if speculative is not None:
+                        speculative.cancel()
+                    return answer
+            except Exception as e:
+                print(f"❌ Answer from archived report failed: {e}")
 
         # ------------------------------------------------
-        # 3️⃣ Run Web Research Agent (uses GPT internally)
+        # 4️⃣ Run Web Research Agent (uses GPT internally)
         # ------------------------------------------------
         print("\n⚠️ Memory insufficient. Running web research...")
 
+        search_results, prefetched_pages = None, {}
+        if speculative is not None:
+            search_results, prefetched_pages = speculative.take()
+
         try:
-            researcher = ResearchAgent(query, max_articles=2)
+            researcher = ResearchAgent(query, max_articles=2, search_results=search_results,
+                                       prefetched_pages=prefetched_pages)
             report = researcher.run()
         except Exception as e:
-            return f"❌ Research failed: {e}"
+            return self._reply(f"❌ Research failed: {e}", stream)
+
+        archive_report(query, report, researcher.collected_summaries)
 
         # ------------------------------------------------
-        # 4️⃣ Retry memory after adding new research
+        # 5️⃣ Answer from the fresh summaries in-process
+        #    (no re-embedding, no waiting for Pinecone to index them)
         # ------------------------------------------------
-        if PINECONE_ENABLED:
-            print("🔁 Retrying memory after research...")
-            try:
-                answer = answer_from_memory(query)
-                if answer:
-                    return answer
-            except:
-                pass
+        print("🔁 Answering from fresh research summaries...")
+        try:
+            if query_vector is None:
+                query_vector = embed_text(query)
+            answer = answer_from_summaries(
+                query, researcher.collected_summaries, vector=query_vector, stream=stream
+            )
+            if answer:
+                return answer
+        except Exception as e:
+            print(f"❌ Answer from research failed: {e}")
 
         # ------------------------------------------------
-        # 5️⃣ Fallback return
+        # 6️⃣ Fallback return
         # ------------------------------------------------
-        return "I could not find enough information, even after research."
+        return self._reply("I could not find enough information, even after research.", stream)
@@ -0,0 +1,207 @@
+# dedup.py (NEAR-DUPLICATE PAGE DETECTION — MINHASH + LSH)
+#
+# Syndicated / mirrored copies of an article differ only in boilerplate,
+# so exact hashes miss them. Each page gets a MinHash signature over word
+# 5-grams; LSH bands find candidates and the estimated Jaccard similarity
+# decides. Signatures (plus the GPT summary produced for the page) persist
+# in SQLite, so duplicates are caught within a run and across runs before
+# any GPT or embedding call is spent. Summaries older than
+# DEDUP_REUSE_HOURS are not reused (the page is summarized again).
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_DB = os.getenv("DEDUP_DB", os.path.join("cache", "dedup.sqlite"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_REUSE_HOURS = float(os.getenv("DEDUP_REUSE_HOURS", "168"))
+
+NUM_PERM = 64
+BANDS = 16                  # 16 bands x 4 rows → candidates from ~0.5 similarity
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _make_permutations(n, seed=1):
+    out = []
+    for i in range(n):
+        digest = hashlib.blake2b(f"perm:{seed}:{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+        out.append((a, b))
+    return out
+
+
+_PERMUTATIONS = _make_permutations(NUM_PERM)
+
+
+# ============================================================
+# SIGNATURES
+# ============================================================
+def shingles(text, size=SHINGLE_SIZE):
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text):
+    hashed = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big")
+        for s in shingles(text)
+    ]
+    if not hashed:
+        return None
+
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashed)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / float(len(sig_a))
+
+
+def band_hashes(signature):
+    return [
+        hashlib.blake2b(
+            json.dumps(signature[i * ROWS:(i + 1) * ROWS]).encode(), digest_size=8
+        ).hexdigest()
+        for i in range(BANDS)
+    ]
+
+
+# ============================================================
+# PERSISTENT SIGNATURE INDEX
+# ============================================================
+class NearDuplicateIndex:
+
+    def __init__(self, path=DEDUP_DB, threshold=DEDUP_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                url TEXT,
+                title TEXT,
+                signature TEXT NOT NULL,
+                summary TEXT,
+                run_id TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                doc_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, hash);
+        """)
+        self.conn.commit()
+
+    def find(self, text, signature=None, run_id=None):
+        """
+        Best near-duplicate of `text` already in the index, as a dict with
+        doc_id/url/title/summary/run_id/age_hours/similarity, or None. With run_id, a
+        match from that run wins over better-scoring ones from other runs.
+        """
+        signature = signature or minhash(text)
+        if signature is None:
+            return None
+
+        with self.lock:
+            candidates = set()
+            for band, h in enumerate(band_hashes(signature)):
+                rows = self.conn.execute(
+                    "SELECT doc_id FROM bands WHERE band = ? AND hash = ?", (band, h)
+                ).fetchall()
+                candidates.update(r[0] for r in rows)
+
+            best = best_in_run = None
+            for doc_id in candidates:
+                row = self.conn.execute(
+                    "SELECT url, title, signature, summary, run_id, created_at FROM documents WHERE doc_id = ?",
+                    (doc_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+
+                similarity = estimated_jaccard(signature, json.loads(row[2]))
+                if similarity < self.threshold:
+                    continue
+
+                match = {
+                    "doc_id": doc_id,
+                    "url": row[0],
+                    "title": row[1],
+                    "summary": row[3],
+                    "run_id": row[4],
+                    "age_hours": (time.time() - row[5]) / 3600.0,
+                    "similarity": round(similarity, 3)
+                }
+                if best is None or similarity > best["similarity"]:
+                    best = match
+                if run_id is not None and row[4] == run_id and (
+                        best_in_run is None or similarity > best_in_run["similarity"]):
+                    best_in_run = match
+
+        return best_in_run or best
+
+    def add(self, url, text, title=None, summary=None, run_id=None, signature=None, created_at=None):
+        signature = signature or minhash(text)
+        if signature is None:
+            return None
+
+        doc_id = hashlib.sha1((url or "").encode("utf-8") + json.dumps(signature).encode()).hexdigest()
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, url, title, signature, summary, run_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, url, title, json.dumps(signature), summary, run_id, created_at or time.time())
+            )
+            self.conn.execute("DELETE FROM bands WHERE doc_id = ?", (doc_id,))
+            self.conn.executemany(
+                "INSERT INTO bands (band, hash, doc_id) VALUES (?, ?, ?)",
+                [(band, h, doc_id) for band, h in enumerate(band_hashes(signature))]
+            )
+            self.conn.commit()
+
+        return doc_id
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_dedup_index():
+    """Process-wide index, or None when DEDUP_ENABLED=0."""
+    global _index
+
+    if not DEDUP_ENABLED:
+        return None
+
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+    return _index
@@ -0,0 +1,156 @@
+# doc_store.py (COMPRESSED DOCUMENT STORE KEYED BY VECTOR ID)
+#
+# Summaries and PDF chunks used to travel inside vector metadata, so every
+# query shipped kilobytes of text per match and hit metadata size limits.
+# Now the vector carries only small filterable fields (title, url, source,
+# timestamp, tokens) and the text lives here:
+#
+#   store = get_doc_store()
+#   store.put_many([(vector_id, text), ...])
+#   texts = store.get_many(ids)        # one SELECT for all passages used
+#
+# Text is compressed with zstd when the zstandard package is installed,
+# zlib otherwise; the codec is stored per row, so both can be read back.
+
+import os
+import time
+import zlib
+import sqlite3
+import threading
+
+DOC_STORE_DB = os.getenv("DOC_STORE_DB", os.path.join("memory_store", "documents.sqlite"))
+ZSTD_LEVEL = int(os.getenv("DOC_STORE_ZSTD_LEVEL", "9"))
+
+# SQLite's default limit on bound parameters is 999
+MAX_SQL_PARAMS = 900
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional dependency
+    _zstd = None
+
+
+# ============================================================
+# CODECS
+# ============================================================
+def compress(text):
+    data = text.encode("utf-8")
+    if _zstd is not None:
+        return "zstd", _zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+
+def decompress(codec, blob):
+    if codec == "zstd":
+        if _zstd is None:
+            raise RuntimeError("Document was stored with zstd; install zstandard to read it.")
+        return _zstd.ZstdDecompressor().decompress(blob).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(blob).decode("utf-8")
+    return blob.decode("utf-8")
+
+
+# ============================================================
+# STORE
+# ============================================================
+class DocumentStore:
+    """
+    id → text on SQLite (WAL). Like SharedCache, every thread in every
+    process gets its own connection.
+    """
+
+    def __init__(self, path=DOC_STORE_DB):
+        self.path = path
+        self.local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                body BLOB NOT NULL,
+                chars INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+    def _conn(self):
+        pid = os.getpid()
+        if getattr(self.local, "pid", None) != pid:
+            self.local.conn = sqlite3.connect(self.path, timeout=30)
+            self.local.conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.pid = pid
+        return self.local.conn
+
+    def put(self, doc_id, text):
+        self.put_many([(doc_id, text)])
+
+    def put_many(self, items):
+        rows = []
+        now = time.time()
+        for doc_id, text in items:
+            codec, body = compress(text or "")
+            rows.append((doc_id, codec, body, len(text or ""), now))
+
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO documents (id, codec, body, chars, created_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.commit()
+        return len(rows)
+
+    def get(self, doc_id):
+        return self.get_many([doc_id]).get(doc_id)
+
+    def get_many(self, ids):
+        """{id: text} for the ids that exist, in as few queries as possible."""
+        ids = list(dict.fromkeys(i for i in ids if i))
+        out = {}
+        conn = self._conn()
+
+        for start in range(0, len(ids), MAX_SQL_PARAMS):
+            batch = ids[start:start + MAX_SQL_PARAMS]
+            rows = conn.execute(
+                f"SELECT id, codec, body FROM documents WHERE id IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for doc_id, codec, body in rows:
+                out[doc_id] = decompress(codec, body)
+
+        return out
+
+    def delete(self, ids):
+        ids = list(ids)
+        conn = self._conn()
+        for start in range(0, len(ids), MAX_SQL_PARAMS):
+            batch = ids[start:start + MAX_SQL_PARAMS]
+            conn.execute(f"DELETE FROM documents WHERE id IN ({','.join('?' * len(batch))})", batch)
+        conn.commit()
+
+    def stats(self):
+        count, chars, stored = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(LENGTH(body)), 0) FROM documents"
+        ).fetchone()
+        return {"documents": count, "chars": chars, "stored_bytes": stored}
+
+
+_stores = {}
+_store_lock = threading.Lock()
+
+
+def get_doc_store(path=None):
+    """Process-wide store per database file (default DOC_STORE_DB)."""
+    path = path or DOC_STORE_DB
+
+    with _store_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = DocumentStore(path)
+    return store
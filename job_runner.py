@@ -0,0 +1,217 @@
+# job_runner.py (BACKGROUND RESEARCH JOBS)
+
+import os
+import json
+import uuid
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from agent import ResearchAgent, save_txt_md_pdf
+from report_archive import archive_report, find_report
+from tracing import get_trace
+
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+MAX_EVENTS_PER_JOB = 200
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+# ============================================================
+# RESEARCH JOB RUNNER
+# ============================================================
+class ResearchJobRunner:
+    """
+    Runs ResearchAgent jobs in a worker pool, outside the Streamlit script thread.
+    Every job is persisted to JOBS_DIR/<job_id>.json so results survive reruns
+    and restarts. The UI only polls get() / list_jobs().
+    """
+
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS, jobs_dir=JOBS_DIR):
+        self.max_workers = max_workers
+        self.jobs_dir = jobs_dir
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="research-job"
+        )
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._load_jobs()
+
+    # ---------------------------------------------
+    # Persistence
+    # ---------------------------------------------
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        path = self._job_path(job["id"])
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+
+        os.replace(tmp_path, path)
+
+    def _load_jobs(self):
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"):
+                continue
+
+            try:
+                with open(os.path.join(self.jobs_dir, name), encoding="utf-8") as f:
+                    job = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Could not load job file {name}: {e}")
+                continue
+
+            # Jobs that were still queued/running when the process died never finish
+            if job.get("status") in (QUEUED, RUNNING):
+                job["status"] = FAILED
+                job["error"] = "Interrupted by restart."
+                job["finished_at"] = time.time()
+                self._persist(job)
+
+            self.jobs[job["id"]] = job
+
+    # ---------------------------------------------
+    # Public API
+    # ---------------------------------------------
+    def submit(self, query, max_articles=2, reuse=True):
+        """reuse=True returns a fresh-enough archived report instead of researching."""
+        job_id = uuid.uuid4().hex[:12]
+
+        job = {
+            "id": job_id,
+            "query": query,
+            "max_articles": max_articles,
+            "reuse": reuse,
+            "reused_from": None,
+            "status": QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "events": [],
+            "report": None,
+            "files": None,
+            "trace": None,
+            "error": None
+        }
+
+        with self.lock:
+            self.jobs[job_id] = job
+            self._persist(job)
+
+        self.executor.submit(self._run, job_id)
+        print(f"🗂️ Research job queued: {job_id} ({query})")
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def list_jobs(self, job_ids=None):
+        with self.lock:
+            ids = job_ids if job_ids is not None else list(self.jobs)
+            jobs = [self.jobs[i] for i in ids if i in self.jobs]
+            jobs = json.loads(json.dumps(jobs))
+
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+    def active_count(self):
+        with self.lock:
+            return sum(1 for j in self.jobs.values() if j["status"] in (QUEUED, RUNNING))
+
+    def shutdown(self, wait=False):
+        self.executor.shutdown(wait=wait)
+
+    # ---------------------------------------------
+    # Worker side
+    # ---------------------------------------------
+    def _update(self, job_id, **fields):
+        with self.lock:
+            job = self.jobs[job_id]
+            job.update(fields)
+            self._persist(job)
+
+    def _record_event(self, job_id, stage, message):
+        with self.lock:
+            job = self.jobs[job_id]
+            job["events"].append({
+                "time": time.time(),
+                "stage": stage,
+                "message": message
+            })
+            job["events"] = job["events"][-MAX_EVENTS_PER_JOB:]
+            self._persist(job)
+
+    def _run(self, job_id):
+        researcher = None
+
+        def on_progress(stage, message):
+            self._record_event(job_id, stage, message)
+
+        # Everything inside the try: a job must never stay RUNNING after an error
+        try:
+            job = self.get(job_id)
+            self._update(job_id, status=RUNNING, started_at=time.time())
+
+            if job.get("reuse") and self._reuse_archived(job_id, job, on_progress):
+                return
+
+            researcher = ResearchAgent(
+                query=job["query"],
+                max_articles=job["max_articles"],
+                progress_callback=on_progress
+            )
+            report = researcher.run()
+
+            on_progress("save", "Saving report files")
+            saved = save_txt_md_pdf(
+                report,
+                out_base=f"research_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id}"
+            )
+            archive_report(job["query"], report, researcher.collected_summaries, files=saved)
+
+            self._update(job_id, status=DONE, report=report, files=saved,
+                         trace=get_trace(researcher.trace_id), finished_at=time.time())
+            on_progress("done", "Research completed and saved")
+            print(f"✅ Research job finished: {job_id}")
+
+        except Exception as e:
+            trace = get_trace(researcher.trace_id) if researcher is not None and researcher.trace_id else None
+            self._update(job_id, status=FAILED, error=str(e), trace=trace,
+                         finished_at=time.time())
+            on_progress("failed", str(e))
+            print(f"❌ Research job failed: {job_id}: {e}")
+
+    def _reuse_archived(self, job_id, job, on_progress):
+        prior = find_report(job["query"])
+        if prior is None or not prior["summaries"]:
+            return False
+
+        on_progress("reuse", f"Reusing report on '{prior['query']}' from "
+                             f"{prior['age_hours']:.1f} h ago ({prior['match']} match)")
+
+        # Files may have been evicted or cleaned up; the archive still has the text
+        files = prior["files"]
+        if not files or not all(os.path.exists(p) for p in files.values()):
+            files = save_txt_md_pdf(
+                prior["report"],
+                out_base=f"research_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id}"
+            )
+
+        self._update(job_id, status=DONE, report=prior["report"], files=files,
+                     reused_from=prior["id"], finished_at=time.time())
+        on_progress("done", "Reused an archived report")
+        print(f"♻️ Research job reused archived report {prior['id']}: {job_id}")
+        return True
@@ -0,0 +1,69 @@
+# llm_client.py (SHARED OPENAI CLIENT + STREAMING)
+
+import os
+import threading
+from dotenv import load_dotenv
+from rate_limit import call_with_limits
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Point this at a local fake completion server for tests/benchmarks,
+# e.g. OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+OPENAI_ENABLED = bool(OPENAI_API_KEY)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+# ----------------------------------------------
+# One client per process (keeps the HTTP connection pool warm).
+# The openai SDK is imported here, on first use, not at module load.
+# SDK retries are off: rate_limit.call_with_limits owns retry/backoff.
+# ----------------------------------------------
+def get_openai_client():
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL or None,
+                                 max_retries=0)
+
+    return _client
+
+
+# ----------------------------------------------
+# STREAMING CHAT COMPLETION
+# ----------------------------------------------
+def stream_chat(messages, model="gpt-4.1-mini", max_tokens=200, temperature=None):
+    """
+    Yield the completion text piece by piece as the model produces it.
+    Raises on API errors, so callers decide how to surface them.
+    The rate limiter slot is held until the stream ends or the generator is closed.
+    """
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "stream": True,
+        "stream_options": {"include_usage": True}   # last chunk carries token usage for the budget
+    }
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+
+    response = call_with_limits("openai.chat", get_openai_client().chat.completions.create, **kwargs)
+
+    try:
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        response.close()
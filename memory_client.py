@@ -0,0 +1,622 @@
+# memory_client.py (THREAD-SAFE MEMORY CLIENT)
+#
+# rag_memory used to keep the Pinecone client and index in module globals
+# that every init_and_connect() call reassigned, unlocked, under whoever
+# was querying. A MemoryClient owns one index handle and its configuration
+# instead:
+#
+#   client = MemoryClient("research-memory")
+#   client.connect()
+#   client.upsert_summary(title, url, summary)
+#   matches = client.attach_texts(client.query("what did we learn?", namespace="web"))
+#
+# - connect() / reconnect swap the handle under a lock; every operation
+#   reads the handle once, so in-flight calls finish on the handle they
+#   started with
+# - several clients (different indexes / stores) can live in one process,
+#   each with its own document store
+# - aquery() / aupsert_vectors() run the blocking calls in a worker thread
+#   for asyncio callers (context, and so tracing, is carried over)
+#
+# rag_memory's functions are a thin shim over the process-wide default
+# client (get_memory_client()).
+
+import os
+import time
+import uuid
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from embeddings import get_embedding_backend, embeddings_enabled
+from pinecone_init import create_client, ensure_index, INDEX_NAME
+from vector_store import get_local_store, VECTOR_STORE_DIR
+from doc_store import get_doc_store, DOC_STORE_DB
+from context_builder import count_tokens
+from tracing import span, add_counter
+from shared_cache import cache_get, cache_set
+from rate_limit import call_with_limits
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+
+# VECTOR_STORE=local keeps memory in the quantized on-disk store
+# (vector_store.py) instead of Pinecone — no network needed with a local
+# embedding backend.
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone").lower()
+LOCAL_MEMORY = VECTOR_STORE == "local"
+
+# Safe flags
+OPENAI_ENABLED = bool(OPENAI_API_KEY)
+PINECONE_ENABLED = bool(PINECONE_API_KEY)
+MEMORY_ENABLED = PINECONE_ENABLED or LOCAL_MEMORY
+
+# Partitioning: web summaries in "web", every PDF's chunks in "pdf" (one
+# namespace, so an unscoped query stays a handful of requests however many
+# documents were ingested; pdf_filter(doc_id) selects one document).
+# Vectors stored before namespaces existed stay in "".
+WEB_NAMESPACE = "web"
+PDF_NAMESPACE = "pdf"
+NAMESPACE_CACHE_TTL = 60  # seconds
+QUERY_WORKERS = int(os.getenv("MEMORY_QUERY_WORKERS", "8"))
+
+
+# ----------------------------------------------
+# EMBEDDINGS (independent of any index)
+# ----------------------------------------------
+def embed_text(text: str, backend=None):
+    """Generate embeddings safely (backend chosen by EMBED_BACKEND, see embeddings.py)."""
+
+    if backend is None:
+        if not embeddings_enabled():
+            print("❌ GPT disabled by admin (Sudheer). Cannot generate embeddings.")
+            return None
+        backend = get_embedding_backend()
+
+    cache_key = f"{backend.name}:{text}"
+    if backend.cacheable:
+        cached = cache_get("embedding", cache_key)
+        if cached is not None:
+            return cached
+
+    with span("embed", model=backend.name, chars=len(text or "")) as sp:
+        try:
+            vector = backend.embed(text)
+            if backend.cacheable:
+                cache_set("embedding", cache_key, vector)
+            return vector
+        except Exception as e:
+            print(f"❌ Embedding error: {e}")
+            sp["attrs"]["failed"] = str(e)
+            return None
+
+
+def embed_texts(texts, backend=None):
+    """
+    Batch version of embed_text: one backend call for all cache misses.
+    Returns a list aligned with `texts` (None for failures).
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    if backend is None:
+        if not embeddings_enabled():
+            print("❌ GPT disabled by admin (Sudheer). Cannot generate embeddings.")
+            return [None] * len(texts)
+        backend = get_embedding_backend()
+
+    vectors = [None] * len(texts)
+    missing = []
+
+    for i, text in enumerate(texts):
+        cached = cache_get("embedding", f"{backend.name}:{text}") if backend.cacheable else None
+        if cached is not None:
+            vectors[i] = cached
+        else:
+            missing.append(i)
+
+    if not missing:
+        return vectors
+
+    with span("embed", model=backend.name, batch=len(missing)) as sp:
+        try:
+            fresh = backend.embed_batch([texts[i] for i in missing])
+        except Exception as e:
+            print(f"❌ Embedding error: {e}")
+            sp["attrs"]["failed"] = str(e)
+            return vectors
+
+    for i, vector in zip(missing, fresh):
+        vectors[i] = vector
+        if backend.cacheable:
+            cache_set("embedding", f"{backend.name}:{texts[i]}", vector)
+
+    return vectors
+
+
+def namespace_for(source_type):
+    """"web" for web summaries, "pdf" for PDF chunks."""
+    if source_type == "pdf":
+        return PDF_NAMESPACE
+    return WEB_NAMESPACE if source_type == "web" else source_type
+
+
+def pdf_filter(doc_id):
+    """Metadata filter for one PDF's chunks (query with namespace=PDF_NAMESPACE)."""
+    return {"doc_id": {"$eq": doc_id}}
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+class MemoryClient:
+    """
+    One vector index (Pinecone, or the local quantized store) plus the
+    document store and embedding backend it is used with. Safe to share
+    between threads; create one per index. Unless one is passed in, the
+    document store is per index (per directory for local stores); the
+    default index keeps DOC_STORE_DB.
+    """
+
+    def __init__(self, index_name=INDEX_NAME, local=LOCAL_MEMORY, store_path=VECTOR_STORE_DIR,
+                 api_key=None, host=None, embedding_backend=None, doc_store=None,
+                 query_workers=QUERY_WORKERS):
+        self.index_name = index_name
+        self.local = local
+        self.store_path = store_path
+        self.api_key = api_key or PINECONE_API_KEY
+        self.host = host
+        self.query_workers = query_workers
+        self._backend = embedding_backend
+        self._doc_store = doc_store
+
+        self._lock = threading.RLock()
+        self._pc = None
+        self._index = None
+        self._pool = None
+
+        self._ns_lock = threading.Lock()
+        self._ns_names = set()
+        self._ns_at = 0.0
+
+    # ---------------------------------------------
+    # Configuration
+    # ---------------------------------------------
+    @property
+    def enabled(self):
+        return self.local or bool(self.api_key)
+
+    @property
+    def backend(self):
+        return self._backend or get_embedding_backend()
+
+    @property
+    def doc_store(self):
+        if self._doc_store is None:
+            self._doc_store = get_doc_store(self.doc_store_path())
+        return self._doc_store
+
+    def doc_store_path(self):
+        # The default index / store directory keeps the file its texts already live in
+        if self.local:
+            if os.path.abspath(self.store_path) == os.path.abspath(VECTOR_STORE_DIR):
+                return DOC_STORE_DB
+            return os.path.join(self.store_path, "documents.sqlite")
+        if self.index_name == INDEX_NAME:
+            return DOC_STORE_DB
+        root, ext = os.path.splitext(DOC_STORE_DB)
+        return f"{root}-{self.index_name}{ext}"
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def connected(self):
+        return self._index is not None
+
+    def _embeddings_ready(self):
+        return self._backend is not None or embeddings_enabled()
+
+    # ---------------------------------------------
+    # Connection
+    # ---------------------------------------------
+    def connect(self, force=False):
+        """
+        Open the index (once; force=True reconnects). Returns the handle, or
+        None if memory is disabled or the connection failed.
+        """
+        with self._lock:
+            if self._index is not None and not force:
+                return self._index
+
+            if self.local:
+                handle = self._open_local_store()
+            elif not self.api_key:
+                print("❌ Memory disabled by admin (Sudheer). Pinecone API key missing.")
+                handle = None
+            else:
+                handle = self._connect_pinecone()
+
+            if handle is not None:
+                self._index = handle
+            return handle
+
+    def _connect_pinecone(self):
+        print("🔧 Initializing Pinecone memory...")
+
+        try:
+            client = create_client(api_key=self.api_key, host=self.host)
+        except Exception as e:
+            print(f"❌ Pinecone initialization failed: {e}")
+            return None
+
+        # Cannot generate embedding if GPT is disabled (and no local backend)
+        if not self._embeddings_ready():
+            print("❌ GPT disabled by admin (Sudheer). Cannot compute embedding dimensions.")
+            return None
+
+        backend = self.backend
+
+        try:
+            dimension = backend.dimension
+        except Exception as e:
+            print(f"❌ Embedding backend error ({backend.name}): {e}")
+            return None
+
+        print(f"📐 Embedding backend: {backend.name} ({dimension} dims)")
+
+        try:
+            ensure_index(self.index_name, dimension, client=client)
+            handle = client.Index(self.index_name)
+            self._pc = client
+            print(f"✅ Connected to Pinecone index: {self.index_name}")
+            return handle
+        except Exception as e:
+            print(f"❌ Failed to connect to index: {e}")
+            return None
+
+    def _open_local_store(self):
+        if not self._embeddings_ready():
+            print("❌ GPT disabled by admin (Sudheer). Cannot compute embedding dimensions.")
+            return None
+
+        backend = self.backend
+        try:
+            store = get_local_store(backend.dimension, path=self.store_path)
+            print(f"✅ Local vector store ready ({backend.name}, {store.dimension} dims).")
+            return store
+        except Exception as e:
+            print(f"❌ Failed to open local vector store: {e}")
+            return None
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._index = None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _call(self, endpoint, fn, **kwargs):
+        # The local store needs no rate limiting / retries
+        if self.local:
+            return fn(**kwargs)
+        return call_with_limits(endpoint, fn, **kwargs)
+
+    def _require_index(self):
+        index = self._index
+        if index is None:
+            raise RuntimeError("No active vector index; call connect() first.")
+        return index
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.query_workers,
+                                                thread_name_prefix="memory-query")
+            return self._pool
+
+    # ---------------------------------------------
+    # Embeddings
+    # ---------------------------------------------
+    def embed_text(self, text):
+        return embed_text(text, backend=self._backend)
+
+    def embed_texts(self, texts):
+        return embed_texts(texts, backend=self._backend)
+
+    # ---------------------------------------------
+    # Write
+    # ---------------------------------------------
+    def upsert_summary(self, title, url, summary, source="web", namespace=None):
+        """
+        Embed + store a summary (in the "web" namespace unless told otherwise).
+        Returns the embedding (even if the upsert itself failed) so callers
+        can reuse it locally, or None.
+        """
+        if not self.enabled:
+            print("❌ Cannot store memory. Pinecone disabled by admin (Sudheer).")
+            return
+
+        if not self._embeddings_ready():
+            print("❌ Cannot embed summary. GPT disabled by admin (Sudheer).")
+            return
+
+        index = self._index
+        if index is None:
+            print("❌ No active Pinecone index.")
+            return
+
+        vector = self.embed_text(summary or title)
+        if vector is None:
+            return None
+
+        # Only small filterable fields go in the vector; the text goes to doc_store
+        meta = {
+            "title": title,
+            "url": url,
+            "source": source,
+            "timestamp": int(time.time()),
+            "tokens": count_tokens(summary or title)
+        }
+
+        vid = str(uuid.uuid4())
+
+        try:
+            self.doc_store.put(vid, summary or title)
+        except Exception as e:
+            print(f"❌ Document store write failed: {e}")
+            return vector
+
+        namespace = namespace if namespace is not None else namespace_for(source)
+
+        with span("upsert", source=source, namespace=namespace) as sp:
+            try:
+                self._call("pinecone.upsert", index.upsert, vectors=[{
+                    "id": vid,
+                    "values": vector,
+                    "metadata": meta
+                }], namespace=namespace)
+                self._remember_namespace(namespace)
+                add_counter("vectors_upserted_total", 1, source=source)
+                print(f"🧠 Stored in {'local memory' if self.local else 'Pinecone'}: {title}")
+            except Exception as e:
+                print(f"❌ Upsert failed: {e}")
+                sp["attrs"]["failed"] = str(e)
+
+        return vector
+
+    def upsert_vectors(self, vectors, source="pdf", namespace=""):
+        """
+        Upsert pre-embedded [{"id", "values", "metadata"}] in one request.
+        Raises on failure so bulk callers can report it per file.
+        """
+        index = self._require_index()
+
+        with span("upsert", source=source, size=len(vectors), namespace=namespace):
+            self._call("pinecone.upsert", index.upsert, vectors=vectors, namespace=namespace)
+        self._remember_namespace(namespace)
+        add_counter("vectors_upserted_total", len(vectors), source=source)
+        return len(vectors)
+
+    def delete_vectors(self, ids, namespace=""):
+        """Delete vectors and their documents."""
+        if not ids:
+            return
+        index = self._require_index()
+
+        self._call("pinecone.delete", index.delete, ids=list(ids), namespace=namespace)
+        self.doc_store.delete(ids)
+
+    # ---------------------------------------------
+    # Index introspection (snapshots, admin tools)
+    # ---------------------------------------------
+    def describe(self):
+        index = self._require_index()
+        return self._call("pinecone.describe", index.describe_index_stats)
+
+    def list_ids(self, namespace=""):
+        """Pages (lists) of vector ids in a namespace."""
+        index = self._require_index()
+        for page in index.list(namespace=namespace):
+            yield list(page)
+
+    def fetch(self, ids, namespace=""):
+        index = self._require_index()
+        return self._call("pinecone.fetch", index.fetch, ids=list(ids), namespace=namespace)
+
+    # ---------------------------------------------
+    # Namespaces
+    # ---------------------------------------------
+    def _remember_namespace(self, namespace):
+        with self._ns_lock:
+            self._ns_names.add(namespace)
+
+    def list_namespaces(self, refresh=False):
+        """Namespaces in the index (from describe_index_stats, cached for a minute)."""
+        with self._ns_lock:
+            fresh = time.time() - self._ns_at < NAMESPACE_CACHE_TTL
+            if fresh and not refresh:
+                return sorted(self._ns_names)
+
+        names = {""}
+        if self._index is not None:
+            try:
+                stats = self.describe()
+                names = set(stats["namespaces"] or {}) or names
+            except Exception as e:
+                print(f"⚠️ Could not list namespaces: {e}")
+
+        with self._ns_lock:
+            self._ns_names |= names
+            self._ns_at = time.time()
+            return sorted(self._ns_names)
+
+    def resolve_namespaces(self, namespace=None):
+        """
+        None → every namespace; "<prefix>*" → every namespace with that
+        prefix; a name or a list of names/patterns → those namespaces.
+        """
+        if namespace is None:
+            return self.list_namespaces()
+
+        patterns = [namespace] if isinstance(namespace, str) else list(namespace)
+        if not any(p.endswith("*") for p in patterns):
+            return patterns
+
+        known = self.list_namespaces()
+        resolved = []
+        for p in patterns:
+            if p.endswith("*"):
+                resolved.extend(ns for ns in known if ns.startswith(p[:-1]))
+            else:
+                resolved.append(p)
+        return list(dict.fromkeys(resolved))
+
+    # ---------------------------------------------
+    # Query
+    # ---------------------------------------------
+    def query(self, question, top_k=5, vector=None, include_values=False, namespace=None, filter=None):
+        """
+        Query memory for the question. Pass `vector` when the question
+        embedding is already known to skip re-embedding it.
+        include_values=True also returns each match's vector as "values".
+
+        namespace: None (all), a name ("web", "pdf"), a prefix pattern
+        ("<prefix>*") or a list of those. filter: Pinecone metadata filter, e.g.
+        {"source": "Resume", "timestamp": {"$gte": 1735689600}} or pdf_filter(doc_id).
+        Several namespaces are queried in parallel and merged by score.
+        """
+        if not self.enabled:
+            print("❌ Memory disabled by admin (Sudheer). Cannot query memory.")
+            return []
+
+        if not self._embeddings_ready():
+            print("❌ Cannot generate query embeddings. GPT disabled by admin (Sudheer).")
+            return []
+
+        index = self._index
+        if index is None:
+            print("❌ No active Pinecone index.")
+            return []
+
+        if vector is None:
+            vector = self.embed_text(question)
+        if vector is None:
+            return []
+
+        namespaces = self.resolve_namespaces(namespace)
+        if not namespaces:
+            return []
+
+        if len(namespaces) == 1:
+            matches = self._query_namespace(index, namespaces[0], vector, top_k, include_values, filter)
+        else:
+            pool = self._get_pool()
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._query_namespace,
+                            index, ns, vector, top_k, include_values, filter)
+                for ns in namespaces
+            ]
+            matches = [m for f in futures for m in f.result()]
+
+        matches.sort(key=lambda m: m["score"], reverse=True)
+        return matches[:top_k]
+
+    def _query_namespace(self, index, namespace, vector, top_k, include_values, flt):
+        kwargs = {
+            "vector": vector,
+            "top_k": top_k,
+            "include_metadata": True,
+            "include_values": include_values,
+            "namespace": namespace
+        }
+        if flt:
+            kwargs["filter"] = flt
+
+        with span("query", top_k=top_k, namespace=namespace, filtered=bool(flt)) as sp:
+            try:
+                result = self._call("pinecone.query", index.query, **kwargs)
+            except Exception as e:
+                print(f"❌ Memory query error ({namespace or 'default'}): {e}")
+                sp["attrs"]["failed"] = str(e)
+                return []
+
+        matches = []
+        try:
+            for m in result["matches"]:
+                match = {
+                    "id": m["id"],
+                    "score": m["score"],
+                    "metadata": m["metadata"],
+                    "namespace": namespace
+                }
+                if include_values:
+                    match["values"] = m["values"]
+                matches.append(match)
+        except:
+            return []
+
+        return matches
+
+    # ---------------------------------------------
+    # Text for matches (document store)
+    # ---------------------------------------------
+    def fetch_texts(self, ids):
+        """{vector_id: text} in one bulk read; {} if the store is unavailable."""
+        try:
+            return self.doc_store.get_many(ids)
+        except Exception as e:
+            print(f"❌ Document store read failed: {e}")
+            return {}
+
+    def attach_texts(self, matches):
+        """
+        Fill match["metadata"]["summary"] from the document store for matches
+        that don't carry text (older vectors still have it in metadata).
+        """
+        missing = [m["id"] for m in matches if not m["metadata"].get("summary")]
+        if missing:
+            texts = self.fetch_texts(missing)
+            for m in matches:
+                if m["id"] in texts:
+                    m["metadata"]["summary"] = texts[m["id"]]
+        return matches
+
+    # ---------------------------------------------
+    # asyncio
+    # ---------------------------------------------
+    async def aquery(self, question, **kwargs):
+        return await asyncio.to_thread(self.query, question, **kwargs)
+
+    async def aupsert_vectors(self, vectors, **kwargs):
+        return await asyncio.to_thread(self.upsert_vectors, vectors, **kwargs)
+
+
+# ============================================================
+# PROCESS-WIDE CLIENTS
+# ============================================================
+_clients = {}
+_clients_lock = threading.Lock()
+_default_index_name = INDEX_NAME
+
+
+def get_memory_client(index_name=None):
+    """The shared client for an index (default: the one rag_memory connected)."""
+    with _clients_lock:
+        name = index_name or _default_index_name
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = MemoryClient(name)
+        return client
+
+
+def set_default_index(index_name):
+    """Make rag_memory's functions (and get_memory_client()) use another index."""
+    global _default_index_name
+    with _clients_lock:
+        _default_index_name = index_name
@@ -0,0 +1,354 @@
+# memory_snapshot.py (BULK SNAPSHOT EXPORT / IMPORT OF MEMORY)
+#
+# Usage:
+#   python memory_snapshot.py export snapshots/2025-06-01
+#   python memory_snapshot.py export snapshots/pdfs --namespace pdf
+#   python memory_snapshot.py import snapshots/2025-06-01 --workers 8
+#
+# Backup, migration (Pinecone ⇄ VECTOR_STORE=local) and warm starts without
+# re-embedding anything. A snapshot is a directory of chunks, one namespace
+# per chunk, at most --chunk-size vectors each:
+#   manifest.json         dimension, embedding backend, namespaces, chunk list
+#   chunk-00000.npy       float32 [rows, dimension] (NumPy .npy; np.load(mmap_mode="r"))
+#   chunk-00000.parquet   id, namespace, metadata (JSON), text   (pyarrow installed)
+#   chunk-00000.jsonl     the same rows as JSON lines            (otherwise)
+#
+# Export pages through index.list() / index.fetch() and the document store;
+# import streams one chunk at a time and upserts batches from a thread pool.
+
+import os
+import sys
+import ast
+import json
+import time
+import struct
+import argparse
+from array import array
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", "10000"))
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "100"))   # Pinecone upsert/fetch batch
+SNAPSHOT_WORKERS = int(os.getenv("SNAPSHOT_WORKERS", "4"))
+FORMAT_VERSION = 1
+
+try:
+    import pyarrow as _pa
+    import pyarrow.parquet as _pq
+except ImportError:  # optional dependency
+    _pa = _pq = None
+
+
+# ============================================================
+# .NPY (float32, C order) WITHOUT REQUIRING NUMPY
+# ============================================================
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def write_npy(path, rows, dimension):
+    """rows: iterable of float sequences → little-endian float32 .npy file."""
+    rows = list(rows)
+    header = repr({"descr": "<f4", "fortran_order": False, "shape": (len(rows), dimension)})
+    # magic(6) + version(2) + header length(2) + header + "\n", padded to 64 bytes
+    pad = 64 - (10 + len(header) + 1) % 64
+    header = (header + " " * pad + "\n").encode("latin-1")
+
+    with open(path, "wb") as f:
+        f.write(NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header)
+        for values in rows:
+            floats = array("f", values)
+            if sys.byteorder != "little":
+                floats.byteswap()
+            f.write(floats.tobytes())
+
+
+class NpyReader:
+    """Row-range reads from a float32 .npy written by write_npy (or np.save)."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        if self.file.read(6) != NPY_MAGIC:
+            raise ValueError(f"{path} is not a .npy file")
+
+        major = self.file.read(2)[0]
+        size_format = "<H" if major == 1 else "<I"
+        header_len = struct.unpack(size_format, self.file.read(struct.calcsize(size_format)))[0]
+        header = ast.literal_eval(self.file.read(header_len).decode("latin-1"))
+
+        if header["descr"] != "<f4" or header["fortran_order"]:
+            raise ValueError(f"{path}: expected little-endian float32 in C order, got {header}")
+
+        self.rows, self.dimension = header["shape"]
+        self.offset = self.file.tell()
+        self.row_size = 4 * self.dimension
+
+    def read(self, start, count):
+        self.file.seek(self.offset + start * self.row_size)
+        values = array("f")
+        values.frombytes(self.file.read(count * self.row_size))
+        if sys.byteorder != "little":
+            values.byteswap()
+        d = self.dimension
+        return [values[i * d:(i + 1) * d].tolist() for i in range(len(values) // d)]
+
+    def close(self):
+        self.file.close()
+
+
+# ============================================================
+# ROW TABLES (Parquet when pyarrow is installed)
+# ============================================================
+def write_table(base_path, rows):
+    """rows: [{"id", "namespace", "metadata", "text"}] → (file name, format)."""
+    if _pq is not None:
+        table = _pa.table({
+            "id": [r["id"] for r in rows],
+            "namespace": [r["namespace"] for r in rows],
+            "metadata": [json.dumps(r["metadata"], ensure_ascii=False) for r in rows],
+            "text": [r["text"] for r in rows],
+        })
+        path = base_path + ".parquet"
+        _pq.write_table(table, path, compression="zstd")
+        return os.path.basename(path), "parquet"
+
+    path = base_path + ".jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return os.path.basename(path), "jsonl"
+
+
+def read_table(path, table_format):
+    if table_format == "parquet":
+        if _pq is None:
+            raise RuntimeError("Snapshot tables are Parquet; install pyarrow to import it.")
+        table = _pq.read_table(path).to_pydict()
+        return [
+            {"id": i, "namespace": ns, "metadata": json.loads(meta), "text": text}
+            for i, ns, meta, text in zip(table["id"], table["namespace"], table["metadata"], table["text"])
+        ]
+
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+def _field(obj, name, default=None):
+    # Pinecone returns response objects, the local store plain dicts
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _connect():
+    from rag_memory import ensure_connected, get_memory_client, MEMORY_ENABLED
+
+    if not MEMORY_ENABLED:
+        print("❌ Memory disabled (no Pinecone key and VECTOR_STORE is not local).")
+        return None
+    if ensure_connected() is None:
+        print("❌ Could not connect to the vector index.")
+        return None
+    return get_memory_client()
+
+
+def export_snapshot(out_dir, namespace=None, chunk_size=SNAPSHOT_CHUNK_SIZE,
+                    batch_size=SNAPSHOT_BATCH_SIZE, include_texts=True):
+    client = _connect()
+    if client is None:
+        return None
+
+    os.makedirs(out_dir, exist_ok=True)
+    client.list_namespaces(refresh=True)
+    namespaces = client.resolve_namespaces(namespace)
+    dimension = client.describe()["dimension"]
+    doc_store = client.doc_store
+
+    chunks = []
+    total = 0
+    started = time.time()
+
+    def flush(ns, rows, vectors):
+        base = os.path.join(out_dir, f"chunk-{len(chunks):05d}")
+        if include_texts:
+            texts = doc_store.get_many([r["id"] for r in rows])
+            for r in rows:
+                r["text"] = texts.get(r["id"])
+        write_npy(base + ".npy", vectors, dimension)
+        table, table_format = write_table(base, rows)
+        chunks.append({"vectors": os.path.basename(base) + ".npy", "table": table,
+                       "format": table_format, "namespace": ns, "rows": len(rows)})
+        print(f"💾 {table} ({len(rows)} vectors, namespace '{ns}')")
+
+    for ns in namespaces:
+        rows, vectors = [], []
+        for page in client.list_ids(namespace=ns):
+            for start in range(0, len(page), batch_size):
+                ids = page[start:start + batch_size]
+                fetched = client.fetch(ids, namespace=ns)
+                found = _field(fetched, "vectors") or {}
+
+                for vid in ids:
+                    item = found.get(vid)
+                    if item is None:
+                        continue  # deleted between list() and fetch()
+                    rows.append({"id": vid, "namespace": ns,
+                                 "metadata": dict(_field(item, "metadata") or {}), "text": None})
+                    vectors.append(list(_field(item, "values")))
+
+                    if len(rows) >= chunk_size:
+                        total += len(rows)
+                        flush(ns, rows, vectors)
+                        rows, vectors = [], []
+
+        if rows:
+            total += len(rows)
+            flush(ns, rows, vectors)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "dimension": dimension,
+        "embedding_backend": client.backend.name,
+        "vector_store": "local" if client.local else "pinecone",
+        "total_vectors": total,
+        "namespaces": namespaces,
+        "include_texts": include_texts,
+        "chunks": chunks,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    elapsed = time.time() - started
+    print(f"✅ Exported {total} vectors in {len(chunks)} chunks to {out_dir} "
+          f"({total / max(elapsed, 1e-9):.0f} vectors/s)")
+    return manifest
+
+
+# ============================================================
+# IMPORT
+# ============================================================
+def load_manifest(snapshot_dir):
+    with open(os.path.join(snapshot_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')}")
+    return manifest
+
+
+def import_snapshot(snapshot_dir, workers=SNAPSHOT_WORKERS, batch_size=SNAPSHOT_BATCH_SIZE,
+                    namespace=None, force=False):
+    """
+    Upsert every chunk of a snapshot into the active index (and its texts
+    into the document store). namespace= puts everything in one namespace
+    instead of the exported ones.
+    """
+    manifest = load_manifest(snapshot_dir)
+    client = _connect()
+    if client is None:
+        return None
+
+    dimension = client.describe()["dimension"]
+    if dimension != manifest["dimension"]:
+        raise ValueError(f"Snapshot has {manifest['dimension']}-dim vectors, the index {dimension}.")
+
+    backend = client.backend.name
+    if backend != manifest["embedding_backend"] and not force:
+        raise ValueError(f"Snapshot was embedded with {manifest['embedding_backend']}, the current backend "
+                         f"is {backend}; queries would not match. Pass force=True to import anyway.")
+
+    doc_store = client.doc_store
+    started = time.time()
+    upserted = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot-upsert") as executor:
+        in_flight = {}
+
+        def drain(limit):
+            nonlocal upserted
+            while len(in_flight) > limit:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ns, ids = in_flight.pop(future)
+                    try:
+                        upserted += future.result()
+                    except Exception as e:
+                        failed.append({"namespace": ns, "ids": ids, "error": str(e)})
+                        print(f"❌ Upsert of {len(ids)} vectors into '{ns}' failed: {e}")
+
+        for chunk in manifest["chunks"]:
+            rows = read_table(os.path.join(snapshot_dir, chunk["table"]), chunk["format"])
+            reader = NpyReader(os.path.join(snapshot_dir, chunk["vectors"]))
+            ns = chunk["namespace"] if namespace is None else namespace
+
+            try:
+                if manifest.get("include_texts"):
+                    doc_store.put_many([(r["id"], r["text"]) for r in rows if r["text"] is not None])
+
+                for start in range(0, len(rows), batch_size):
+                    batch_rows = rows[start:start + batch_size]
+                    values = reader.read(start, len(batch_rows))
+                    vectors = [{"id": r["id"], "values": v, "metadata": r["metadata"]}
+                               for r, v in zip(batch_rows, values)]
+
+                    # Bounded: at most 2 batches per worker waiting in memory
+                    drain(2 * workers - 1)
+                    future = executor.submit(client.upsert_vectors, vectors, source="snapshot", namespace=ns)
+                    in_flight[future] = (ns, [r["id"] for r in batch_rows])
+            finally:
+                reader.close()
+
+            elapsed = time.time() - started
+            print(f"📈 {chunk['table']}: {upserted} vectors upserted ({upserted / max(elapsed, 1e-9):.0f} vectors/s)")
+
+        drain(0)
+
+    elapsed = time.time() - started
+    print(f"✅ Imported {upserted}/{manifest['total_vectors']} vectors in {elapsed:.1f}s "
+          f"({len(failed)} failed batches)")
+    return {"upserted": upserted, "failed": failed, "seconds": round(elapsed, 3)}
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export / import memory snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Write the index + document texts to a snapshot directory")
+    exp.add_argument("out_dir")
+    exp.add_argument("--namespace", action="append", default=None,
+                     help="Namespace or prefix pattern like 'pdf*' (repeatable; default: all)")
+    exp.add_argument("--chunk-size", type=int, default=SNAPSHOT_CHUNK_SIZE)
+    exp.add_argument("--no-texts", action="store_true", help="Vectors and metadata only")
+
+    imp = sub.add_parser("import", help="Upsert a snapshot into the active index")
+    imp.add_argument("snapshot_dir")
+    imp.add_argument("--workers", type=int, default=SNAPSHOT_WORKERS)
+    imp.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE)
+    imp.add_argument("--namespace", default=None, help="Import everything into this namespace")
+    imp.add_argument("--force", action="store_true", help="Import despite an embedding backend mismatch")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        manifest = export_snapshot(args.out_dir, namespace=args.namespace, chunk_size=args.chunk_size,
+                                   include_texts=not args.no_texts)
+        return 0 if manifest is not None else 2
+
+    try:
+        result = import_snapshot(args.snapshot_dir, workers=args.workers, batch_size=args.batch_size,
+                                 namespace=args.namespace, force=args.force)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    if result is None:
+        return 2
+    return 0 if not result["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
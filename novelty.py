@@ -0,0 +1,126 @@
+# novelty.py (NOVELTY-DRIVEN STOPPING FOR RESEARCH RUNS)
+#
+# A fixed max_articles keeps fetching + summarizing when later sources only
+# repeat the earlier ones, and stops when they are still adding material.
+# Each new summary gets a marginal novelty score against what was already
+# collected:
+#   - embeddings, when both sides have a vector: 1 - max cosine similarity
+#   - term overlap otherwise: share of its content words not seen so far
+# NoveltyPolicy then decides after every article: stop early once coverage
+# saturates, keep going past max_articles while novelty stays high, and
+# always stop at the time / fetch budget.
+
+import os
+import re
+import time
+from operator import mul
+
+RESEARCH_STOPPING = os.getenv("RESEARCH_STOPPING", "novelty").lower()   # novelty | fixed
+NOVELTY_SATURATED = float(os.getenv("NOVELTY_SATURATED", "0.15"))
+NOVELTY_CONTINUE = float(os.getenv("NOVELTY_CONTINUE", "0.35"))
+NOVELTY_PATIENCE = int(os.getenv("NOVELTY_PATIENCE", "2"))
+NOVELTY_MIN_ARTICLES = int(os.getenv("NOVELTY_MIN_ARTICLES", "2"))
+NOVELTY_EXTRA_ARTICLES = int(os.getenv("NOVELTY_EXTRA_ARTICLES", "3"))
+RESEARCH_TIME_BUDGET = float(os.getenv("RESEARCH_TIME_BUDGET", "180"))   # seconds
+RESEARCH_MAX_FETCHES = int(os.getenv("RESEARCH_MAX_FETCHES", "12"))
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9\-]+")
+_STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has his how its may new now
+    own see two who did get him let put say she too use that with have this will your from they
+    been more when what were also into than them then some such only other which their there
+    these those about would could should after before while where being over under between
+""".split())
+
+
+def content_terms(text):
+    return {w for w in _WORD_RE.findall(str(text).lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def _cosine(a, b):
+    dot = sum(map(mul, a, b))
+    na = sum(map(mul, a, a)) ** 0.5
+    nb = sum(map(mul, b, b)) ** 0.5
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def summary_novelty(summary, vector, collected):
+    """
+    1.0 = nothing like it collected yet, 0.0 = fully covered.
+    `collected` are ResearchAgent.collected_summaries items.
+    """
+    if not collected:
+        return 1.0
+
+    vectors = [c["vector"] for c in collected if c.get("vector")]
+    if vector and len(vectors) == len(collected):
+        return max(0.0, 1.0 - max(_cosine(vector, v) for v in vectors))
+
+    terms = content_terms(summary)
+    if not terms:
+        return 0.0
+    seen = set()
+    for c in collected:
+        seen |= content_terms(c["summary"])
+    return len(terms - seen) / len(terms)
+
+
+class NoveltyPolicy:
+    """
+    Stopping decisions for one research run (kept across search expansions).
+    stop_reason() returns None to continue, or why to stop. With
+    mode="fixed" the caller keeps its plain max_articles loop.
+    """
+
+    def __init__(self, mode=RESEARCH_STOPPING, saturated=NOVELTY_SATURATED,
+                 keep_going=NOVELTY_CONTINUE, patience=NOVELTY_PATIENCE,
+                 min_articles=NOVELTY_MIN_ARTICLES, extra_articles=NOVELTY_EXTRA_ARTICLES,
+                 time_budget=RESEARCH_TIME_BUDGET, max_fetches=RESEARCH_MAX_FETCHES):
+        self.mode = mode
+        self.saturated = saturated
+        self.keep_going = keep_going
+        self.patience = patience
+        self.min_articles = min_articles
+        self.extra_articles = extra_articles
+        self.time_budget = time_budget
+        self.max_fetches = max_fetches
+        self.started = time.monotonic()
+        self.fetches = 0
+        self.scores = []   # novelty per summarized page; 0.0 for duplicates
+
+    @property
+    def adaptive(self):
+        return self.mode == "novelty"
+
+    def record_fetch(self, novelty=None):
+        """novelty=None for pages that failed / had no text: cost, not redundancy."""
+        self.fetches += 1
+        if novelty is not None:
+            self.scores.append(novelty)
+
+    def out_of_budget(self):
+        if not self.adaptive:
+            return None
+        if self.fetches >= self.max_fetches:
+            return "fetch_budget"
+        if time.monotonic() - self.started >= self.time_budget:
+            return "time_budget"
+        return None
+
+    def stop_reason(self, count, max_articles):
+        budget = self.out_of_budget()
+        if budget:
+            return budget
+
+        recent = self.scores[-self.patience:]
+        if (count >= self.min_articles and len(recent) == self.patience
+                and max(recent) < self.saturated):
+            return "saturated"
+
+        if count >= max_articles:
+            if count >= max_articles + self.extra_articles:
+                return "max_articles"
+            if not self.scores or self.scores[-1] < self.keep_going:
+                return "max_articles"
+
+        return None
@@ -3,12 +3,13 @@
 import uuid
 import time
 import os
+import hashlib
 from pdf_to_text import pdf_to_text
 
 # -------------------------------
 # STATUS FLAGS
 # -------------------------------
-PINECONE_ENABLED = False   # Admin Disabled by Sudheer
+PINECONE_ENABLED = os.getenv("PDF_INGEST_ENABLED", "0") == "1"   # Admin Disabled by Sudheer (opt in with PDF_INGEST_ENABLED=1)
 GPT_ENABLED = False        # Admin Disabled by Sudheer
 
 
@@ -55,10 +56,13 @@ def split_text_into_chunks(text, chunk_size=800):
 # --------------------------------------------------------
 # SAFE MODE: Ingest PDF (NO Pinecone)
 # --------------------------------------------------------
-def ingest_pdf(pdf_path: str, source_name="PDF"):
+def ingest_pdf(pdf_path: str, source_name="PDF", text=None, doc_id=None):
     """
     In normal mode → PDF is chunked, embedded, uploaded to Pinecone.
     In SAFE MODE → function does nothing except notify user.
+    Pass `text` when the PDF was already extracted (e.g. from upload_cache).
+    Chunks go to the shared "pdf" namespace tagged with doc_id (default: a
+    hash of the text), so pdf_filter(doc_id) selects this document.
     """
 
     print(f"📄 Attempting to ingest PDF: {pdf_path}...")
@@ -70,10 +74,10 @@ def ingest_pdf(pdf_path: str, source_name="PDF"):
         return
 
     # If Pinecone ON — run normal ingestion (you can restore later)
-    from rag_memory import init_and_connect, embed_text
-    from pinecone_init import INDEX_NAME
+    from rag_memory import ensure_connected, namespace_for
 
-    text = extract_pdf_text(pdf_path)
+    if text is None:
+        text = extract_pdf_text(pdf_path)
     if not text.strip():
         print("❌ PDF appears empty or unreadable.")
         return
@@ -82,24 +86,64 @@ def ingest_pdf(pdf_path: str, source_name="PDF"):
     chunks = split_text_into_chunks(text)
     print(f"📦 Total chunks: {len(chunks)}")
 
-    pc = init_and_connect()
-    index = pc.Index(INDEX_NAME)
+    index = ensure_connected()
+    if index is None:
+        print("❌ No active Pinecone index.")
+        return
 
-    for i, chunk in enumerate(chunks):
-        print(f"🧩 Embedding chunk {i+1}/{len(chunks)}...")
-        vector = embed_text(chunk)
+    print(f"🧩 Embedding {len(chunks)} chunks...")
+    doc_id = doc_id or hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    stored = store_chunks(chunks, source_name, id_prefix=doc_id, namespace=namespace_for("pdf"),
+                          extra_metadata={"doc_id": doc_id})
 
-        metadata = {
-            "title": f"{source_name} - chunk {i+1}",
-            "summary": chunk,
-            "source": source_name,
-            "timestamp": int(time.time())
-        }
+    if stored < len(chunks):
+        print(f"⚠️ Skipped {len(chunks) - stored} chunks: embedding failed.")
+    print("✅ PDF ingestion complete! Memory added to Pinecone.")
 
-        index.upsert([{
-            "id": str(uuid.uuid4()),
-            "values": vector,
-            "metadata": metadata
-        }])
 
-    print("✅ PDF ingestion complete! Memory added to Pinecone.")
+# --------------------------------------------------------
+# Embed + store chunks (shared with bulk_ingest.py)
+# --------------------------------------------------------
+def store_chunks(chunks, source_name="PDF", id_prefix=None, extra_metadata=None, batch_size=100,
+                 namespace=""):
+    """
+    Embed chunks in batches, write their text to the document store and
+    upsert the vectors. With id_prefix, vector IDs are "<prefix>-<n>", so
+    re-ingesting the same document overwrites instead of duplicating.
+    Returns the number of chunks stored; raises if an upsert fails.
+    """
+    from rag_memory import embed_texts, get_memory_client
+    from context_builder import count_tokens
+
+    client = get_memory_client()
+    stored = 0
+
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        vectors = embed_texts(batch)
+
+        items = []
+        docs = []
+        for i, (chunk, vector) in enumerate(zip(batch, vectors), start=start):
+            if vector is None:
+                continue
+
+            # Chunk text goes to the document store; the vector keeps small fields
+            vid = f"{id_prefix}-{i}" if id_prefix else str(uuid.uuid4())
+            metadata = {
+                "title": f"{source_name} - chunk {i+1}",
+                "source": source_name,
+                "timestamp": int(time.time()),
+                "tokens": count_tokens(chunk)
+            }
+            metadata.update(extra_metadata or {})
+
+            docs.append((vid, chunk))
+            items.append({"id": vid, "values": vector, "metadata": metadata})
+
+        if items:
+            client.doc_store.put_many(docs)
+            client.upsert_vectors(items, source="pdf", namespace=namespace)
+            stored += len(items)
+
+    return stored
@@ -2,16 +2,21 @@
 
 from pypdf import PdfReader
 
-def pdf_to_text(pdf_path: str) -> str:
+def pdf_to_pages(pdf_path: str) -> list:
     """
-    Extract text from a PDF file and return as one string.
+    Extract text from a PDF file, one string per page (empty pages → "").
     """
     reader = PdfReader(pdf_path)
-    text = ""
+    pages = []
 
     for page in reader.pages:
-        content = page.extract_text()
-        if content:
-            text += content + "\n"
+        pages.append(page.extract_text() or "")
+
+    return pages
+
 
-    return text
+def pdf_to_text(pdf_path: str) -> str:
+    """
+    Extract text from a PDF file and return as one string.
+    """
+    return "".join(content + "\n" for content in pdf_to_pages(pdf_path) if content)
@@ -1,51 +1,75 @@
 # pinecone_init.py
 
 import os
-from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
 
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = os.getenv("PINECONE_ENV")  # us-east-1 for you
-INDEX_NAME = "research-memory"
+PINECONE_HOST = os.getenv("PINECONE_HOST")  # optional: local Pinecone-compatible server
+INDEX_NAME = os.getenv("INDEX_NAME", "research-memory")
 
-pc = None  # global pinecone client
+pc = None  # global pinecone client (legacy; MemoryClient owns its own)
 
 
-def init_pinecone():
-    global pc
-    if not PINECONE_API_KEY:
+def create_client(api_key=None, host=None):
+    """A new Pinecone client (own HTTP connection pool); no globals touched."""
+    api_key = api_key or PINECONE_API_KEY
+    if not api_key:
         raise ValueError("PINECONE_API_KEY is missing")
 
-    pc = Pinecone(api_key=PINECONE_API_KEY)
+    from pinecone import Pinecone  # heavy SDK, imported on first connect
+
+    host = host or PINECONE_HOST
+    if host:
+        client = Pinecone(api_key=api_key, host=host)
+    else:
+        client = Pinecone(api_key=api_key)
     print(" Pinecone client created successfully.")
+    return client
+
 
+def init_pinecone():
+    global pc
+    pc = create_client()
     return pc
 
 
-def ensure_index(index_name: str, dimension: int):
+def ensure_index(index_name: str, dimension: int, client=None):
     """
     For the new Pinecone Serverless, we must create index manually with:
     - cloud
     - region
     - dimension
+    An existing index must have the embedding backend's dimension.
     """
 
-    global pc
-    if pc is None:
+    client = client or pc
+    if client is None:
         raise ValueError("Pinecone client not initialized")
 
-    existing = pc.list_indexes().names()
+    existing = client.list_indexes().names()
 
     if index_name in existing:
+        description = client.describe_index(index_name)
+        index_dimension = (description["dimension"] if isinstance(description, dict)
+                           else description.dimension)
+        if index_dimension != dimension:
+            raise ValueError(
+                f"Index '{index_name}' holds {index_dimension}-dim vectors but the embedding backend "
+                f"produces {dimension}; set INDEX_NAME to a per-backend index "
+                f"(e.g. '{index_name}-{dimension}') or switch back to the matching backend."
+            )
         print(f"Index '{index_name}' already exists.")
         return
 
     # Create new index
     print(f"Creating index: {index_name}")
 
-    pc.create_index(
+    from pinecone import ServerlessSpec
+
+    client.create_index(
         name=index_name,
         dimension=dimension,
         metric="cosine",
@@ -1,186 +1,93 @@
 # rag_memory.py (SAFE MODE UPDATE — NO API CRASHES)
-
-import os
-import uuid
-import time
-from dotenv import load_dotenv
-from openai import OpenAI
-from pinecone import Pinecone
-from pinecone_init import init_pinecone, ensure_index, INDEX_NAME
-
-load_dotenv()
-
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-
-EMBED_MODEL = "text-embedding-3-small"
-
-# Safe flags
-OPENAI_ENABLED = bool(OPENAI_API_KEY)
-PINECONE_ENABLED = bool(PINECONE_API_KEY)
-
-pc = None
-index = None
+#
+# Function-level API kept for existing callers. Everything delegates to the
+# process-wide default MemoryClient (memory_client.py), which owns the index
+# handle; `rag_memory.index` / `rag_memory.pc` still read the current handles.
+
+from memory_client import (
+    MemoryClient, get_memory_client, set_default_index,
+    embed_text, embed_texts, namespace_for, pdf_filter,
+    OPENAI_API_KEY, PINECONE_API_KEY, VECTOR_STORE, LOCAL_MEMORY,
+    OPENAI_ENABLED, PINECONE_ENABLED, MEMORY_ENABLED,
+    WEB_NAMESPACE, PDF_NAMESPACE, NAMESPACE_CACHE_TTL,
+)
+from embeddings import EMBED_MODEL
+from pinecone_init import INDEX_NAME
+
+
+def __getattr__(name):
+    # Former module globals, now owned by the default client
+    if name == "index":
+        return get_memory_client().index
+    if name == "pc":
+        return get_memory_client()._pc
+    raise AttributeError(f"module 'rag_memory' has no attribute '{name}'")
 
 
 # ----------------------------------------------
 # SAFE INIT: Prevent crashes when Pinecone is OFF
 # ----------------------------------------------
-def init_and_connect(index_name=INDEX_NAME):
+def init_and_connect(index_name=None):
+    """
+    (Re)connect to the index (or open the local store); default: the
+    default index used by the functions below (see set_default_index).
+    If memory is disabled → returns None.
+    """
+    return get_memory_client(index_name).connect(force=True)
+
+
+def ensure_connected(index_name=None):
     """
-    Initialize Pinecone + connect to index.
-    If Pinecone is disabled → returns None.
+    Connect once per process: every session / agent shares the same
+    client and index handle. Retries on later calls if it failed.
     """
+    return get_memory_client(index_name).connect()
 
-    global pc, index
 
-    if not PINECONE_ENABLED:
-        print("❌ Memory disabled by admin (Sudheer). Pinecone API key missing.")
-        return None
+# ----------------------------------------------
+# LOCAL SIMILARITY (same metric as the Pinecone index)
+# ----------------------------------------------
+def cosine_similarity(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
 
-    print("🔧 Initializing Pinecone memory...")
 
-    try:
-        pc = init_pinecone()  # safe
-    except Exception as e:
-        print(f"❌ Pinecone initialization failed: {e}")
-        return None
+# ----------------------------------------------
+# MEMORY OPERATIONS (default client)
+# ----------------------------------------------
+def upsert_summary(title: str, url: str, summary: str, source="web", namespace=None):
+    return get_memory_client().upsert_summary(title, url, summary, source=source, namespace=namespace)
 
-    # Cannot generate embedding if GPT is disabled
-    if not OPENAI_ENABLED:
-        print("❌ GPT disabled by admin (Sudheer). Cannot compute embedding dimensions.")
-        return None
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def upsert_vectors(vectors, source="pdf", namespace=""):
+    return get_memory_client().upsert_vectors(vectors, source=source, namespace=namespace)
 
-    try:
-        emb = client.embeddings.create(
-            model=EMBED_MODEL,
-            input="dimension test"
-        )
-    except Exception as e:
-        print(f"❌ GPT embedding error: {e}")
-        return None
 
-    dimension = len(emb.data[0].embedding)
+def delete_vectors(ids, namespace=""):
+    return get_memory_client().delete_vectors(ids, namespace=namespace)
 
-    try:
-        ensure_index(index_name, dimension)
-        index = pc.Index(index_name)
-        print(f"✅ Connected to Pinecone index: {index_name}")
-        return index
-    except Exception as e:
-        print(f"❌ Failed to connect to index: {e}")
-        return None
 
+def list_namespaces(refresh=False):
+    return get_memory_client().list_namespaces(refresh=refresh)
 
-# ----------------------------------------------
-# SAFE EMBEDDING FUNCTION
-# ----------------------------------------------
-def embed_text(text: str):
-    """Generate embeddings safely."""
 
-    if not OPENAI_ENABLED:
-        print("❌ GPT disabled by admin (Sudheer). Cannot generate embeddings.")
-        return None
+def resolve_namespaces(namespace=None):
+    return get_memory_client().resolve_namespaces(namespace)
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
 
-    try:
-        emb = client.embeddings.create(
-            model=EMBED_MODEL,
-            input=text
-        )
-        return emb.data[0].embedding
-    except Exception as e:
-        print(f"❌ Embedding error: {e}")
-        return None
+def query_memory(question: str, top_k: int = 5, vector=None, include_values=False,
+                 namespace=None, filter=None):
+    return get_memory_client().query(question, top_k=top_k, vector=vector, include_values=include_values,
+                                     namespace=namespace, filter=filter)
 
 
-# ----------------------------------------------
-# UPSERT (store memory) with safety
-# ----------------------------------------------
-def upsert_summary(title: str, url: str, summary: str, source="web"):
-    global index
-
-    if not PINECONE_ENABLED:
-        print("❌ Cannot store memory. Pinecone disabled by admin (Sudheer).")
-        return
-
-    if not OPENAI_ENABLED:
-        print("❌ Cannot embed summary. GPT disabled by admin (Sudheer).")
-        return
-
-    if index is None:
-        print("❌ No active Pinecone index.")
-        return
-
-    vector = embed_text(summary or title)
-    if vector is None:
-        return
-
-    meta = {
-        "title": title,
-        "url": url,
-        "summary": summary,
-        "source": source,
-        "timestamp": int(time.time())
-    }
-
-    vid = str(uuid.uuid4())
-
-    try:
-        index.upsert(vectors=[{
-            "id": vid,
-            "values": vector,
-            "metadata": meta
-        }])
-        print(f"🧠 Stored in Pinecone: {title}")
-    except Exception as e:
-        print(f"❌ Upsert failed: {e}")
+def fetch_texts(ids):
+    return get_memory_client().fetch_texts(ids)
 
 
-# ----------------------------------------------
-# QUERY MEMORY (RAG) with Safety
-# ----------------------------------------------
-def query_memory(question: str, top_k: int = 5):
-    global index
-
-    if not PINECONE_ENABLED:
-        print("❌ Memory disabled by admin (Sudheer). Cannot query memory.")
-        return []
-
-    if not OPENAI_ENABLED:
-        print("❌ Cannot generate query embeddings. GPT disabled by admin (Sudheer).")
-        return []
-
-    if index is None:
-        print("❌ No active Pinecone index.")
-        return []
-
-    vector = embed_text(question)
-    if vector is None:
-        return []
-
-    try:
-        result = index.query(
-            vector=vector,
-            top_k=top_k,
-            include_metadata=True
-        )
-    except Exception as e:
-        print(f"❌ Memory query error: {e}")
-        return []
-
-    matches = []
-    try:
-        for m in result["matches"]:
-            matches.append({
-                "id": m["id"],
-                "score": m["score"],
-                "metadata": m["metadata"]
-            })
-    except:
-        return []
-
-    return matches
+def attach_texts(matches):
+    return get_memory_client().attach_texts(matches)
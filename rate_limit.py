@@ -0,0 +1,444 @@
+# rate_limit.py (SHARED RATE LIMITING + RETRIES FOR OPENAI / PINECONE)
+#
+#   emb = call_with_limits("openai.embeddings", client.embeddings.create,
+#                          model=EMBED_MODEL, input=text)
+#
+# Per endpoint:
+#   - token bucket      → steady request rate (RATE_LIMIT_<ENDPOINT> req/s)
+#   - AIMD concurrency  → +1 slot per healthy window, halve on 429, shrink on slow calls
+#   - jittered retries  → 429 / 5xx / timeouts / connection errors
+#   - circuit breaker   → fail fast after repeated failures, probe after cooldown
+#   - budget            → max calls / tokens per process (BUDGET_<ENDPOINT>_CALLS / _TOKENS)
+#
+# Errors are still raised to the caller after the last attempt, so the
+# existing "print + return None" handling in rag_memory / summarizer stays.
+# Calls made with stream=True hold their concurrency slot (and are timed)
+# until the returned stream is exhausted or closed.
+
+import os
+import time
+import random
+import threading
+
+from tracing import add_counter
+
+DEFAULT_LIMITS = {
+    # endpoint: (requests per second, burst, max concurrency, target latency seconds)
+    "openai.embeddings": (50.0, 50, 16, 2.0),
+    "openai.chat": (10.0, 10, 8, 20.0),
+    "pinecone.upsert": (50.0, 50, 16, 2.0),
+    "pinecone.query": (50.0, 50, 16, 2.0),
+}
+
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+BASE_BACKOFF = float(os.getenv("RATE_LIMIT_BASE_BACKOFF", "0.5"))
+MAX_BACKOFF = float(os.getenv("RATE_LIMIT_MAX_BACKOFF", "20"))
+BREAKER_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "30"))
+
+# 4xx answers that only say the request itself was bad: the backend is
+# healthy. Other 4xx (401/403 auth, ...) leave the breaker as it is.
+CLIENT_ERROR_STATUSES = {400, 404, 422}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class BudgetExceededError(RuntimeError):
+    pass
+
+
+def _env_key(endpoint):
+    return endpoint.upper().replace(".", "_")
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# ============================================================
+# TOKEN BUCKET
+# ============================================================
+class TokenBucket:
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if now >= self.paused_until and self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait = max(self.paused_until - now, (tokens - self.tokens) / self.rate)
+
+            time.sleep(min(wait, 1.0))
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` (e.g. honour Retry-After)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+# ============================================================
+# AIMD ADAPTIVE CONCURRENCY
+# ============================================================
+class AdaptiveConcurrency:
+
+    def __init__(self, max_limit, target_latency, min_limit=1):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, max_limit // 2))
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait(timeout=1.0)
+            self.in_flight += 1
+
+    def release(self, latency=None, throttled=False):
+        with self.cond:
+            self.in_flight -= 1
+
+            if throttled:
+                # Multiplicative decrease on 429
+                self.limit = max(self.min_limit, self.limit * 0.5)
+            elif latency is not None and latency > self.target_latency:
+                # Gentler decrease when the backend is getting slow
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                # Additive increase: ~+1 slot per `limit` healthy calls
+                self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+
+            self.cond.notify_all()
+
+
+# ============================================================
+# CIRCUIT BREAKER
+# ============================================================
+class CircuitBreaker:
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown or self.probing:
+                raise CircuitOpenError("circuit open")
+            self.probing = True  # half-open: let exactly one probe through
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def release_probe(self):
+        """No verdict from this call: let the next one probe instead."""
+        with self.lock:
+            self.probing = False
+
+
+# ============================================================
+# BUDGET
+# ============================================================
+class Budget:
+
+    def __init__(self, max_calls=None, max_tokens=None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.calls = 0
+        self.tokens = 0
+        self.lock = threading.Lock()
+
+    def reserve_call(self):
+        with self.lock:
+            if self.max_calls is not None and self.calls >= self.max_calls:
+                raise BudgetExceededError(f"call budget of {self.max_calls} spent")
+            if self.max_tokens is not None and self.tokens >= self.max_tokens:
+                raise BudgetExceededError(f"token budget of {self.max_tokens} spent")
+            self.calls += 1
+
+    def refund_call(self):
+        with self.lock:
+            self.calls -= 1
+
+    def charge_tokens(self, tokens):
+        with self.lock:
+            self.tokens += tokens
+
+
+# ============================================================
+# PER-ENDPOINT LIMITER
+# ============================================================
+def _status_of(exc):
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def classify_error(exc):
+    """Return "throttled", "retryable" or "fatal"."""
+    status = _status_of(exc)
+    name = type(exc).__name__
+
+    if status == 429 or "RateLimit" in name:
+        return "throttled"
+    if status is not None and status >= 500:
+        return "retryable"
+    if any(word in name for word in ("Timeout", "Connection", "ServiceUnavailable")):
+        return "retryable"
+    return "fatal"
+
+
+class EndpointLimiter:
+
+    def __init__(self, name, rate, burst, max_concurrency, target_latency,
+                 max_calls=None, max_tokens=None):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, target_latency)
+        self.breaker = CircuitBreaker()
+        self.budget = Budget(max_calls, max_tokens)
+
+    def call(self, fn, *args, **kwargs):
+        last_error = None
+
+        for attempt in range(MAX_RETRIES + 1):
+            # Budget before the breaker: a refused call must not leave a half-open probe pending
+            self.budget.reserve_call()
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.budget.refund_call()
+                add_counter("rate_limit_events_total", 1, endpoint=self.name, event="circuit_open")
+                raise CircuitOpenError(f"{self.name}: circuit open after repeated failures") from last_error
+
+            try:
+                self.bucket.acquire()
+                self.concurrency.acquire()
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                self.concurrency.release(throttled=(kind == "throttled"))
+                last_error = e
+
+                if kind == "fatal":
+                    # Don't retry. A plain bad request means the backend is healthy;
+                    # anything else (auth, unknown errors) says nothing about it.
+                    if _status_of(e) in CLIENT_ERROR_STATUSES:
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.release_probe()
+                    raise
+
+                self.breaker.record_failure()
+                add_counter("rate_limit_events_total", 1, endpoint=self.name, event=kind)
+
+                if attempt == MAX_RETRIES:
+                    raise
+
+                # Full-jitter exponential backoff, at least Retry-After when given
+                delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * (2 ** attempt)))
+                retry_after = _retry_after(e)
+                if retry_after:
+                    delay = max(delay, retry_after)
+                    self.bucket.pause(retry_after)
+
+                print(f"🔁 {self.name}: {kind} ({e}); retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.concurrency.release()
+                self.breaker.release_probe()
+                raise
+
+            self.breaker.record_success()
+            if kwargs.get("stream"):
+                # The response is consumed after we return: keep the slot until it ends
+                return LimitedStream(self, result, started)
+
+            self.concurrency.release(latency=time.monotonic() - started)
+            self._charge_usage(result)
+            return result
+
+        raise last_error
+
+    def finish_stream(self, started, usage=None, error=None):
+        kind = classify_error(error) if error is not None else None
+        self.concurrency.release(latency=time.monotonic() - started, throttled=(kind == "throttled"))
+        if kind in ("throttled", "retryable"):
+            self.breaker.record_failure()
+            add_counter("rate_limit_events_total", 1, endpoint=self.name, event=f"stream_{kind}")
+
+        tokens = getattr(usage, "total_tokens", None)
+        if tokens:
+            self.budget.charge_tokens(tokens)
+
+    def _charge_usage(self, result):
+        usage = getattr(result, "usage", None)
+        tokens = getattr(usage, "total_tokens", None)
+        if tokens:
+            self.budget.charge_tokens(tokens)
+
+    def snapshot(self):
+        return {
+            "endpoint": self.name,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "circuit": self.breaker.state,
+            "calls": self.budget.calls,
+            "tokens": self.budget.tokens,
+        }
+
+
+class LimitedStream:
+    """
+    Iterator over a streaming response that gives the limiter its slot back
+    (with the full latency and the reported token usage) once the stream is
+    exhausted, fails or is closed.
+    """
+
+    def __init__(self, limiter, response, started):
+        self.limiter = limiter
+        self.response = response
+        self.chunks = iter(response)
+        self.started = started
+        self.usage = None
+        self.done = False
+        self.lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self._finish()
+            raise
+        except BaseException as e:
+            self._finish(error=e if isinstance(e, Exception) else None)
+            raise
+
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage = usage
+        return chunk
+
+    def close(self):
+        try:
+            close = getattr(self.response, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish()
+
+    def _finish(self, error=None):
+        with self.lock:
+            if self.done:
+                return
+            self.done = True
+        self.limiter.finish_stream(self.started, usage=self.usage, error=error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # Abandoned without close(): still hand the slot back
+        if not self.done:
+            self._finish()
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(endpoint):
+    with _registry_lock:
+        if endpoint not in _limiters:
+            rate, burst, max_conc, target = DEFAULT_LIMITS.get(endpoint, (20.0, 20, 8, 5.0))
+            key = _env_key(endpoint)
+
+            rate = _env_float(f"RATE_LIMIT_{key}", rate)
+            max_calls = os.getenv(f"BUDGET_{key}_CALLS")
+            max_tokens = os.getenv(f"BUDGET_{key}_TOKENS")
+
+            _limiters[endpoint] = EndpointLimiter(
+                endpoint, rate, max(burst, int(rate)), max_conc, target,
+                max_calls=int(max_calls) if max_calls else None,
+                max_tokens=int(max_tokens) if max_tokens else None
+            )
+        return _limiters[endpoint]
+
+
+def call_with_limits(endpoint, fn, *args, **kwargs):
+    return get_limiter(endpoint).call(fn, *args, **kwargs)
+
+
+def limits_report():
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return [l.snapshot() for l in limiters]
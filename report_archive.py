@@ -0,0 +1,288 @@
+# report_archive.py (COMPRESSED, SEARCHABLE ARCHIVE OF RESEARCH REPORTS)
+#
+# Every finished research run is archived here: the report and its source
+# summaries compressed (doc_store codecs), topic + content indexed with
+# SQLite FTS5. Before researching a topic again, callers ask for a recent
+# report on the same or a similar query:
+#
+#   prior = find_report("AI careers 2025")      # None if nothing fresh enough
+#   if prior:
+#       print(prior["match"], prior["age_hours"], prior["report"])
+#
+# Reports older than REPORT_RETENTION_DAYS (and beyond REPORT_ARCHIVE_MAX)
+# are evicted together with their txt/md/pdf files.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from doc_store import compress, decompress
+from novelty import content_terms
+
+REPORT_ARCHIVE_DB = os.getenv("REPORT_ARCHIVE_DB", os.path.join("reports", "archive.sqlite"))
+REPORT_REUSE = os.getenv("REPORT_REUSE", "1") == "1"
+REPORT_REUSE_HOURS = float(os.getenv("REPORT_REUSE_HOURS", "24"))
+REPORT_REUSE_SIMILARITY = float(os.getenv("REPORT_REUSE_SIMILARITY", "0.6"))
+REPORT_RETENTION_DAYS = float(os.getenv("REPORT_RETENTION_DAYS", "30"))
+REPORT_ARCHIVE_MAX = int(os.getenv("REPORT_ARCHIVE_MAX", "500"))
+
+FTS_CANDIDATES = 20
+
+
+def normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+
+def _match_any(terms):
+    # Terms are [a-z0-9-] only (content_terms); quoting keeps '-' literal
+    return " OR ".join(f'"{t}"' for t in sorted(terms))
+
+
+def query_similarity(a, b):
+    ta, tb = content_terms(a), content_terms(b)
+    if not ta or not tb:
+        return 1.0 if normalize_query(a) == normalize_query(b) else 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+# ============================================================
+# ARCHIVE
+# ============================================================
+class ReportArchive:
+    """
+    SQLite (WAL), one connection per thread per process like DocumentStore.
+    Without FTS5 in the local SQLite build, lookups fall back to exact
+    topic matches.
+    """
+
+    def __init__(self, path=REPORT_ARCHIVE_DB):
+        self.path = path
+        self.local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY,
+                query TEXT NOT NULL,
+                norm_query TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                codec TEXT NOT NULL,
+                body BLOB NOT NULL,
+                chars INTEGER NOT NULL,
+                sources INTEGER NOT NULL,
+                files TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS reports_norm_query ON reports (norm_query, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at)")
+
+        try:
+            # Contentless: the text is already stored (compressed) in reports
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts "
+                "USING fts5(topic, content, content='', tokenize='porter unicode61')"
+            )
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ SQLite FTS5 unavailable ({e}); report lookup is exact-match only.")
+            self.fts = False
+        conn.commit()
+
+    def _conn(self):
+        pid = os.getpid()
+        if getattr(self.local, "pid", None) != pid:
+            self.local.conn = sqlite3.connect(self.path, timeout=30)
+            self.local.conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.pid = pid
+        return self.local.conn
+
+    # ---------------------------------------------
+    # Write
+    # ---------------------------------------------
+    def add(self, query, report, summaries=(), files=None):
+        """Archive one report; `summaries` are collected_summaries items."""
+        payload = json.dumps({
+            "report": report,
+            "summaries": [
+                {"title": s.get("title"), "url": s.get("url"), "summary": str(s.get("summary"))}
+                for s in summaries
+            ]
+        }, ensure_ascii=False)
+        codec, body = compress(payload)
+
+        conn = self._conn()
+        cur = conn.execute(
+            "INSERT INTO reports (query, norm_query, created_at, codec, body, chars, sources, files) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (query, normalize_query(query), time.time(), codec, body, len(report),
+             len(summaries), json.dumps(files) if files else None)
+        )
+        report_id = cur.lastrowid
+        if self.fts:
+            conn.execute("INSERT INTO reports_fts (rowid, topic, content) VALUES (?, ?, ?)",
+                         (report_id, query, report))
+        conn.commit()
+        return report_id
+
+    # ---------------------------------------------
+    # Read
+    # ---------------------------------------------
+    def _load(self, row, match=None, similarity=None):
+        report_id, query, created_at, codec, body, sources, files = row
+        payload = json.loads(decompress(codec, body))
+        return {
+            "id": report_id,
+            "query": query,
+            "created_at": created_at,
+            "age_hours": round((time.time() - created_at) / 3600.0, 2),
+            "report": payload["report"],
+            "summaries": payload["summaries"],
+            "sources": sources,
+            "files": json.loads(files) if files else None,
+            "match": match,
+            "similarity": similarity,
+        }
+
+    def get(self, report_id):
+        row = self._conn().execute(
+            "SELECT id, query, created_at, codec, body, sources, files FROM reports WHERE id = ?",
+            (report_id,)
+        ).fetchone()
+        return self._load(row) if row else None
+
+    def find(self, query, max_age_hours=REPORT_REUSE_HOURS, min_similarity=REPORT_REUSE_SIMILARITY):
+        """
+        Newest report for the same query within max_age_hours, else the best
+        FTS hit on the topic whose query similarity reaches min_similarity.
+        Reports whose run collected no sources (e.g. the network was down)
+        are never reused.
+        """
+        conn = self._conn()
+        since = time.time() - max_age_hours * 3600.0
+
+        row = conn.execute(
+            "SELECT id, query, created_at, codec, body, sources, files FROM reports "
+            "WHERE norm_query = ? AND created_at >= ? AND sources > 0 ORDER BY created_at DESC LIMIT 1",
+            (normalize_query(query), since)
+        ).fetchone()
+        if row:
+            return self._load(row, match="exact", similarity=1.0)
+
+        terms = content_terms(query)
+        if not self.fts or not terms:
+            return None
+
+        candidates = conn.execute(
+            "SELECT r.id, r.query FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+            "WHERE reports_fts MATCH ? AND r.created_at >= ? AND r.sources > 0 "
+            "ORDER BY bm25(reports_fts) LIMIT ?",
+            ("topic : (" + _match_any(terms) + ")", since, FTS_CANDIDATES)
+        ).fetchall()
+
+        best = max(((query_similarity(query, q), i) for i, q in candidates), default=None)
+        if best is None or best[0] < min_similarity:
+            return None
+
+        report = self.get(best[1])
+        report.update(match="similar", similarity=round(best[0], 3))
+        return report
+
+    def search(self, text, limit=10):
+        """Full-text search over topics and report content, best first."""
+        terms = content_terms(text)
+        if not self.fts or not terms:
+            return []
+
+        rows = self._conn().execute(
+            "SELECT r.id, r.query, r.created_at, r.sources FROM reports_fts "
+            "JOIN reports r ON r.id = reports_fts.rowid "
+            "WHERE reports_fts MATCH ? ORDER BY bm25(reports_fts) LIMIT ?",
+            (_match_any(terms), limit)
+        ).fetchall()
+        return [{"id": i, "query": q, "created_at": c, "sources": s} for i, q, c, s in rows]
+
+    # ---------------------------------------------
+    # Retention
+    # ---------------------------------------------
+    def evict(self, retention_days=REPORT_RETENTION_DAYS, max_reports=REPORT_ARCHIVE_MAX,
+              remove_files=True):
+        """Drop reports past retention or beyond the newest max_reports."""
+        conn = self._conn()
+        cutoff = time.time() - retention_days * 86400.0
+
+        rows = conn.execute(
+            "SELECT id, query, codec, body, files FROM reports WHERE created_at < ? "
+            "UNION SELECT id, query, codec, body, files FROM reports WHERE id NOT IN "
+            "(SELECT id FROM reports ORDER BY created_at DESC LIMIT ?)",
+            (cutoff, max_reports)
+        ).fetchall()
+
+        for report_id, query, codec, body, files in rows:
+            if self.fts:
+                # Contentless FTS5 rows are deleted with their original values
+                report = json.loads(decompress(codec, body))["report"]
+                conn.execute(
+                    "INSERT INTO reports_fts (reports_fts, rowid, topic, content) VALUES ('delete', ?, ?, ?)",
+                    (report_id, query, report)
+                )
+            conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+
+            if remove_files and files:
+                for path in json.loads(files).values():
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+        conn.commit()
+        return len(rows)
+
+    def stats(self):
+        count, chars, stored = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(LENGTH(body)), 0) FROM reports"
+        ).fetchone()
+        return {"reports": count, "chars": chars, "stored_bytes": stored, "fts": self.fts}
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_report_archive():
+    global _archive
+
+    with _archive_lock:
+        if _archive is None:
+            _archive = ReportArchive()
+    return _archive
+
+
+# ============================================================
+# CONVENIENCE (never let the archive break a research run)
+# ============================================================
+def archive_report(query, report, summaries=(), files=None):
+    try:
+        archive = get_report_archive()
+        report_id = archive.add(query, report, summaries=summaries, files=files)
+        archive.evict()
+        return report_id
+    except Exception as e:
+        print(f"⚠️ Report archive write failed: {e}")
+        return None
+
+
+def find_report(query, max_age_hours=REPORT_REUSE_HOURS):
+    if not REPORT_REUSE:
+        return None
+    try:
+        return get_report_archive().find(query, max_age_hours=max_age_hours)
+    except Exception as e:
+        print(f"⚠️ Report archive lookup failed: {e}")
+        return None
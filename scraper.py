@@ -1,15 +1,20 @@
 # scraper.py
 
+import os
 import time
-import requests
-from bs4 import BeautifulSoup
 
-# Selenium imports (works locally but fails in Streamlit)
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+# requests / BeautifulSoup / Selenium are imported on first use:
+# they dominate import time and many callers never search the web.
+
+from tracing import span, add_counter
+from shared_cache import cache_get, cache_set
+
+# Overridable so benchmarks can point search at a local fake server
+DDG_HTML_URL = os.getenv("DDG_HTML_URL", "https://duckduckgo.com/html/")
+USE_SELENIUM = os.getenv("USE_SELENIUM", "1") == "1"
+
+# How long a cached page stays fresh (only used when shared_cache is on)
+FETCH_CACHE_TTL = int(os.getenv("FETCH_CACHE_TTL", str(24 * 3600)))
 
 
 # ---------------------------------------------------------
@@ -19,6 +24,14 @@ def selenium_duckduckgo_search(query):
     try:
         print("🟦 Trying Selenium search...")
 
+        # Selenium imports (works locally but fails in Streamlit)
+        from bs4 import BeautifulSoup
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
         driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
         driver.get("https://lite.duckduckgo.com/lite/")
 
@@ -59,7 +72,11 @@ def fallback_duckduckgo_search(query):
     try:
         print("🌐 Using fallback search (HTML)...")
 
-        r = requests.post("https://duckduckgo.com/html/", data={"q": query}, timeout=10)
+        import requests
+        from bs4 import BeautifulSoup
+
+        r = requests.post(DDG_HTML_URL, data={"q": query}, timeout=10)
+        add_counter("bytes_total", len(r.content), kind="search")
         soup = BeautifulSoup(r.text, "html.parser")
 
         results = []
@@ -82,14 +99,19 @@ def fallback_duckduckgo_search(query):
 # 3️⃣ MASTER SEARCH FUNCTION (Auto Switch)
 # ---------------------------------------------------------
 def duckduckgo_search(query):
-    # Try Selenium first
-    res = selenium_duckduckgo_search(query)
-    if res and len(res) > 0:
+    with span("search", query=query) as sp:
+        # Try Selenium first
+        if USE_SELENIUM:
+            res = selenium_duckduckgo_search(query)
+            if res and len(res) > 0:
+                sp["attrs"].update(backend="selenium", results=len(res))
+                return res
+
+        # Fallback for Streamlit cloud
+        res = fallback_duckduckgo_search(query)
+        sp["attrs"].update(backend="html", results=len(res))
         return res
 
-    # Fallback for Streamlit cloud
-    return fallback_duckduckgo_search(query)
-
 
 # ---------------------------------------------------------
 # FETCH PAGE CONTENT (used in agent.py)
@@ -97,18 +119,29 @@ def duckduckgo_search(query):
 def fetch_page_text(url):
     print(f"🌍 Fetching page: {url}")
 
-    try:
-        r = requests.get(url, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
+    cached = cache_get("fetch", url, max_age=FETCH_CACHE_TTL)
+    if cached is not None:
+        return cached
 
-        paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
+    with span("fetch", url=url) as sp:
+        try:
+            import requests
+            from bs4 import BeautifulSoup
 
-        if not paragraphs:
-            return ""
+            r = requests.get(url, timeout=10)
+            sp["attrs"].update(status=r.status_code, bytes=len(r.content))
+            add_counter("bytes_total", len(r.content), kind="fetch")
 
-        # Return first ~20 paragraphs (enough for summary)
-        return "\n".join(paragraphs[:20])
+            with span("parse"):
+                soup = BeautifulSoup(r.text, "html.parser")
+                paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
 
-    except Exception as e:
-        print("❌ Error fetching page:", e)
-        return ""
+            # Return first ~20 paragraphs (enough for summary)
+            text = "\n".join(paragraphs[:20])
+            cache_set("fetch", url, text)
+            return text
+
+        except Exception as e:
+            print("❌ Error fetching page:", e)
+            sp["attrs"]["failed"] = str(e)
+            return ""
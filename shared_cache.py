@@ -0,0 +1,130 @@
+# shared_cache.py (SQLITE CACHE SHARED ACROSS THREADS + PROCESSES)
+#
+# Used for page fetches, summaries and embeddings so that parallel
+# research workers (see batch_research.py) never pay twice for the same
+# URL / text. Disabled unless RESEARCH_CACHE_DB is set or
+# configure_shared_cache() is called.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from tracing import add_counter
+
+RESEARCH_CACHE_DB = os.getenv("RESEARCH_CACHE_DB")
+
+
+class SharedCache:
+    """
+    Tiny key/value store on SQLite (WAL mode), safe for concurrent use by
+    threads and by forked worker processes: each thread in each process
+    opens its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.commit()
+
+    def _conn(self):
+        # Connections must not cross a fork, so they are keyed by pid too
+        pid = os.getpid()
+        if getattr(self.local, "pid", None) != pid:
+            self.local.conn = sqlite3.connect(self.path, timeout=30)
+            self.local.conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.pid = pid
+        return self.local.conn
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, namespace, key, max_age=None):
+        row = self._conn().execute(
+            "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, self._hash(key))
+        ).fetchone()
+
+        if row is None:
+            return None
+        if max_age is not None and time.time() - row[1] > max_age:
+            return None
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+            (namespace, self._hash(key), json.dumps(value), time.time())
+        )
+        conn.commit()
+
+    def stats(self):
+        rows = self._conn().execute(
+            "SELECT namespace, COUNT(*) FROM cache GROUP BY namespace"
+        ).fetchall()
+        return dict(rows)
+
+
+# ============================================================
+# MODULE-LEVEL CACHE (no-op when not configured)
+# ============================================================
+_cache = None
+
+
+def configure_shared_cache(path):
+    """Enable (path) or disable (None) the shared cache for this process."""
+    global _cache
+    _cache = SharedCache(path) if path else None
+    return _cache
+
+
+def get_shared_cache():
+    return _cache
+
+
+def cache_get(namespace, key, max_age=None):
+    if _cache is None:
+        return None
+
+    try:
+        value = _cache.get(namespace, key, max_age=max_age)
+    except Exception as e:
+        print(f"⚠️ Cache read failed ({namespace}): {e}")
+        return None
+
+    add_counter("cache_requests_total", 1, cache=namespace, result="miss" if value is None else "hit")
+    return value
+
+
+def cache_set(namespace, key, value):
+    if _cache is None:
+        return
+
+    try:
+        _cache.set(namespace, key, value)
+    except Exception as e:
+        print(f"⚠️ Cache write failed ({namespace}): {e}")
+
+
+if RESEARCH_CACHE_DB:
+    configure_shared_cache(RESEARCH_CACHE_DB)
@@ -0,0 +1,259 @@
+# skill_extractor.py (MAP-REDUCE SKILL EXTRACTION FOR LARGE PDFS)
+#
+#   result = extract_skills(text, doc_hash=file_hash)
+#   st.markdown(result["markdown"])
+#
+# map:    the document is split into fixed-size token chunks and every chunk
+#         is sent to GPT concurrently (SKILL_WORKERS threads), asking for JSON
+# reduce: skills are merged locally — normalised, deduplicated, and each one
+#         kept in the category most chunks put it in
+# cache:  finished results per document hash (in-process LRU + shared cache),
+#         per-chunk results in the shared cache so a retried run only pays
+#         for the chunks that failed
+#
+# Chunks have a fixed size, so wall time grows with ceil(chunks / workers)
+# rather than with one ever-larger prompt.
+
+import os
+import re
+import json
+import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from context_builder import count_tokens
+from llm_client import get_openai_client
+from rate_limit import call_with_limits
+from shared_cache import cache_get, cache_set
+from tracing import span, add_counter, add_token_usage
+
+SKILL_MODEL = os.getenv("SKILL_MODEL", "gpt-4.1-mini")
+SKILL_CHUNK_TOKENS = int(os.getenv("SKILL_CHUNK_TOKENS", "1500"))
+SKILL_WORKERS = int(os.getenv("SKILL_WORKERS", "4"))
+SKILL_CACHE_SIZE = int(os.getenv("SKILL_CACHE_SIZE", "32"))
+
+CATEGORIES = [
+    ("technical", "Technical Skills"),
+    ("tools", "Tools & Frameworks"),
+    ("soft", "Soft Skills"),
+]
+
+MAP_PROMPT = """
+Extract the skills mentioned in this part of a document.
+Return only JSON of the form:
+{{"technical": [...], "tools": [...], "soft": [...]}}
+Use short names (1-4 words). Use empty lists if nothing applies.
+
+TEXT:
+{text}
+"""
+
+
+# ============================================================
+# CHUNKING
+# ============================================================
+def split_into_token_chunks(text, max_tokens=SKILL_CHUNK_TOKENS):
+    """Split on paragraph/sentence boundaries into chunks of <= max_tokens."""
+    pieces = [p.strip() for p in re.split(r"\n\s*\n|(?<=[.!?])\s+", text or "") if p.strip()]
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for piece in pieces:
+        tokens = count_tokens(piece)
+
+        if tokens > max_tokens:
+            # A single huge "sentence" (tables, lists without punctuation)
+            words = piece.split()
+            step = max(1, int(max_tokens * 0.75))
+            pieces_of_piece = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces_of_piece = [piece]
+
+        for part in pieces_of_piece:
+            part_tokens = tokens if part is piece else count_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+
+    if current:
+        chunks.append(" ".join(current))
+
+    return chunks
+
+
+# ============================================================
+# MAP
+# ============================================================
+def _parse_skills(content):
+    """Parse the model's JSON answer; tolerate code fences and stray text."""
+    match = re.search(r"\{.*\}", content or "", re.S)
+    if not match:
+        return {}
+
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+
+    return {
+        key: [str(s).strip() for s in data.get(key) or [] if str(s).strip()]
+        for key, _ in CATEGORIES
+    }
+
+
+def extract_chunk_skills(chunk, model=SKILL_MODEL):
+    cache_key = f"{model}:{hashlib.sha256(chunk.encode('utf-8')).hexdigest()}"
+    cached = cache_get("skills_chunk", cache_key)
+    if cached is not None:
+        return cached
+
+    with span("skills_map", model=model, tokens=count_tokens(chunk)):
+        response = call_with_limits(
+            "openai.chat", get_openai_client().chat.completions.create,
+            model=model,
+            messages=[{"role": "user", "content": MAP_PROMPT.format(text=chunk)}],
+            max_tokens=300,
+            temperature=0
+        )
+    add_token_usage(getattr(response, "usage", None), model, endpoint="skills")
+
+    skills = _parse_skills(response.choices[0].message.content)
+    cache_set("skills_chunk", cache_key, skills)
+    return skills
+
+
+# ============================================================
+# REDUCE
+# ============================================================
+def normalize_skill(name):
+    key = re.sub(r"[^\w+#./ ]+", " ", name.lower())
+    key = re.sub(r"\s+", " ", key).strip(" .")
+    if len(key) > 3 and key.endswith("s") and not key.endswith(("ss", "us")):
+        key = key[:-1]  # "REST APIs" / "REST API"
+    return key
+
+
+def merge_skills(partials):
+    """
+    Merge per-chunk results into {category: [skill, ...]}, most frequently
+    mentioned first. A skill listed under several categories goes to the
+    one most chunks agreed on.
+    """
+    seen = {}  # normalised key → {"name", "count", "votes": {category: n}, "order"}
+
+    for partial in partials:
+        for category, _ in CATEGORIES:
+            for name in partial.get(category, []):
+                key = normalize_skill(name)
+                if not key:
+                    continue
+
+                entry = seen.setdefault(key, {"name": name, "count": 0, "votes": {}, "order": len(seen)})
+                entry["count"] += 1
+                entry["votes"][category] = entry["votes"].get(category, 0) + 1
+
+    merged = {category: [] for category, _ in CATEGORIES}
+    for entry in sorted(seen.values(), key=lambda e: (-e["count"], e["order"])):
+        category = max(entry["votes"], key=entry["votes"].get)
+        merged[category].append(entry["name"])
+
+    return merged
+
+
+def skills_to_markdown(merged):
+    lines = []
+    for category, title in CATEGORIES:
+        names = merged.get(category) or []
+        lines.append(f"**{title}**")
+        lines.extend(f"- {name}" for name in names)
+        if not names:
+            lines.append("- _none found_")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def _remember(cache_key, result):
+    with _results_lock:
+        _results[cache_key] = result
+        _results.move_to_end(cache_key)
+        while len(_results) > SKILL_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def extract_skills(text, doc_hash=None, model=SKILL_MODEL, workers=SKILL_WORKERS,
+                   chunk_tokens=SKILL_CHUNK_TOKENS):
+    """
+    Map-reduce skill extraction. Returns
+    {"skills": {category: [...]}, "markdown", "chunks", "failed_chunks", "cached"}.
+    Raises only if every chunk failed.
+    """
+    doc_hash = doc_hash or hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    cache_key = f"{model}:{chunk_tokens}:{doc_hash}"
+
+    with _results_lock:
+        if cache_key in _results:
+            _results.move_to_end(cache_key)
+            add_counter("cache_requests_total", 1, cache="skills", result="hit")
+            return dict(_results[cache_key], cached=True)
+
+    cached = cache_get("skills", cache_key)
+    if cached is not None:
+        _remember(cache_key, cached)
+        return dict(cached, cached=True)
+
+    chunks = split_into_token_chunks(text, chunk_tokens)
+    if not chunks:
+        return {"skills": merge_skills([]), "markdown": skills_to_markdown(merge_skills([])),
+                "chunks": 0, "failed_chunks": 0, "cached": False}
+
+    print(f"🧠 Extracting skills from {len(chunks)} chunks with {min(workers, len(chunks))} workers...")
+
+    partials = []
+    errors = []
+
+    with span("skills_extract", chunks=len(chunks), workers=workers):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks))),
+                                thread_name_prefix="skills") as executor:
+            # Each task runs in a copy of this context so its span nests under skills_extract
+            futures = [
+                executor.submit(contextvars.copy_context().run, extract_chunk_skills, chunk, model)
+                for chunk in chunks
+            ]
+            for future in futures:
+                try:
+                    partials.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+                    print(f"⚠️ Skill extraction failed for a chunk: {e}")
+
+    if not partials:
+        raise errors[0]
+
+    merged = merge_skills(partials)
+    result = {
+        "skills": merged,
+        "markdown": skills_to_markdown(merged),
+        "chunks": len(chunks),
+        "failed_chunks": len(errors),
+        "cached": False
+    }
+
+    # Only complete results are cached per document; partial ones are retried
+    if not errors:
+        _remember(cache_key, result)
+        cache_set("skills", cache_key, result)
+
+    return result
@@ -3,11 +3,37 @@ import os
 import re
 import heapq
 from dotenv import load_dotenv
+from tracing import span, add_token_usage, add_counter
+from shared_cache import cache_get, cache_set
+from rate_limit import call_with_limits
+from context_builder import count_tokens, truncate_to_tokens
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# SUMMARY_MODE=gpt (default) sends the whole page, as before.
+# SUMMARY_MODE=cascade (opt-in): the extractive pass below keeps the most
+# informative sentences within SUMMARY_CASCADE_BUDGET tokens and only that
+# goes to GPT (fewer prompt tokens, faster completions). A larger budget
+# keeps more of the page for GPT; a smaller one is cheaper and faster.
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "gpt").lower()
+SUMMARY_CASCADE_BUDGET = int(os.getenv("SUMMARY_CASCADE_BUDGET", "600"))
+# Sentences whose content terms overlap an already selected one by more
+# than this (Jaccard) are skipped (syndicated / repeated paragraphs).
+# Terms found in more than SUMMARY_BOILERPLATE_SHARE of the sentences are
+# page boilerplate and don't count. If that leaves the selection under
+# SUMMARY_MIN_FILL of the budget, it is topped up with the best remaining
+# sentences regardless of overlap.
+SUMMARY_REDUNDANCY = float(os.getenv("SUMMARY_REDUNDANCY", "0.7"))
+SUMMARY_BOILERPLATE_SHARE = float(os.getenv("SUMMARY_BOILERPLATE_SHARE", "0.3"))
+SUMMARY_MIN_FILL = float(os.getenv("SUMMARY_MIN_FILL", "0.6"))
+
+_STOPWORDS = frozenset("""
+    a an the and or but if of to in on at by for with from as is are was were be been it its
+    this that these those he she they we you i not no so than then there their our your
+""".split())
+
 # ============================================================
 # LOCAL SUMMARIZER (Free fallback)
 # ============================================================
@@ -37,6 +63,76 @@ def local_summarize(text, sentence_count=5):
     return summary
 
 
+# ============================================================
+# EXTRACTIVE PRE-COMPRESSION (cascade stage 1)
+# ============================================================
+def extractive_compress(text, token_budget=SUMMARY_CASCADE_BUDGET):
+    """
+    The most informative sentences of `text` that fit in token_budget, in
+    their original order. Text already within budget is returned as is.
+    """
+    if not text or count_tokens(text) <= token_budget:
+        return text
+
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text.replace("\n", " ")) if s.strip()]
+
+    freq = {}
+    for word in re.findall(r'\w+', text.lower()):
+        if word not in _STOPWORDS:
+            freq[word] = freq.get(word, 0) + 1
+
+    scored = []
+    for position, sent in enumerate(sentences):
+        words = [w for w in re.findall(r'\w+', sent.lower()) if w not in _STOPWORDS]
+        if not words:
+            continue
+        # Mean term frequency, so long sentences don't win by length alone;
+        # a small bonus for the lead, where pages state their point
+        score = sum(freq[w] for w in words) / len(words) ** 0.5
+        score *= 1.0 + 0.5 / (1 + position)
+        scored.append((score, position, sent, set(words)))
+
+    sentence_freq = {}
+    for _, _, _, words in scored:
+        for word in words:
+            sentence_freq[word] = sentence_freq.get(word, 0) + 1
+    boilerplate = {w for w, n in sentence_freq.items() if n > max(2, SUMMARY_BOILERPLATE_SHARE * len(scored))}
+
+    def overlap(a, b):
+        union = a | b
+        return len(a & b) / len(union) if union else 1.0
+
+    ranked = sorted(scored, key=lambda s: s[0], reverse=True)
+    selected = []
+    used = 0
+    for score, position, sent, words in ranked:
+        tokens = count_tokens(sent)
+        if used + tokens > token_budget:
+            continue
+        terms = words - boilerplate
+        if any(overlap(terms, other) > SUMMARY_REDUNDANCY for _, _, other in selected):
+            continue
+        selected.append((position, sent, terms))
+        used += tokens
+        if used >= token_budget:
+            break
+
+    if used < SUMMARY_MIN_FILL * token_budget:
+        taken = {position for position, _, _ in selected}
+        for score, position, sent, words in ranked:
+            tokens = count_tokens(sent)
+            if position in taken or used + tokens > token_budget:
+                continue
+            selected.append((position, sent, words))
+            used += tokens
+
+    selected.sort()
+    if not selected:
+        # No single sentence fits: cut by tokens (one is left for the " …" marker)
+        return truncate_to_tokens(text, max(1, token_budget - 1))
+    return " ".join(sent for _, sent, _ in selected)
+
+
 # ============================================================
 # GPT SUMMARIZER (Only used if API enabled)
 # ============================================================
@@ -47,8 +143,8 @@ def gpt_summarize(text):
         return None
 
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        from llm_client import get_openai_client
+        client = get_openai_client()
 
         print("🔵 Trying GPT summarizer (max 120 tokens)...")
 
@@ -60,11 +156,14 @@ def gpt_summarize(text):
         {text}
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=120
-        )
+        with span("completion", model="gpt-4o-mini", purpose="summarize"):
+            response = call_with_limits(
+                "openai.chat", client.chat.completions.create,
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=120
+            )
+        add_token_usage(getattr(response, "usage", None), "gpt-4o-mini", endpoint="summarize")
 
         print("🔵 GPT summary successful!")
         return response.choices[0].message.content
@@ -77,18 +176,51 @@ def gpt_summarize(text):
 # ============================================================
 # MASTER SUMMARIZER
 # ============================================================
-def summarize(text):
-    # If GPT disabled → use local
-    if not OPENAI_API_KEY:
-        print("⚠️ GPT disabled — using local summarizer.")
-        return local_summarize(text)
-
-    # Try GPT summarizer
-    gpt_output = gpt_summarize(text)
-
-    if gpt_output:
-        return gpt_output
-
-    # Fallback to local summarizer
-    print("🔁 Falling back to LOCAL summarizer.")
-    return local_summarize(text)
+def summarize(text, mode=None, token_budget=None):
+    return summarize_with_source(text, mode=mode, token_budget=token_budget)[0]
+
+
+def summarize_with_source(text, mode=None, token_budget=None):
+    """
+    (summary, source): source is "gpt", "cascade" or "cached" for GPT
+    summaries, "local" / "local_fallback" for the local summarizer.
+    """
+    mode = mode or SUMMARY_MODE
+    token_budget = token_budget or SUMMARY_CASCADE_BUDGET
+
+    with span("summarize", chars=len(text or "")) as sp:
+        # If GPT disabled → use local
+        if not OPENAI_API_KEY:
+            print("⚠️ GPT disabled — using local summarizer.")
+            sp["attrs"]["mode"] = "local"
+            return local_summarize(text), "local"
+
+        # Cascade summaries depend on the budget; plain GPT keeps the old keys
+        cache_key = f"cascade:{token_budget}:{text}" if mode == "cascade" else text
+
+        cached = cache_get("summary", cache_key)
+        if cached is not None:
+            sp["attrs"]["mode"] = "cached"
+            return cached, "cached"
+
+        prompt_text = text
+        if mode == "cascade":
+            with span("extractive_compress", budget=token_budget) as cp:
+                prompt_text = extractive_compress(text, token_budget)
+                before, after = count_tokens(text or ""), count_tokens(prompt_text or "")
+                cp["attrs"].update(tokens_in=before, tokens_out=after)
+            add_counter("summary_prompt_tokens_saved_total", max(0, before - after))
+
+        # Try GPT summarizer
+        gpt_output = gpt_summarize(prompt_text)
+
+        if gpt_output:
+            source = "cascade" if mode == "cascade" else "gpt"
+            sp["attrs"]["mode"] = source
+            cache_set("summary", cache_key, gpt_output)  # local fallbacks are never cached
+            return gpt_output, source
+
+        # Fallback to local summarizer
+        print("🔁 Falling back to LOCAL summarizer.")
+        sp["attrs"]["mode"] = "local_fallback"
+        return local_summarize(text), "local_fallback"
@@ -0,0 +1,226 @@
+# tracing.py (LIGHTWEIGHT SPANS + COUNTERS)
+#
+#   with span("fetch", url=url):          # nested spans get parent/child IDs
+#       ...
+#   add_counter("bytes_total", len(html), kind="fetch")
+#
+# Finished spans are kept in memory (bounded), optionally appended to a
+# JSONL file (TRACE_JSONL=path) and summarised for a Prometheus-style
+# /metrics endpoint (start_metrics_server or METRICS_PORT in app.py).
+
+import os
+import json
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_JSONL = os.getenv("TRACE_JSONL")
+MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "5000"))
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id():
+    return os.urandom(8).hex()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+# ============================================================
+# TRACER (process-wide)
+# ============================================================
+class Tracer:
+
+    def __init__(self, max_spans=MAX_SPANS, jsonl_path=TRACE_JSONL):
+        self.lock = threading.Lock()
+        self.spans = deque(maxlen=max_spans)
+        self.counters = {}        # (name, labels) → value
+        self.span_stats = {}      # span name → [count, total_seconds, errors]
+        self.jsonl_path = jsonl_path
+
+    def record(self, record):
+        with self.lock:
+            self.spans.append(record)
+
+            stats = self.span_stats.setdefault(record["name"], [0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += record["duration_ms"] / 1000.0
+            if record["error"]:
+                stats[2] += 1
+
+            if self.jsonl_path:
+                try:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, default=str) + "\n")
+                except Exception as e:
+                    print(f"⚠️ Trace export failed: {e}")
+
+    def add(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def get_trace(self, trace_id):
+        with self.lock:
+            spans = [dict(s) for s in self.spans if s["trace_id"] == trace_id]
+        return sorted(spans, key=lambda s: s["start"])
+
+    def export_jsonl(self, path, trace_id=None):
+        with self.lock:
+            spans = [s for s in self.spans if trace_id is None or s["trace_id"] == trace_id]
+
+        with open(path, "w", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s, default=str) + "\n")
+        return len(spans)
+
+    def prometheus_text(self):
+        lines = []
+
+        with self.lock:
+            counters = dict(self.counters)
+            span_stats = {k: list(v) for k, v in self.span_stats.items()}
+
+        names = sorted({name for name, _ in counters})
+        for name in names:
+            lines.append(f"# TYPE {name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n != name:
+                    continue
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        if span_stats:
+            lines.append("# TYPE span_duration_seconds summary")
+            for name, (count, total, _) in sorted(span_stats.items()):
+                lines.append(f'span_duration_seconds_count{{span="{name}"}} {count}')
+                lines.append(f'span_duration_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append("# TYPE span_errors_total counter")
+            for name, (_, _, errors) in sorted(span_stats.items()):
+                lines.append(f'span_errors_total{{span="{name}"}} {errors}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.span_stats.clear()
+
+
+tracer = Tracer()
+
+
+# ============================================================
+# SPAN API
+# ============================================================
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block. Nested spans share the trace_id and point at their parent.
+    Yields the span record; set record["attrs"][...] to attach results.
+    """
+    parent = _current_span.get()
+    record = {
+        "trace_id": parent["trace_id"] if parent else _new_id(),
+        "span_id": _new_id(),
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "end": None,
+        "duration_ms": None,
+        "attrs": attrs,
+        "error": None
+    }
+
+    token = _current_span.set(record)
+    started = time.perf_counter()
+
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+        record["end"] = record["start"] + record["duration_ms"] / 1000.0
+        tracer.record(record)
+
+
+def record_span(name, start, duration_ms, parent=None, error=None, **attrs):
+    """
+    Record an already-timed span (e.g. a streamed completion that finishes
+    after its caller returned). `parent` is a span record, default current.
+    """
+    parent = parent or _current_span.get()
+    tracer.record({
+        "trace_id": parent["trace_id"] if parent else _new_id(),
+        "span_id": _new_id(),
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": start,
+        "end": start + duration_ms / 1000.0,
+        "duration_ms": round(duration_ms, 3),
+        "attrs": attrs,
+        "error": error
+    })
+
+
+def current_span():
+    return _current_span.get()
+
+
+def add_counter(name, value=1, **labels):
+    tracer.add(name, value, **labels)
+
+
+def add_token_usage(usage, model=None, endpoint="chat"):
+    """Count tokens from an OpenAI `usage` object (missing usage is ignored)."""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            add_counter("tokens_total", value, kind=kind.split("_")[0], endpoint=endpoint,
+                        model=model or "unknown")
+
+
+def get_trace(trace_id):
+    return tracer.get_trace(trace_id)
+
+
+# ============================================================
+# PROMETHEUS-STYLE TEXT ENDPOINT
+# ============================================================
+def start_metrics_server(port=9108, host="127.0.0.1"):
+    """Serve tracer.prometheus_text() on http://host:port/metrics in a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            body = tracer.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics endpoint: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,88 @@
+# upload_cache.py (HASH-KEYED UPLOADS + CACHED PDF EXTRACTION)
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from pdf_to_text import pdf_to_pages
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "tmp")
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "16"))
+
+
+# -------------------------------
+# Store upload once per content hash
+# -------------------------------
+def store_upload(data, upload_dir=UPLOAD_DIR, suffix=".pdf"):
+    """
+    Save uploaded bytes as <upload_dir>/<sha256><suffix>.
+    The same content is only written once, whatever the upload was called.
+    Returns (file_hash, path).
+    """
+    file_hash = hashlib.sha256(data).hexdigest()
+    path = os.path.join(upload_dir, file_hash + suffix)
+
+    if not os.path.exists(path):
+        os.makedirs(upload_dir, exist_ok=True)
+        tmp_path = path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        print(f"📥 Stored upload: {path}")
+
+    return file_hash, path
+
+
+# -------------------------------
+# LRU cache of extracted text/pages
+# -------------------------------
+class ExtractionCache:
+    """
+    Keeps extracted PDF text + page structure per content hash.
+    Least recently used documents are evicted past max_entries.
+    """
+
+    def __init__(self, max_entries=EXTRACTION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, file_hash, pdf_path):
+        with self.lock:
+            if file_hash in self.entries:
+                self.entries.move_to_end(file_hash)
+                return self.entries[file_hash]
+
+        # Extract outside the lock so other documents are not blocked
+        try:
+            pages = pdf_to_pages(pdf_path)
+            print("📄 PDF text extracted successfully.")
+        except Exception as e:
+            print(f"❌ PDF text extraction failed: {e}")
+            return {"text": "", "pages": []}
+
+        entry = {
+            "text": "".join(p + "\n" for p in pages if p),
+            "pages": pages
+        }
+
+        with self.lock:
+            self.entries[file_hash] = entry
+            self.entries.move_to_end(file_hash)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+extraction_cache = ExtractionCache()
+
+
+def get_pdf_text(file_hash, pdf_path):
+    """Cached equivalent of pdf_ingest.extract_pdf_text for stored uploads."""
+    return extraction_cache.get(file_hash, pdf_path)["text"]
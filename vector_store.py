@@ -0,0 +1,409 @@
+# vector_store.py (QUANTIZED LOCAL VECTOR STORE — TWO-STAGE SEARCH)
+#
+#   store = LocalVectorStore("memory_store", dimension=384)
+#   store.upsert(vectors=[{"id": "a", "values": vec, "metadata": {...}}])
+#   store.query(vector=q, top_k=5, include_metadata=True)   # Pinecone-shaped result
+#
+# Per vector, only compact codes stay in RAM:
+#   - binary sign code   dimension / 8 bytes (a Python int, Hamming via bit_count)
+#   - int8 scalar code   dimension bytes + one float32 scale
+# Full float32 vectors live in vectors.f32 on disk and are read back only
+# for the few candidates being rescored.
+#
+# Search:
+#   1. candidate scan over every vector: Hamming on sign codes (default), or
+#      int8 dot products (VECTOR_SEARCH_MODE=int8; closer to exact, but in
+#      pure Python slower than the Hamming scan)
+#   2. exact float32 cosine on the best `candidates` rows → top_k
+#
+# Files in the store directory:
+#   store.json     {"dimension": ...}
+#   vectors.f32    row r at r * dimension * 4 (L2-normalised float32)
+#   codes.bin      row r: float32 scale | int8 codes | packed sign bits
+#   rows.jsonl     append-only log of {"row", "id", "ns", "metadata"} / {"row", "deleted"}
+#
+# Namespaces and metadata filters (same operators as Pinecone) narrow the
+# rows before stage 1, so a scoped query only scans its partition.
+#
+# One writing process per directory (threads are fine); batch workers
+# therefore do not open it.
+
+import os
+import sys
+import json
+import math
+import heapq
+import struct
+import threading
+from array import array
+from operator import mul
+
+from tracing import span, add_counter
+
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", "memory_store")
+VECTOR_SEARCH_MODE = os.getenv("VECTOR_SEARCH_MODE", "binary")   # binary | int8
+VECTOR_RESCORE_CANDIDATES = int(os.getenv("VECTOR_RESCORE_CANDIDATES", "100"))
+
+
+# ============================================================
+# QUANTIZATION
+# ============================================================
+def normalize(vector):
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def quantize_int8(vector):
+    """Symmetric per-vector scalar quantization → (scale, array('b'))."""
+    peak = max((abs(v) for v in vector), default=0.0)
+    scale = peak / 127.0 if peak else 1.0
+    return scale, array("b", (int(round(v / scale)) for v in vector))
+
+
+def sign_bits(vector):
+    """One bit per dimension (1 where the value is positive), as an int."""
+    bits = 0
+    for v in vector:
+        bits = (bits << 1) | (v > 0)
+    return bits
+
+
+# ============================================================
+# METADATA FILTERS (Pinecone subset)
+# ============================================================
+def matches_filter(metadata, flt):
+    """$eq $ne $in $nin $gt $gte $lt $lte $and $or; bare values mean $eq."""
+    if not flt:
+        return True
+
+    for key, cond in flt.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, c) for c in cond):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+
+        for op, target in cond.items():
+            if op == "$eq" and value != target:
+                return False
+            if op == "$ne" and value == target:
+                return False
+            if op == "$in" and value not in target:
+                return False
+            if op == "$nin" and value in target:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > target:
+                    return False
+                if op == "$gte" and not value >= target:
+                    return False
+                if op == "$lt" and not value < target:
+                    return False
+                if op == "$lte" and not value <= target:
+                    return False
+
+    return True
+
+
+# ============================================================
+# STORE
+# ============================================================
+class LocalVectorStore:
+
+    def __init__(self, path=VECTOR_STORE_DIR, dimension=None):
+        self.path = path
+        self.lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "store.json")
+
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                stored_dimension = json.load(f)["dimension"]
+            if dimension is not None and dimension != stored_dimension:
+                raise ValueError(
+                    f"Vector store {path} holds {stored_dimension}-dim vectors, got {dimension}; "
+                    "use a new VECTOR_STORE_DIR when changing embedding backends."
+                )
+            dimension = stored_dimension
+        elif dimension is None:
+            raise ValueError(f"New vector store {path} needs a dimension.")
+        else:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dimension": dimension}, f)
+
+        self.dimension = dimension
+        self.bit_bytes = (dimension + 7) // 8
+        self.code_size = 4 + dimension + self.bit_bytes
+        self.float_size = 4 * dimension
+
+        # In-memory state, indexed by row
+        self.ids = []           # vector id, or None once deleted
+        self.row_namespaces = []
+        self.metadata = []
+        self.bits = []          # sign codes
+        self.scales = array("f")
+        self.codes = array("b")  # row-major int8 codes
+        self.row_of = {}        # (namespace, id) → row
+        self.ns_rows = {}       # namespace → set of live rows
+
+        self._load()
+
+        self.float_file = self._open_data_file("vectors.f32")
+        self.code_file = self._open_data_file("codes.bin")
+        self.log_file = open(os.path.join(path, "rows.jsonl"), "a", encoding="utf-8")
+
+    # --------------------------------------------------------
+    # persistence
+    # --------------------------------------------------------
+    def _open_data_file(self, name):
+        full = os.path.join(self.path, name)
+        if not os.path.exists(full):
+            open(full, "wb").close()
+        return open(full, "r+b")
+
+    def _load(self):
+        codes_path = os.path.join(self.path, "codes.bin")
+        rows_path = os.path.join(self.path, "rows.jsonl")
+        if not os.path.exists(codes_path):
+            return
+
+        with open(codes_path, "rb") as f:
+            raw = f.read()
+
+        rows = len(raw) // self.code_size
+        for r in range(rows):
+            offset = r * self.code_size
+            self.scales.append(struct.unpack_from("<f", raw, offset)[0])
+            self.codes.frombytes(raw[offset + 4:offset + 4 + self.dimension])
+            self.bits.append(int.from_bytes(raw[offset + 4 + self.dimension:offset + self.code_size], "big"))
+
+        self.ids = [None] * rows
+        self.row_namespaces = [""] * rows
+        self.metadata = [None] * rows
+
+        if os.path.exists(rows_path):
+            with open(rows_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line
+                    r = entry["row"]
+                    if r >= rows:
+                        continue  # codes never made it to disk
+                    if entry.get("deleted"):
+                        self._drop_row(r)
+                    else:
+                        ns = entry.get("ns", "")
+                        self.ids[r] = entry["id"]
+                        self.row_namespaces[r] = ns
+                        self.metadata[r] = entry.get("metadata") or {}
+                        self.row_of[(ns, entry["id"])] = r
+                        self.ns_rows.setdefault(ns, set()).add(r)
+
+        print(f"🗄️ Loaded local vector store: {len(self.row_of)} vectors ({self.dimension} dims).")
+
+    def _drop_row(self, r):
+        if self.ids[r] is None:
+            return
+        ns = self.row_namespaces[r]
+        self.row_of.pop((ns, self.ids[r]), None)
+        self.ns_rows.get(ns, set()).discard(r)
+        self.ids[r] = None
+        self.metadata[r] = None
+
+    def _write_row(self, r, unit, scale, code, bits):
+        floats = array("f", unit)
+        if sys.byteorder != "little":
+            floats.byteswap()
+
+        record = struct.pack("<f", scale) + code.tobytes() + bits.to_bytes(self.bit_bytes, "big")
+
+        # Rows are fixed size, so updates overwrite in place
+        for handle, size, payload in ((self.float_file, self.float_size, floats.tobytes()),
+                                      (self.code_file, self.code_size, record)):
+            handle.seek(r * size)
+            handle.write(payload)
+            handle.flush()
+
+    def _read_floats(self, rows):
+        out = {}
+        for r in sorted(rows):  # sorted → mostly sequential reads
+            self.float_file.seek(r * self.float_size)
+            values = array("f")
+            values.frombytes(self.float_file.read(self.float_size))
+            if sys.byteorder != "little":
+                values.byteswap()
+            out[r] = values
+        return out
+
+    # --------------------------------------------------------
+    # Pinecone-compatible API
+    # --------------------------------------------------------
+    def upsert(self, vectors, namespace=""):
+        count = 0
+
+        with span("local_upsert", size=len(vectors), namespace=namespace), self.lock:
+            for item in vectors:
+                if isinstance(item, dict):
+                    vid, values, meta = item["id"], item["values"], item.get("metadata") or {}
+                else:
+                    vid, values = item[0], item[1]
+                    meta = item[2] if len(item) > 2 else {}
+
+                if len(values) != self.dimension:
+                    raise ValueError(f"Vector {vid} has {len(values)} dims, store expects {self.dimension}")
+
+                unit = normalize(values)
+                scale, code = quantize_int8(unit)
+                bits = sign_bits(unit)
+
+                r = self.row_of.get((namespace, vid))
+                if r is None:
+                    r = len(self.ids)
+                    self.ids.append(vid)
+                    self.row_namespaces.append(namespace)
+                    self.metadata.append(meta)
+                    self.bits.append(bits)
+                    self.scales.append(scale)
+                    self.codes.extend(code)
+                    self.row_of[(namespace, vid)] = r
+                    self.ns_rows.setdefault(namespace, set()).add(r)
+                else:
+                    self.metadata[r] = meta
+                    self.bits[r] = bits
+                    self.scales[r] = scale
+                    self.codes[r * self.dimension:(r + 1) * self.dimension] = code
+
+                self._write_row(r, unit, scale, code, bits)
+                self.log_file.write(json.dumps({"row": r, "id": vid, "ns": namespace, "metadata": meta}) + "\n")
+                count += 1
+
+            self.log_file.flush()
+
+        add_counter("local_vectors_upserted_total", count)
+        return {"upserted_count": count}
+
+    def delete(self, ids=None, namespace="", delete_all=False, filter=None):
+        with self.lock:
+            if delete_all or filter:
+                rows = [r for r in self.ns_rows.get(namespace, ())
+                        if delete_all or matches_filter(self.metadata[r], filter)]
+            else:
+                rows = [self.row_of[(namespace, vid)] for vid in ids or [] if (namespace, vid) in self.row_of]
+
+            for r in rows:
+                self._drop_row(r)
+                self.log_file.write(json.dumps({"row": r, "deleted": True}) + "\n")
+            self.log_file.flush()
+
+    def query(self, vector, top_k=5, include_metadata=True, include_values=False,
+              candidates=None, mode=None, namespace="", filter=None, **kwargs):
+        mode = mode or VECTOR_SEARCH_MODE
+        candidates = max(top_k, candidates or VECTOR_RESCORE_CANDIDATES)
+
+        unit = normalize(vector)
+
+        with span("local_query", mode=mode, top_k=top_k, candidates=candidates, namespace=namespace), self.lock:
+            # Prefilter: only this namespace's rows, only matching metadata
+            live = self.ns_rows.get(namespace, ())
+            if filter:
+                live = [r for r in live if matches_filter(self.metadata[r], filter)]
+            else:
+                live = list(live)
+            if not live:
+                return {"matches": []}
+
+            # Stage 1: cheap scan over compact codes
+            if mode == "int8":
+                q_scale, q_code = quantize_int8(unit)
+                dim = self.dimension
+                codes = self.codes
+                shortlist = heapq.nlargest(
+                    candidates, live,
+                    key=lambda r: sum(map(mul, q_code, codes[r * dim:(r + 1) * dim])) * self.scales[r]
+                )
+            else:
+                q_bits = sign_bits(unit)
+                bits = self.bits
+                shortlist = heapq.nsmallest(candidates, live, key=lambda r: (q_bits ^ bits[r]).bit_count())
+
+            # Stage 2: exact cosine on float32 rows read from disk
+            floats = self._read_floats(shortlist)
+            scored = heapq.nlargest(
+                top_k, ((sum(map(mul, unit, floats[r])), r) for r in shortlist)
+            )
+
+            matches = []
+            for score, r in scored:
+                match = {"id": self.ids[r], "score": score}
+                if include_metadata:
+                    match["metadata"] = self.metadata[r]
+                if include_values:
+                    match["values"] = list(floats[r])
+                matches.append(match)
+
+        return {"matches": matches}
+
+    def list(self, namespace="", prefix=None, limit=100):
+        """Pages of vector ids in a namespace, like Pinecone's index.list()."""
+        with self.lock:
+            ids = [self.ids[r] for r in sorted(self.ns_rows.get(namespace, ()))]
+        if prefix:
+            ids = [vid for vid in ids if vid.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def fetch(self, ids, namespace=""):
+        with self.lock:
+            rows = {vid: self.row_of[(namespace, vid)] for vid in ids if (namespace, vid) in self.row_of}
+            floats = self._read_floats(rows.values())
+            return {
+                "namespace": namespace,
+                "vectors": {
+                    vid: {"id": vid, "values": floats[r].tolist(), "metadata": dict(self.metadata[r] or {})}
+                    for vid, r in rows.items()
+                },
+            }
+
+    def describe_index_stats(self):
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": len(self.row_of),
+            "namespaces": {ns: {"vector_count": len(rows)} for ns, rows in self.ns_rows.items() if rows},
+        }
+
+    def memory_bytes(self):
+        """Approximate RAM held by the vector codes (ids/metadata excluded)."""
+        return (
+            sum(sys.getsizeof(b) for b in self.bits)
+            + self.codes.buffer_info()[1] * self.codes.itemsize
+            + self.scales.buffer_info()[1] * self.scales.itemsize
+        )
+
+    def close(self):
+        with self.lock:
+            for handle in (self.float_file, self.code_file, self.log_file):
+                handle.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_local_store(dimension=None, path=VECTOR_STORE_DIR):
+    """One store object per directory per process."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = LocalVectorStore(path, dimension)
+        return _stores[path]